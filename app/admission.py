@@ -0,0 +1,131 @@
+import asyncio
+import math
+import os
+import time
+
+from app import metrics
+
+# Per-client budget in cost units (roughly tokens requested) refilled per second,
+# and the most a client can spend in a burst; a rate of 0 disables the limiter
+RATE_LIMIT_RATE = float(os.getenv("RATE_LIMIT_RATE", "1000"))
+RATE_LIMIT_BURST = float(os.getenv("RATE_LIMIT_BURST", "5000"))
+# Clients tracked before idle, fully refilled buckets are forgotten
+RATE_LIMIT_MAX_CLIENTS = int(os.getenv("RATE_LIMIT_MAX_CLIENTS", "10000"))
+
+# Generations running at once, requests allowed to wait for a slot, and how long they wait
+GENERATE_CONCURRENCY = int(os.getenv("GENERATE_CONCURRENCY", str(os.cpu_count() or 4)))
+GENERATE_QUEUE_SIZE = int(os.getenv("GENERATE_QUEUE_SIZE", "32"))
+GENERATE_QUEUE_TIMEOUT = float(os.getenv("GENERATE_QUEUE_TIMEOUT", "5.0"))
+
+# Fixed overhead charged per request on top of its max_length
+REQUEST_BASE_COST = 20
+
+class Rejected(Exception):
+    def __init__(self, status_code, detail, retry_after):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+    def headers(self):
+        return {"Retry-After": str(max(1, math.ceil(self.retry_after)))}
+
+def request_cost(max_length):
+    return REQUEST_BASE_COST + max_length
+
+class TokenBucket:
+    def __init__(self, rate, capacity, now):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = now
+
+    def refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self, cost, now):
+        # Returns 0 if cost was taken, else seconds until it could be
+        self.refill(now)
+        cost = min(cost, self.capacity)
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return 0.0
+        return (cost - self.tokens) / self.rate
+
+class RateLimiter:
+    """Token bucket per client. Only touched from the event loop, so no locking."""
+
+    def __init__(self, rate=RATE_LIMIT_RATE, burst=RATE_LIMIT_BURST, max_clients=RATE_LIMIT_MAX_CLIENTS):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self.buckets = {}
+
+    def check(self, client, cost):
+        if not self.rate:
+            return 0.0
+        now = time.monotonic()
+        bucket = self.buckets.get(client)
+        if bucket is None:
+            if len(self.buckets) >= self.max_clients:
+                self.forget_idle(now)
+            bucket = self.buckets[client] = TokenBucket(self.rate, self.burst, now)
+            metrics.rate_limit_clients.set(len(self.buckets))
+        return bucket.take(cost, now)
+
+    def forget_idle(self, now):
+        # A full bucket holds no state worth keeping
+        for client, bucket in list(self.buckets.items()):
+            bucket.refill(now)
+            if bucket.tokens >= bucket.capacity:
+                del self.buckets[client]
+
+class ConcurrencyLimiter:
+    """At most `limit` generations at once, with a bounded queue of waiters."""
+
+    def __init__(self, limit=GENERATE_CONCURRENCY, queue_size=GENERATE_QUEUE_SIZE, timeout=GENERATE_QUEUE_TIMEOUT):
+        self.limit = limit
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.semaphore = None
+        self.in_flight = 0
+        self.waiting = 0
+
+    async def acquire(self):
+        # Created lazily so the semaphore binds to the running event loop
+        if self.semaphore is None:
+            self.semaphore = asyncio.Semaphore(self.limit)
+        if self.semaphore.locked():
+            if self.waiting >= self.queue_size:
+                metrics.admission_rejections.inc(label="queue_full")
+                raise Rejected(503, "Server busy, generation queue is full", 1)
+            self.waiting += 1
+            metrics.generate_waiting.set(self.waiting)
+            try:
+                await asyncio.wait_for(self.semaphore.acquire(), self.timeout)
+            except asyncio.TimeoutError:
+                metrics.admission_rejections.inc(label="queue_timeout")
+                raise Rejected(503, "Server busy, timed out waiting for a generation slot", 1)
+            finally:
+                self.waiting -= 1
+                metrics.generate_waiting.set(self.waiting)
+        else:
+            await self.semaphore.acquire()
+        self.in_flight += 1
+        metrics.generate_in_flight.set(self.in_flight)
+
+    def release(self):
+        self.in_flight -= 1
+        metrics.generate_in_flight.set(self.in_flight)
+        self.semaphore.release()
+
+limiter = RateLimiter()
+slots = ConcurrencyLimiter()
+
+async def admit(client, max_length):
+    retry_after = limiter.check(client, request_cost(max_length))
+    if retry_after:
+        metrics.admission_rejections.inc(label="rate_limited")
+        raise Rejected(429, "Rate limit exceeded", retry_after)
+    await slots.acquire()
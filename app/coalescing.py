@@ -0,0 +1,63 @@
+from collections import OrderedDict
+import os
+import threading
+
+from app import metrics
+
+# Finished seeded generations kept for repeat requests; 0 disables the cache
+GENERATION_CACHE_SIZE = int(os.getenv("GENERATION_CACHE_SIZE", "1024"))
+
+class Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    """Runs at most one call per key; concurrent callers with the same key share it.
+
+    Finished results are kept in a bounded LRU cache when `cacheable(result)` says
+    so, and later callers with the same key are answered from it.
+    """
+
+    def __init__(self, cache_size=GENERATION_CACHE_SIZE):
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.calls = {}  # key -> Call in flight
+        self.lock = threading.Lock()
+
+    def do(self, key, fn, *args, cacheable=lambda result: True, **kwargs):
+        with self.lock:
+            if key in self.cache:
+                self.cache.move_to_end(key)
+                metrics.coalesced_requests.inc(label="cached")
+                return self.cache[key]
+            call = self.calls.get(key)
+            leader = call is None
+            if leader:
+                call = self.calls[key] = Call()
+
+        if not leader:
+            metrics.coalesced_requests.inc(label="waited")
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        metrics.coalesced_requests.inc(label="computed")
+        try:
+            call.result = fn(*args, **kwargs)
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self.lock:
+                del self.calls[key]
+                if call.error is None and self.cache_size and cacheable(call.result):
+                    self.cache[key] = call.result
+                    if len(self.cache) > self.cache_size:
+                        self.cache.popitem(last=False)
+            call.done.set()
+        return call.result
+
+generation = SingleFlight()
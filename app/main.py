@@ -1,10 +1,25 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from typing import Optional
+from fastapi import Depends, FastAPI, Header, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from app.model import generate_story
-from app.schemas import GenerateRequest
+from fastapi.responses import PlainTextResponse
+from app import admission, coalescing, metrics, profiling
+from app.responses import TOKEN_IDS_MEDIA_TYPE, Utf8JSONResponse, compressed_response, dumps, pack_token_ids
+from app.model import (
+    DEFAULT_MODEL, MODEL_WATCH_INTERVAL, UNKNOWN_TOKEN_ID, current_version, generate_story, get_model, model_pool, reload_model,
+    watch_registry,
+)
+from app.schemas import GenerateRequest, ProfilingConfig, ReloadRequest
 import os
 
-app = FastAPI(title="Urdu Story Generator API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Poll the model registry so a newly published version is picked up without a restart
+    if MODEL_WATCH_INTERVAL > 0:
+        watch_registry(MODEL_WATCH_INTERVAL)
+    yield
+
+app = FastAPI(title="Urdu Story Generator API", lifespan=lifespan, default_response_class=Utf8JSONResponse)
 
 # ── CORS ──────────────────────────────────────────────────────────────────────
 ALLOWED_ORIGINS = os.getenv(
@@ -20,6 +35,26 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# ── Admin ─────────────────────────────────────────────────────────────────────
+# Admin endpoints are disabled unless ADMIN_TOKEN is set
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+def require_admin(x_admin_token: Optional[str] = Header(default=None)):
+    if not ADMIN_TOKEN or x_admin_token != ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+# ── Metrics ───────────────────────────────────────────────────────────────────
+@app.middleware("http")
+async def track_queue_depth(request: Request, call_next):
+    # Runs on the event loop thread, so the gauge needs no locking
+    if request.url.path != "/generate":
+        return await call_next(request)
+    metrics.queue_depth.inc()
+    try:
+        return await call_next(request)
+    finally:
+        metrics.queue_depth.dec()
+
 # ── Routes ────────────────────────────────────────────────────────────────────
 @app.get("/")
 def root():
@@ -29,8 +64,108 @@ def root():
 def health():
     return {"status": "ok"}
 
-@app.post("/generate")
-def generate(request: GenerateRequest):
-    # Every request generates a unique story
-    story = generate_story(request.prefix, request.max_length)
-    return {"generated_story": story}
\ No newline at end of file
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.post("/admin/profiling", dependencies=[Depends(require_admin)])
+def configure_profiling(config: ProfilingConfig):
+    return profiling.configure(config.enabled, config.sample_rate)
+
+@app.post("/admin/reload", dependencies=[Depends(require_admin)])
+def reload(request: ReloadRequest = ReloadRequest()):
+    if request.model is None or request.model == DEFAULT_MODEL:
+        previous = get_model().version
+        try:
+            version = reload_model(request.version)
+        except FileNotFoundError as e:
+            raise HTTPException(status_code=404, detail=str(e))
+        except ValueError as e:
+            raise HTTPException(status_code=409, detail=str(e))
+        return {"previous_version": previous, "model_version": version}
+
+    # Named models are reloaded into the pool straight away rather than on next use
+    resident = model_pool.models.get(request.model)
+    try:
+        model = model_pool.get(request.model, request.version or current_version(model_pool.model_dir(request.model)))
+    except (KeyError, FileNotFoundError):
+        raise HTTPException(status_code=404, detail=f"Model {request.model} is not published")
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"previous_version": resident[0].version if resident else None, "model_version": model.version}
+
+def serving_model(name):
+    try:
+        return get_model(name)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown model: {name}")
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+@app.get("/vocab")
+def vocab(http_request: Request, model: Optional[str] = None):
+    # Maps the ids returned by response_format=token_ids back to BPE tokens
+    serving = serving_model(model)
+    body = dumps({"model_version": serving.version, "unknown_token_id": UNKNOWN_TOKEN_ID, "vocab": serving.vocab})
+    return compressed_response(body, Utf8JSONResponse.media_type, http_request.headers.get("Accept-Encoding"))
+
+async def admit(request: GenerateRequest, http_request: Request):
+    # Rate limit per client by requested length, then wait for a generation slot
+    client = http_request.client.host if http_request.client else "unknown"
+    try:
+        await admission.admit(client, request.max_length)
+    except admission.Rejected as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail, headers=e.headers())
+    try:
+        yield
+    finally:
+        admission.slots.release()
+
+def wants_profile(http_request: Request):
+    return (http_request.headers.get("X-Debug-Profile") == "1"
+            or http_request.query_params.get("profile") == "1")
+
+@app.post("/generate", dependencies=[Depends(admit)])
+def generate(request: GenerateRequest, http_request: Request):
+    options = dict(
+        temperature=request.temperature,
+        top_k=request.top_k,
+        top_p=request.top_p,
+        repetition_penalty=request.repetition_penalty,
+        repetition_window=request.repetition_window,
+        no_repeat_ngram_size=request.no_repeat_ngram_size,
+        stop_at_paragraph=request.stop_at_paragraph,
+        token_ids=request.response_format == "token_ids",
+    )
+
+    # Hold one model for the whole request; a reload swaps in a new one for later requests
+    model = serving_model(request.model)
+
+    # Unseeded requests generate a unique story every time. Profile only when an
+    # admin has switched profiling on and the client asks for it.
+    profile = None
+    if profiling.enabled and wants_profile(http_request) and profiling.sampled():
+        (story, truncated), profile = profiling.profile_call(
+            generate_story, request.prefix, request.max_length, model=model, seed=request.seed, **options
+        )
+    elif request.seed is not None:
+        # Identical seeded requests wait on one generation; finished stories are cached
+        # unless the time budget cut them short
+        key = (model.version, request.prefix, request.max_length, request.seed, *options.values())
+        story, truncated = coalescing.generation.do(
+            key, generate_story, request.prefix, request.max_length,
+            model=model, seed=request.seed, cacheable=lambda result: not result[1], **options
+        )
+    else:
+        story, truncated = generate_story(request.prefix, request.max_length, model=model, **options)
+
+    # Responses are built here rather than by FastAPI's encoder, and large ones compressed
+    accept_encoding = http_request.headers.get("Accept-Encoding")
+    if options["token_ids"]:
+        headers = {"X-Model-Version": model.version, "X-Truncated": "true" if truncated else "false"}
+        return compressed_response(pack_token_ids(story), TOKEN_IDS_MEDIA_TYPE, accept_encoding, headers)
+
+    response = {"generated_story": story, "truncated": truncated, "model_version": model.version}
+    if profile is not None:
+        response["profile"] = profile
+    return compressed_response(dumps(response), Utf8JSONResponse.media_type, accept_encoding)
\ No newline at end of file
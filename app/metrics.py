@@ -0,0 +1,160 @@
+from bisect import bisect_left
+
+# Minimal Prometheus text-format metrics. Nothing here takes a lock: updates are
+# plain attribute increments made once per request (never per token), so at worst
+# two racing threads lose one increment, which is acceptable for monitoring.
+
+DURATION_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+TOKEN_BUCKETS = (10, 25, 50, 100, 250, 500, 1000, 2500)
+
+REGISTRY = []
+
+def format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}"
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help, labelname=None, labelvalues=()):
+        self.name = name
+        self.help = help
+        self.labelname = labelname
+        self.values = {value: 0 for value in labelvalues} if labelname else {None: 0}
+        REGISTRY.append(self)
+
+    def inc(self, amount=1, label=None):
+        self.values[label] += amount
+
+    def get(self, label=None):
+        return self.values[label]
+
+    def samples(self):
+        for label, value in self.values.items():
+            labels = ((self.labelname, label),) if self.labelname else ()
+            yield self.name + "_total" if self.kind == "counter" else self.name, labels, value
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount=1, label=None):
+        self.values[label] -= amount
+
+    def set(self, value, label=None):
+        self.values[label] = value
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help, buckets, labelname=None, labelvalues=()):
+        self.name = name
+        self.help = help
+        self.buckets = buckets
+        self.labelname = labelname
+        # label -> [bucket counts..., +Inf count, sum]
+        self.values = {
+            value: [0] * (len(buckets) + 1) + [0.0]
+            for value in (labelvalues if labelname else (None,))
+        }
+        REGISTRY.append(self)
+
+    def observe(self, value, label=None):
+        counts = self.values[label]
+        counts[bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+
+    def samples(self):
+        for label, counts in self.values.items():
+            base = ((self.labelname, label),) if self.labelname else ()
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                yield self.name + "_bucket", base + (("le", bound),), cumulative
+            cumulative += counts[len(self.buckets)]
+            yield self.name + "_bucket", base + (("le", "+Inf"),), cumulative
+            yield self.name + "_count", base, cumulative
+            yield self.name + "_sum", base, counts[-1]
+
+def render():
+    lines = []
+    for metric in REGISTRY:
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        for name, labels, value in metric.samples():
+            lines.append(f"{name}{format_labels(labels)} {value}")
+    return "\n".join(lines) + "\n"
+
+# ── Generation metrics ────────────────────────────────────────────────────────
+stage_seconds = Histogram(
+    "urdu_generate_stage_seconds", "Time spent in each stage of generate_story",
+    DURATION_BUCKETS, "stage", ("tokenize", "sampling", "detokenize"),
+)
+tokens_generated = Histogram(
+    "urdu_generate_tokens", "Tokens sampled per request", TOKEN_BUCKETS,
+)
+predict_branch = Counter(
+    "urdu_predict_next_branch", "Tokens produced by each predict_next backoff branch",
+    "branch", ("context", "backoff", "random"),
+)
+alias_lookups = Counter(
+    "urdu_alias_table_lookups", "Precomputed alias table lookups on the sampling fast path",
+    "result", ("hit", "miss"),
+)
+alias_hit_ratio = Gauge(
+    "urdu_alias_table_hit_ratio", "Share of alias table lookups that found a precomputed table",
+)
+queue_depth = Gauge(
+    "urdu_generate_queue_depth", "/generate requests received and not yet answered",
+)
+coalesced_requests = Counter(
+    "urdu_generate_coalesced", "Seeded /generate requests by how they were answered",
+    "outcome", ("computed", "waited", "cached"),
+)
+admission_rejections = Counter(
+    "urdu_admission_rejections", "/generate requests turned away by admission control",
+    "reason", ("rate_limited", "queue_full", "queue_timeout"),
+)
+generate_in_flight = Gauge(
+    "urdu_generate_in_flight", "Generations holding a concurrency slot",
+)
+generate_waiting = Gauge(
+    "urdu_generate_waiting", "Admitted /generate requests waiting for a concurrency slot",
+)
+rate_limit_clients = Gauge(
+    "urdu_rate_limit_clients", "Clients with a tracked rate limit bucket",
+)
+prompt_cache_lookups = Counter(
+    "urdu_prompt_cache_lookups", "Prompt tokenizations served from the prompt cache",
+    "result", ("hit", "miss"),
+)
+prompt_cache_hit_ratio = Gauge(
+    "urdu_prompt_cache_hit_ratio", "Share of prompts tokenized from the prompt cache",
+)
+model_pool_bytes = Gauge(
+    "urdu_model_pool_bytes", "Estimated memory held by named models in the LRU pool",
+)
+model_pool_evictions = Counter(
+    "urdu_model_pool_evictions", "Named models evicted from the pool to stay within its budget",
+)
+
+def record_generation(tokenize_seconds, sampling_seconds, detokenize_seconds, new_tokens, stats):
+    stage_seconds.observe(tokenize_seconds, "tokenize")
+    stage_seconds.observe(sampling_seconds, "sampling")
+    stage_seconds.observe(detokenize_seconds, "detokenize")
+    tokens_generated.observe(new_tokens)
+
+    context, backoff, random_word, alias_hit, alias_miss = stats
+    predict_branch.inc(context, "context")
+    predict_branch.inc(backoff, "backoff")
+    predict_branch.inc(random_word, "random")
+    alias_lookups.inc(alias_hit, "hit")
+    alias_lookups.inc(alias_miss, "miss")
+    lookups = alias_lookups.get("hit") + alias_lookups.get("miss")
+    if lookups:
+        alias_hit_ratio.set(alias_lookups.get("hit") / lookups)
+
+def record_prompt_cache(prompt_hit):
+    prompt_cache_lookups.inc(1, "hit" if prompt_hit else "miss")
+    hits = prompt_cache_lookups.get("hit")
+    prompt_cache_hit_ratio.set(hits / (hits + prompt_cache_lookups.get("miss")))
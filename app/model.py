@@ -1,76 +1,672 @@
 from pathlib import Path
+from bisect import bisect_left
+from collections import OrderedDict, deque
+from itertools import accumulate
+import argparse
+import hashlib
 import json
+import os
+import pickle
 import random
+import threading
 import time
 
+from app import metrics, prompt_cache
+from models import trigram_model
+from models.trigram_model import load_merges
+
 # Make random generator truly random
 random.seed(time.time())
 
 BASE_PATH = Path(__file__).resolve().parent.parent
+COUNTS_PATH = BASE_PATH / "data/processed/trigram_counts.json"
+ALIAS_TABLES_PATH = BASE_PATH / "data/processed/alias_tables.json"
+MERGES_PATH = BASE_PATH / "data/processed/bpe_merges.json"
+
+# Versioned, content-hashed model artifacts; CURRENT names the version to serve
+MODEL_REGISTRY_DIR = Path(os.getenv("MODEL_REGISTRY_DIR", BASE_PATH / "data/registry"))
+# Seconds between checks of CURRENT for a new version; 0 disables the watcher
+MODEL_WATCH_INTERVAL = float(os.getenv("MODEL_WATCH_INTERVAL", "0"))
+
+# Named models (e.g. one per corpus) are published to MODEL_REGISTRY_DIR/<name>/ and
+# loaded on demand into an LRU pool that evicts cold models beyond this budget
+DEFAULT_MODEL = "default"
+MODEL_POOL_BUDGET_MB = float(os.getenv("MODEL_POOL_BUDGET_MB", "1024"))
+# In-memory size of a loaded model relative to its pickle, for when RSS is unavailable
+MODEL_MEMORY_FACTOR = 35
+
+# Sampling temperatures used by predict_next for each backoff tier
+CONTEXT_TEMPERATURE = 1.2
+BACKOFF_TEMPERATURE = 1.3
+
+EOS = "\uE000"  # End of Sentence
+EOP = "\uE001"  # End of Paragraph
+EOT = "\uE002"  # End of Story
+PARAGRAPH_END_TOKENS = {EOP, EOP + "</w>"}
+STORY_END_TOKENS = {EOT, EOT + "</w>"}
+
+# Wall-clock seconds a single request may spend sampling before it returns what it has
+GENERATION_TIME_BUDGET = float(os.getenv("GENERATION_TIME_BUDGET", "2.0"))
+
+# Per-request tallies passed to predict_next as `stats` and flushed to metrics once
+STAT_CONTEXT, STAT_BACKOFF, STAT_RANDOM, STAT_ALIAS_HIT, STAT_ALIAS_MISS = range(5)
+
+# Token id sent for prompt tokens the model has never seen
+UNKNOWN_TOKEN_ID = 0xFFFFFFFF
+
+# Alias draws rejected by the repetition guard before falling back to an explicit masked draw
+MAX_ALIAS_REJECTIONS = 8
+
+def sorted_successors(candidates: dict):
+    # (words, counts, cumulative counts), most frequent first
+    ranked = sorted(candidates.items(), key=lambda item: item[1], reverse=True)
+    counts = [cnt for _, cnt in ranked]
+    return [w for w, _ in ranked], counts, list(accumulate(counts))
+
+def tempered_weights(counts, temperature: float):
+    # counts ** (1/temperature), scaled so the largest weight is 1: raw powers overflow
+    # for small temperatures, while the scaled ones at worst underflow to 0
+    top = max(counts)
+    exponent = 1 / temperature
+    return [(c / top) ** exponent for c in counts]
+
+def build_alias_table(weights):
+    # Vose's alias method: O(k) to build, O(1) per draw
+    n = len(weights)
+    total = sum(weights)
+    prob = [w * n / total for w in weights]
+    alias = [0] * n
+    small = [i for i, p in enumerate(prob) if p < 1.0]
+    large = [i for i, p in enumerate(prob) if p >= 1.0]
+    while small and large:
+        s = small.pop()
+        l = large.pop()
+        alias[s] = l
+        prob[l] = prob[l] + prob[s] - 1.0
+        if prob[l] < 1.0:
+            small.append(l)
+        else:
+            large.append(l)
+    # Whatever is left is 1.0 up to rounding error
+    for i in large + small:
+        prob[i] = 1.0
+    return prob, alias
+
+def alias_table_for(candidates, temperature: float):
+    words, counts, _ = candidates
+    prob, alias = build_alias_table(tempered_weights(counts, temperature))
+    return words, prob, alias
+
+def alias_draw(table, rng=random):
+    words, prob, alias = table
+    i = int(rng.random() * len(words))
+    return words[i] if rng.random() < prob[i] else words[alias[i]]
+
+def guarded_alias_draw(table, guard, rng=random):
+    # Rejection sampling: accepting with probability guard.weight(word) draws from
+    # the same masked distribution as weighted_choice, in O(1) expected time
+    for _ in range(MAX_ALIAS_REJECTIONS):
+        word = alias_draw(table, rng)
+        weight = guard.weight(word)
+        if weight == 1.0 or rng.random() < weight:
+            return word
+    return None
+
+class RepetitionGuard:
+    """Penalises tokens seen in the last `window` tokens and bans repeated n-grams.
+
+    The window counter and n-gram table are updated in O(1) per token, independent
+    of the window length, and read by the sampler as a per-candidate weight.
+    """
+
+    def __init__(self, window=3, penalty=1.0, no_repeat_ngram_size=0):
+        self.window = window
+        self.penalty = penalty
+        self.ngram_size = no_repeat_ngram_size
+        self.recent = deque()
+        self.recent_counts = {}
+        # (n-1)-token history -> tokens that already followed it
+        self.seen_ngrams = {}
+        self.history = deque(maxlen=max(no_repeat_ngram_size - 1, 0))
+        self.banned = ()
+
+    def push(self, token):
+        self.recent.append(token)
+        self.recent_counts[token] = self.recent_counts.get(token, 0) + 1
+        if len(self.recent) > self.window:
+            old = self.recent.popleft()
+            self.recent_counts[old] -= 1
+            if not self.recent_counts[old]:
+                del self.recent_counts[old]
+
+        if self.ngram_size:
+            if len(self.history) == self.ngram_size - 1:
+                self.seen_ngrams.setdefault(tuple(self.history), set()).add(token)
+            self.history.append(token)
+            self.banned = self.seen_ngrams.get(tuple(self.history), ())
+
+    def weight(self, token):
+        if token in self.banned:
+            return 0.0
+        count = self.recent_counts.get(token)
+        return self.penalty ** -count if count else 1.0
+
+def weighted_choice(candidates, temperature: float = 1.0, top_k=None, top_p=None, guard=None, rng=random):
+    words, counts, cum_counts = candidates
+
+    # candidates are sorted by count, so top-k is just a slice
+    if top_k:
+        words, counts, cum_counts = words[:top_k], counts[:top_k], cum_counts[:top_k]
+
+    if temperature == 0:
+        if guard is None:
+            return words[0]
+        best = max(range(len(words)), key=lambda i: counts[i] * guard.weight(words[i]))
+        return words[best] if guard.weight(words[best]) else None
+
+    # apply temperature scaling, then mask repeated tokens before drawing
+    if guard is not None:
+        weights = counts if temperature == 1.0 else tempered_weights(counts, temperature)
+        cum_weights = list(accumulate(c * guard.weight(w) for w, c in zip(words, weights)))
+        if not cum_weights[-1]:
+            return None
+    elif temperature == 1.0:
+        cum_weights = cum_counts
+    else:
+        cum_weights = list(accumulate(tempered_weights(counts, temperature)))
+
+    # top-p keeps the shortest prefix whose mass reaches top_p
+    if top_p is not None and top_p < 1.0:
+        cutoff = bisect_left(cum_weights, top_p * cum_weights[-1]) + 1
+        words, cum_weights = words[:cutoff], cum_weights[:cutoff]
+
+    return rng.choices(words, cum_weights=cum_weights, k=1)[0]
+
+def parse_trigram_counts(raw_trigram_counts):
+    trigram_counts = {}
+    for key, value in raw_trigram_counts.items():
+        parts = key.split("|||")
+        if len(parts) == 3:
+            trigram_counts[(parts[0], parts[1], parts[2])] = value
+    return trigram_counts
+
+class TrigramModel:
+    """Sampling indexes built from one set of trigram counts.
+
+    A model is never mutated once it is serving, so a request that holds a
+    reference keeps using it even if the served model is swapped meanwhile.
+    """
+
+    def __init__(self, trigram_counts, version):
+        self.version = version
+        # Sorted so a seeded request samples the same words in every worker process
+        self.all_words = sorted({c for (_, _, c) in trigram_counts.keys()})
+        # Token ids for the compact response are indexes into the sorted vocabulary
+        self.vocab = sorted({token for trigram in trigram_counts for token in trigram})
+        self.token_ids = {token: i for i, token in enumerate(self.vocab)}
+
+        # Index successors once so predict_next does not scan every trigram per token
+        context_successors = {}  # (w1, w2) -> {c: count}
+        backoff_successors = {}  # w2 -> {c: count}
+        for (a, b, c), cnt in trigram_counts.items():
+            context_successors.setdefault((a, b), {})[c] = cnt
+            backoff = backoff_successors.setdefault(b, {})
+            backoff[c] = backoff.get(c, 0) + cnt
+
+        # Sorting at build time makes top-k a slice and top-p a prefix-sum cutoff
+        self.context_successors = {key: sorted_successors(c) for key, c in context_successors.items()}
+        self.backoff_successors = {key: sorted_successors(c) for key, c in backoff_successors.items()}
+
+        # Prefix index over the training contexts: w1 -> the w2 tokens it was followed by,
+        # so a prompt ending in w1 can be extended into a context the model has seen
+        context_starts = {}
+        for (a, b), (_, _, cum_counts) in self.context_successors.items():
+            context_starts.setdefault(a, {})[b] = cum_counts[-1]
+        self.context_starts = {key: sorted_successors(c) for key, c in context_starts.items()}
+
+        # Every context weighted by frequency, for prompts that share nothing with the corpus
+        self.context_keys = list(self.context_successors)
+        self.context_cum_counts = list(accumulate(
+            cum_counts[-1] for _, _, cum_counts in self.context_successors.values()
+        ))
+
+        # Precomputed alias tables are optional; contexts without one use weighted_choice
+        self.context_alias = {}
+        self.backoff_alias = {}
+
+        # BPE merges the counts were built from, so prompts are split the same way
+        self.merges = None
+        self.merges_fingerprint = None
+
+    def use_merges(self, merges):
+        self.merges = merges
+        self.merges_fingerprint = trigram_model.merges_fingerprint(merges)
+
+    @classmethod
+    def from_counts_file(cls, path=COUNTS_PATH):
+        with open(path, "rb") as f:
+            data = f.read()
+        trigram_counts = parse_trigram_counts(json.loads(data))
+        return cls(trigram_counts, hashlib.sha256(data).hexdigest()[:12])
+
+    def build_alias_tables(self):
+        self.context_alias = {
+            key: alias_table_for(cands, CONTEXT_TEMPERATURE)
+            for key, cands in self.context_successors.items()
+        }
+        self.backoff_alias = {
+            key: alias_table_for(cands, BACKOFF_TEMPERATURE)
+            for key, cands in self.backoff_successors.items()
+        }
+
+    def export_alias_tables(self, path=ALIAS_TABLES_PATH):
+        if not self.context_alias:
+            self.build_alias_tables()
+        tables = {
+            "temperatures": {"context": CONTEXT_TEMPERATURE, "backoff": BACKOFF_TEMPERATURE},
+            "context": {"|||".join(key): t for key, t in self.context_alias.items()},
+            "backoff": self.backoff_alias,
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(tables, f, ensure_ascii=False)
+        return len(tables["context"]) + len(tables["backoff"])
+
+    def load_alias_tables(self, path=ALIAS_TABLES_PATH):
+        if not Path(path).exists():
+            return
+        with open(path, encoding="utf-8") as f:
+            tables = json.load(f)
+        # Tables baked at other temperatures would silently change the output distribution
+        if tables.get("temperatures") != {"context": CONTEXT_TEMPERATURE, "backoff": BACKOFF_TEMPERATURE}:
+            return
+        self.context_alias = {tuple(key.split("|||")): tuple(t) for key, t in tables["context"].items()}
+        self.backoff_alias = {key: tuple(t) for key, t in tables["backoff"].items()}
+
+    def sample_tier(self, alias_tables, successors, key, use_alias, temperature, top_k, top_p, guard, stats, rng):
+        candidates = successors.get(key)
+        if not candidates:
+            return None
+        if use_alias:
+            table = alias_tables.get(key)
+            if stats is not None:
+                stats[STAT_ALIAS_HIT if table else STAT_ALIAS_MISS] += 1
+            if table:
+                word = alias_draw(table, rng) if guard is None else guarded_alias_draw(table, guard, rng)
+                if word is not None:
+                    return word
+        return weighted_choice(candidates, temperature, top_k, top_p, guard, rng)
+
+    def predict_next(self, w1, w2, temperature=None, top_k=None, top_p=None, guard=None, stats=None, rng=random):
+        # Alias tables only cover the default temperatures without truncation
+        use_alias = temperature is None and not top_k and top_p is None
+
+        # Prefer trigrams starting with w1,w2
+        word = self.sample_tier(
+            self.context_alias, self.context_successors, (w1, w2), use_alias,
+            CONTEXT_TEMPERATURE if temperature is None else temperature,
+            top_k, top_p, guard, stats, rng,
+        )
+        if word is not None:
+            if stats is not None:
+                stats[STAT_CONTEXT] += 1
+            return word
 
-with open(BASE_PATH / "data/processed/trigram_counts.json", encoding="utf-8") as f:
-    raw_trigram_counts = json.load(f)
+        # Fall back to trigrams where second word is w2
+        word = self.sample_tier(
+            self.backoff_alias, self.backoff_successors, w2, use_alias,
+            BACKOFF_TEMPERATURE if temperature is None else temperature,
+            top_k, top_p, guard, stats, rng,
+        )
+        if word is not None:
+            if stats is not None:
+                stats[STAT_BACKOFF] += 1
+            return word
 
-trigram_counts = {}
-for key, value in raw_trigram_counts.items():
-    parts = key.split("|||")
-    if len(parts) == 3:
-        trigram_counts[(parts[0], parts[1], parts[2])] = value
+        # Last resort: pick random word
+        if stats is not None:
+            stats[STAT_RANDOM] += 1
+        word = rng.choice(self.all_words)
+        if guard is not None:
+            for _ in range(MAX_ALIAS_REJECTIONS):
+                if guard.weight(word):
+                    break
+                word = rng.choice(self.all_words)
+        return word
 
-ALL_WORDS = list({c for (_, _, c) in trigram_counts.keys()})
+    def seed_context(self, tokens, rng=random):
+        # Extend the prompt so generation starts from a (w1, w2) context seen in training
+        if len(tokens) >= 2 and (tokens[-2], tokens[-1]) in self.context_successors:
+            return tokens
+
+        successors = self.context_starts.get(tokens[-1]) if tokens else None
+        if successors:
+            tokens.append(weighted_choice(successors, rng=rng))
+        else:
+            i = bisect_left(self.context_cum_counts, rng.random() * self.context_cum_counts[-1])
+            tokens.extend(self.context_keys[i])
+        return tokens
+
+    def generate_tokens(self, tokens, max_length, temperature=None, top_k=None, top_p=None,
+                        repetition_penalty=1.0, repetition_window=3, no_repeat_ngram_size=0,
+                        stop_at_paragraph=False, time_budget=GENERATION_TIME_BUDGET, stats=None, rng=random):
+        # Returns (tokens, truncated); truncated means the time budget ran out first
+        deadline = time.monotonic() + time_budget
+        stop_tokens = STORY_END_TOKENS | PARAGRAPH_END_TOKENS if stop_at_paragraph else STORY_END_TOKENS
+
+        # ensure the last 2 tokens are a known context
+        tokens = self.seed_context(tokens, rng)
+
+        # Repetition control is applied inside the sampler rather than by resampling
+        guard = None
+        if repetition_penalty > 1.0 or no_repeat_ngram_size:
+            guard = RepetitionGuard(repetition_window, repetition_penalty, no_repeat_ngram_size)
+            for token in tokens:
+                guard.push(token)
+
+        while len(tokens) < max_length:
+            if time.monotonic() > deadline:
+                return tokens, True
+
+            next_word = self.predict_next(tokens[-2], tokens[-1], temperature, top_k, top_p, guard, stats, rng)
+            if next_word in stop_tokens:
+                break
+
+            tokens.append(next_word)
+            if guard is not None:
+                guard.push(next_word)
+
+        return tokens, False
+
+# ── Model registry ────────────────────────────────────────────────────────────
+def artifact_path(version, registry_dir=None):
+    return Path(registry_dir or MODEL_REGISTRY_DIR) / f"trigram-{version}.pkl"
+
+def atomic_write(path, data: bytes):
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+def publish_model(counts_path=COUNTS_PATH, registry_dir=None, alias_tables=False, make_current=True,
+                  merges_path=MERGES_PATH):
+    # Pickled indexes load much faster than parsing the counts JSON and rebuilding them
+    registry_dir = Path(registry_dir or MODEL_REGISTRY_DIR)
+    registry_dir.mkdir(parents=True, exist_ok=True)
+    model = TrigramModel.from_counts_file(counts_path)
+    # The artifact carries the merges the counts were built from, and the version hashes
+    # them (and baked alias tables, a variant of the same counts) so that no two
+    # publishes of the same counts find each other's artifact
+    with open(merges_path, encoding="utf-8") as f:
+        model.use_merges(json.load(f))
+    variant = f"{model.version}|merges|{model.merges_fingerprint}"
+    if alias_tables:
+        model.build_alias_tables()
+        variant += f"|alias|{CONTEXT_TEMPERATURE}|{BACKOFF_TEMPERATURE}"
+    model.version = hashlib.sha256(variant.encode()).hexdigest()[:12]
+    path = artifact_path(model.version, registry_dir)
+    if not path.exists():
+        atomic_write(path, pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL))
+    if make_current:
+        atomic_write(registry_dir / "CURRENT", model.version.encode())
+    return model.version
+
+def current_version(registry_dir=None):
+    try:
+        return (Path(registry_dir or MODEL_REGISTRY_DIR) / "CURRENT").read_text().strip() or None
+    except FileNotFoundError:
+        return None
+
+def load_artifact(version, registry_dir=None):
+    with open(artifact_path(version, registry_dir), "rb") as f:
+        model = pickle.load(f)
+    merges = getattr(model, "merges", None)  # None in artifacts published without merges
+    if merges is not None and trigram_model.merges_fingerprint(merges) != model.merges_fingerprint:
+        raise ValueError(f"Model {version}: its BPE merges do not match their fingerprint")
+    return model
+
+def install_merges(model):
+    # Tokenize prompts with the merges the model was built from; cached prompts were
+    # split with the old ones. Models without merges keep the ones already loaded.
+    global _merges_fingerprint
+    merges = getattr(model, "merges", None)
+    if merges is None or model.merges_fingerprint == _merges_fingerprint:
+        return
+    trigram_model.merges = merges
+    _merges_fingerprint = model.merges_fingerprint
+    prompt_cache.prompts.clear()
+
+# Prompts are split into the same BPE tokens the counts were built from
+load_merges(MERGES_PATH)
+_merges_fingerprint = trigram_model.merges_fingerprint()
+
+def load_initial_model():
+    version = current_version()
+    if version:
+        return load_artifact(version)
+    # No registry yet: build from the processed counts as before
+    model = TrigramModel.from_counts_file(COUNTS_PATH)
+    model.load_alias_tables(ALIAS_TABLES_PATH)
+    model.use_merges(trigram_model.merges)
+    return model
+
+_model = load_initial_model()
+install_merges(_model)
+_reload_lock = threading.Lock()
+
+def swap_model(model):
+    # A single reference assignment: requests already holding the old model finish on it
+    global _model
+    install_merges(model)
+    old, _model = _model, model
+    return old
+
+def reload_model(version=None, registry_dir=None):
+    with _reload_lock:
+        version = version or current_version(registry_dir)
+        if not version:
+            raise FileNotFoundError(f"No CURRENT model in {registry_dir or MODEL_REGISTRY_DIR}")
+        if version != _model.version:
+            swap_model(load_artifact(version, registry_dir))
+        return _model.version
+
+def process_rss():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+class ModelPool:
+    """LRU pool of named registry models, bounded by their estimated memory.
+
+    A model's size is the RSS growth while loading it (or its artifact size times
+    MODEL_MEMORY_FACTOR off Linux). Loading past the budget evicts the least recently
+    used models; requests still holding an evicted model finish on it.
+    """
+
+    def __init__(self, budget_bytes, registry_dir=None):
+        self.budget_bytes = budget_bytes
+        self.registry_dir = registry_dir
+        self.models = OrderedDict()  # name -> (model, size in bytes)
+        # Guards models only; a cold load holds just its name's lock, so requests for
+        # resident models never wait on another model being unpickled
+        self.lock = threading.Lock()
+        self.loading = {}  # name -> lock held while that name loads
+
+    def model_dir(self, name):
+        return Path(self.registry_dir or MODEL_REGISTRY_DIR) / name
+
+    def resident_bytes(self):
+        return sum(size for _, size in self.models.values())
+
+    def lookup(self, name, version=None):
+        with self.lock:
+            entry = self.models.get(name)
+            if entry and (version is None or entry[0].version == version):
+                self.models.move_to_end(name)
+                return entry[0]
+            return None
+
+    def get(self, name, version=None):
+        model = self.lookup(name, version)
+        if model is not None:
+            return model
+        with self.lock:
+            loading = self.loading.setdefault(name, threading.Lock())
+        # Single flight: concurrent requests for the same cold model wait for one load
+        with loading:
+            model = self.lookup(name, version)
+            if model is not None:
+                return model
+            return self.load(name, version)
+
+    def load(self, name, version=None):
+        registry_dir = self.model_dir(name)
+        version = version or current_version(registry_dir)
+        if not version:
+            raise KeyError(name)
+
+        before = process_rss()
+        model = load_artifact(version, registry_dir)
+        after = process_rss()
+        if before is None or after is None or after <= before:
+            size = artifact_path(version, registry_dir).stat().st_size * MODEL_MEMORY_FACTOR
+        else:
+            size = after - before
+
+        with self.lock:
+            self.models.pop(name, None)
+            # Keep at least the model just asked for, even if it alone exceeds the budget
+            while self.models and self.resident_bytes() + size > self.budget_bytes:
+                self.models.popitem(last=False)
+                metrics.model_pool_evictions.inc()
+            self.models[name] = (model, size)
+            metrics.model_pool_bytes.set(self.resident_bytes())
+        return model
+
+    def discard(self, name):
+        with self.lock:
+            self.models.pop(name, None)
+            metrics.model_pool_bytes.set(self.resident_bytes())
+
+    def stale(self):
+        # Resident models whose registry CURRENT now names another version
+        return [
+            name for name, (model, _) in list(self.models.items())
+            if current_version(self.model_dir(name)) not in (None, model.version)
+        ]
+
+model_pool = ModelPool(MODEL_POOL_BUDGET_MB * 1024 * 1024)
+
+def get_model(name=None):
+    # Raises KeyError for a name with nothing published in the registry, and ValueError
+    # for one built with other BPE merges than the served prompts are split with
+    if name is None or name == DEFAULT_MODEL:
+        return _model
+    model = model_pool.get(name)
+    if getattr(model, "merges_fingerprint", None) not in (None, _merges_fingerprint):
+        raise ValueError(f"Model {name} was built with other BPE merges than the served model")
+    return model
+
+def watch_registry(interval=MODEL_WATCH_INTERVAL, registry_dir=None):
+    # Each worker process polls CURRENT, so one publish reaches every worker
+    def poll():
+        while True:
+            time.sleep(interval)
+            version = current_version(registry_dir)
+            if version and version != _model.version:
+                try:
+                    reload_model(version, registry_dir)
+                except (OSError, ValueError, pickle.UnpicklingError) as e:
+                    print(f"Model reload to {version} failed: {e}")
+            # Pooled models are dropped and reloaded from CURRENT on their next request
+            for name in model_pool.stale():
+                model_pool.discard(name)
+
+    thread = threading.Thread(target=poll, name="model-registry-watch", daemon=True)
+    thread.start()
+    return thread
 
 def tokenize(text):
-    return text.strip().split()
+    # tokenize_story, with repeat prompts served from cache; its known words already are
+    text = text.strip()
+    tokens = prompt_cache.prompts.get(text)
+    if tokens is not None:
+        metrics.record_prompt_cache(True)
+        return list(tokens)
+
+    tokens = trigram_model.tokenize_story(text)
+    prompt_cache.prompts.put(text, tuple(tokens), prompt_cache.entry_size(text, tuple(tokens)))
+    metrics.record_prompt_cache(False)
+    return tokens
 
 def detokenize(tokens):
-    clean_tokens = [
-        t.replace("</w>", "").replace("<w/>", "").replace("", "").strip()
-        for t in tokens if t.strip()
-    ]
-    return " ".join(clean_tokens)
-
-def weighted_choice(candidates: dict, temperature: float = 1.0):
-    words = list(candidates.keys())
-    weights = list(candidates.values())
-    # apply temperature scaling
-    scaled = [w ** (1/temperature) for w in weights]
-    return random.choices(words, weights=scaled, k=1)[0]
-
-def predict_next(w1, w2):
-    # Prefer trigrams starting with w1,w2
-    candidates = {c: cnt for (a,b,c), cnt in trigram_counts.items() if a==w1 and b==w2}
-    if candidates:
-        return weighted_choice(candidates, temperature=1.2)
-
-    # Fall back to trigrams where second word is w2
-    candidates2 = {c: cnt for (a,b,c), cnt in trigram_counts.items() if b==w2}
-    if candidates2:
-        return weighted_choice(candidates2, temperature=1.3)
-
-    # Last resort: pick random word
-    return random.choice(ALL_WORDS)
-
-def generate_tokens(tokens, max_length):
-    # ensure at least 2 starting tokens
-    if len(tokens) < 2:
-        tokens += random.choices(ALL_WORDS, k=2)
-
-    # Keep track of last 3 words to avoid repetition
-    last_words = set(tokens[-3:])
-
-    while len(tokens) < max_length:
-        next_word = predict_next(tokens[-2], tokens[-1])
-
-        # optionally avoid repeating last few words
-        if next_word in last_words:
-            next_word = random.choice(ALL_WORDS)
-
-        tokens.append(next_word)
-        last_words = set(tokens[-3:])
+    # BPE pieces run together up to their end-of-word marker
+    text = "".join(tokens).replace("</w>", " ").replace("<w/>", " ")
+    text = text.replace(EOS, "").replace(EOT, "")
+    paragraphs = (" ".join(p.split()) for p in text.split(EOP))
+    return "\n\n".join(p for p in paragraphs if p)
 
-    return tokens
+def predict_next(w1, w2, temperature=None, top_k=None, top_p=None, guard=None, stats=None):
+    return _model.predict_next(w1, w2, temperature, top_k, top_p, guard, stats)
 
-def generate_story(prefix: str, max_length: int = 100):
+def generate_story(prefix: str, max_length: int = 100, temperature=None, top_k=None, top_p=None,
+                   repetition_penalty=1.0, repetition_window=3, no_repeat_ngram_size=0,
+                   stop_at_paragraph=False, time_budget=GENERATION_TIME_BUDGET, model=None, seed=None,
+                   token_ids=False):
+    # Pin one model for the whole request so a concurrent reload cannot mix versions
+    model = model or _model
+    # A seed makes the story a pure function of the request and the model version
+    rng = random if seed is None else random.Random(seed)
+
+    start = time.perf_counter()
     tokens = tokenize(prefix)
-    output_tokens = generate_tokens(tokens, max_length)
-    return detokenize(output_tokens)
\ No newline at end of file
+    prompt_length = len(tokens)
+    tokenized = time.perf_counter()
+
+    stats = [0] * 5
+    output_tokens, truncated = model.generate_tokens(
+        tokens, max_length, temperature, top_k, top_p,
+        repetition_penalty, repetition_window, no_repeat_ngram_size,
+        stop_at_paragraph, time_budget, stats, rng,
+    )
+    sampled = time.perf_counter()
+
+    if token_ids:
+        story = [model.token_ids.get(token, UNKNOWN_TOKEN_ID) for token in output_tokens]
+    else:
+        story = detokenize(output_tokens)
+    metrics.record_generation(
+        tokenized - start, sampled - tokenized, time.perf_counter() - sampled,
+        len(output_tokens) - prompt_length, stats,
+    )
+    return story, truncated
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serving model utilities")
+    parser.add_argument("--export-alias-tables", nargs="?", const=str(ALIAS_TABLES_PATH),
+                        metavar="PATH", help="precompute alias tables for the serving temperatures")
+    parser.add_argument("--publish", nargs="?", const=str(COUNTS_PATH), metavar="COUNTS",
+                        help="add a trigram counts file to the model registry and make it current")
+    parser.add_argument("--name", default=DEFAULT_MODEL,
+                        help="registry name to publish under, e.g. one per corpus")
+    parser.add_argument("--with-alias-tables", action="store_true",
+                        help="bake alias tables into the published artifact")
+    args = parser.parse_args()
+
+    if args.export_alias_tables:
+        start = time.time()
+        count = _model.export_alias_tables(args.export_alias_tables)
+        print(f"Exported {count} alias tables to {args.export_alias_tables} in {time.time() - start:.1f}s")
+    elif args.publish:
+        start = time.time()
+        registry_dir = MODEL_REGISTRY_DIR if args.name == DEFAULT_MODEL else MODEL_REGISTRY_DIR / args.name
+        version = publish_model(args.publish, registry_dir, alias_tables=args.with_alias_tables)
+        print(f"Published model {args.name}:{version} to {registry_dir} in {time.time() - start:.1f}s")
+    else:
+        parser.print_help()
@@ -0,0 +1,56 @@
+from pathlib import Path
+import cProfile
+import os
+import pstats
+import random
+import threading
+import time
+import uuid
+
+BASE_PATH = Path(__file__).resolve().parent.parent
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR", BASE_PATH / "profiles"))
+
+# Functions reported back to the client; the full profile is saved to PROFILE_DIR
+HOT_PATH = ("generate_story", "predict_next", "weighted_choice")
+
+# Admin toggle. Requests are only profiled when this is on AND they ask for it,
+# so the disabled path costs a single attribute check.
+enabled = False
+sample_rate = 1.0
+
+# cProfile hooks the interpreter, so only one request is profiled at a time
+_busy = threading.Lock()
+
+def configure(enable: bool, rate: float = 1.0):
+    global enabled, sample_rate
+    enabled = enable
+    sample_rate = rate
+    return {"enabled": enabled, "sample_rate": sample_rate, "profile_dir": str(PROFILE_DIR)}
+
+def sampled() -> bool:
+    return enabled and random.random() < sample_rate
+
+def profile_call(fn, *args, **kwargs):
+    # Returns (result, breakdown); breakdown is None if another profile was running
+    if not _busy.acquire(blocking=False):
+        return fn(*args, **kwargs), None
+    try:
+        profiler = cProfile.Profile()
+        result = profiler.runcall(fn, *args, **kwargs)
+    finally:
+        _busy.release()
+
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    path = PROFILE_DIR / f"generate-{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}.prof"
+    stats = pstats.Stats(profiler)
+    stats.dump_stats(path)
+
+    functions = {}
+    for (filename, _, name), (_, calls, total, cumulative, _) in stats.stats.items():
+        if name in HOT_PATH and Path(filename).parent.name == "app":
+            functions[name] = {
+                "calls": calls,
+                "total_seconds": round(total, 6),
+                "cumulative_seconds": round(cumulative, 6),
+            }
+    return result, {"file": str(path), "functions": functions}
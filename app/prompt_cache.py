@@ -0,0 +1,50 @@
+from collections import OrderedDict
+import os
+import sys
+import threading
+
+# Memory budget for tokenized prompts. Near-repeat prompts are cheap without a cache
+# of their own here: the BPE pieces of each word are cached by trigram_model.bpe_pieces.
+PROMPT_CACHE_BYTES = int(os.getenv("PROMPT_CACHE_BYTES", str(8 * 1024 * 1024)))
+
+def entry_size(key: str, tokens: tuple):
+    # The token strings are shared with the BPE word cache, so entries don't pay for them
+    return sys.getsizeof(key) + sys.getsizeof(tokens)
+
+class SizedLRU:
+    """LRU cache bounded by the estimated bytes of its entries rather than their count."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # key -> (value, size)
+        self.bytes = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            self.entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key, value, size):
+        # Entries bigger than the whole budget are not worth evicting everything for
+        if size > self.max_bytes:
+            return
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+            self.entries[key] = (value, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, (_, evicted) = self.entries.popitem(last=False)
+                self.bytes -= evicted
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.bytes = 0
+
+prompts = SizedLRU(PROMPT_CACHE_BYTES)
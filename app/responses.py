@@ -0,0 +1,75 @@
+from array import array
+import gzip
+import json
+import os
+import sys
+
+from fastapi.responses import JSONResponse, Response
+
+# orjson and brotli are optional; without them responses fall back to json and gzip
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies smaller than this are sent uncompressed; compressing them costs more than it saves
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+GZIP_LEVEL = 5
+BROTLI_QUALITY = 4
+
+TOKEN_IDS_MEDIA_TYPE = "application/octet-stream"
+
+def dumps(content) -> bytes:
+    # Raw UTF-8: Urdu text is never escaped to \uXXXX
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+class Utf8JSONResponse(JSONResponse):
+    media_type = "application/json; charset=utf-8"
+
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+def accepted_encoding(accept_encoding):
+    offered = {
+        part.split(";")[0].strip().lower()
+        for part in (accept_encoding or "").split(",")
+        if not part.strip().endswith(";q=0")
+    }
+    if brotli is not None and "br" in offered:
+        return "br"
+    if "gzip" in offered:
+        return "gzip"
+    return None
+
+def compressed_response(body: bytes, media_type, accept_encoding=None, headers=None):
+    headers = dict(headers or {})
+    encoding = accepted_encoding(accept_encoding) if len(body) >= COMPRESS_MIN_BYTES else None
+    if encoding == "br":
+        body = brotli.compress(body, quality=BROTLI_QUALITY)
+    elif encoding == "gzip":
+        body = gzip.compress(body, GZIP_LEVEL)
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    headers["Vary"] = "Accept-Encoding"
+    return Response(body, media_type=media_type, headers=headers)
+
+def pack_token_ids(token_ids) -> bytes:
+    # Little-endian uint32 per token
+    packed = array("I", token_ids)
+    if sys.byteorder == "big":
+        packed.byteswap()
+    return packed.tobytes()
+
+def unpack_token_ids(data: bytes):
+    ids = array("I")
+    ids.frombytes(data)
+    if sys.byteorder == "big":
+        ids.byteswap()
+    return ids.tolist()
@@ -1,5 +1,40 @@
-from pydantic import BaseModel
+from typing import Literal, Optional
+from pydantic import BaseModel, Field
+import os
+
+# Longest story a client may ask for, in tokens
+MAX_GENERATE_LENGTH = int(os.getenv("MAX_GENERATE_LENGTH", "1000"))
+
+# Registry names: letters, digits, "_" and "-" only, so a name is always a plain directory
+MODEL_NAME_PATTERN = r"^[A-Za-z0-9_-]{1,64}$"
 
 class GenerateRequest(BaseModel):
     prefix: str
-    max_length: int = 100
+    # Named model from the registry, e.g. one per corpus; None serves the default model
+    model: Optional[str] = Field(default=None, pattern=MODEL_NAME_PATTERN)
+    max_length: int = Field(default=100, ge=1, le=MAX_GENERATE_LENGTH)
+    # None keeps the model's default temperatures (1.2 exact context, 1.3 backoff)
+    temperature: Optional[float] = Field(default=None, ge=0)
+    top_k: Optional[int] = Field(default=None, ge=1)
+    top_p: Optional[float] = Field(default=None, gt=0, le=1)
+    # Tokens seen in the last repetition_window tokens are down-weighted by
+    # repetition_penalty per occurrence; 1.0 disables the penalty
+    repetition_penalty: float = Field(default=1.3, ge=1)
+    repetition_window: int = Field(default=3, ge=1, le=256)
+    no_repeat_ngram_size: int = Field(default=0, ge=0, le=8)
+    # Generation always stops at end of story; optionally at end of paragraph too
+    stop_at_paragraph: bool = False
+    # Seeded requests are reproducible, so identical ones share a single generation
+    seed: Optional[int] = Field(default=None, ge=0)
+    # "token_ids" returns little-endian uint32 ids into the model's /vocab instead of JSON
+    response_format: Literal["json", "token_ids"] = "json"
+
+class ProfilingConfig(BaseModel):
+    enabled: bool
+    # Fraction of flagged requests that are actually profiled
+    sample_rate: float = Field(default=1.0, gt=0, le=1)
+
+class ReloadRequest(BaseModel):
+    model: Optional[str] = Field(default=None, pattern=MODEL_NAME_PATTERN)
+    # None reloads whatever version the registry's CURRENT file names
+    version: Optional[str] = Field(default=None, pattern=r"^[0-9a-f]{6,64}$")
@@ -0,0 +1,218 @@
+"""Load-test a locally launched uvicorn serving app.main:app.
+
+Example, sweeping concurrency to find where p99 latency breaks down:
+
+    python benchmarks/load_test.py --workers 2 --concurrency 1,8,32,64 --duration 20
+
+Prompts are drawn from the story corpus and max_length from a weighted length
+mix, so the load resembles real traffic. For each concurrency level it reports
+throughput, latency percentiles, error rates and the server's RSS over time (the
+RSS of the uvicorn process plus its workers, read from /proc on Linux).
+
+All load comes from one client address, so the server is started with the
+per-client rate limiter disabled; pass --rate-limit to keep it, in which case 429s
+are counted separately and kept out of the latency percentiles.
+"""
+from pathlib import Path
+import argparse
+import asyncio
+import csv
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+
+ROOT = Path(__file__).resolve().parent.parent
+CORPUS_CSV = ROOT / "data/processed/merged_output.csv"
+
+SEED = 1234
+
+# (max_length, weight): mostly short stories with a tail of long ones
+DEFAULT_LENGTH_MIX = "50:4,100:4,300:2,1000:1"
+
+def load_prefixes(path, count, rng):
+    # Opening words of corpus paragraphs, 2 to 30 words long
+    paragraphs = []
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        for row in csv.DictReader(f):
+            paragraphs.extend(p for p in row["story_text"].split("\n") if len(p.split()) >= 2)
+    prefixes = []
+    for paragraph in rng.sample(paragraphs, min(count, len(paragraphs))):
+        words = paragraph.split()
+        prefixes.append(" ".join(words[:rng.randint(2, min(30, len(words)))]))
+    return prefixes
+
+def parse_length_mix(spec):
+    lengths, weights = [], []
+    for item in spec.split(","):
+        length, weight = item.split(":")
+        lengths.append(int(length))
+        weights.append(float(weight))
+    return lengths, weights
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def process_tree_rss(pid):
+    # Resident set size in bytes of pid and all its descendants, or None off Linux
+    total = 0
+    pending = [pid]
+    try:
+        while pending:
+            current = pending.pop()
+            with open(f"/proc/{current}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total += int(line.split()[1]) * 1024
+            for task in os.listdir(f"/proc/{current}/task"):
+                with open(f"/proc/{current}/task/{task}/children") as f:
+                    pending.extend(int(child) for child in f.read().split())
+    except (FileNotFoundError, ProcessLookupError):
+        if not total:
+            return None
+    return total
+
+def start_server(port, workers, rate_limit=False):
+    cmd = [
+        sys.executable, "-m", "uvicorn", "app.main:app",
+        "--host", "127.0.0.1", "--port", str(port),
+        "--workers", str(workers), "--log-level", "warning",
+    ]
+    env = os.environ if rate_limit else {**os.environ, "RATE_LIMIT_RATE": "0"}
+    return subprocess.Popen(cmd, cwd=ROOT, env=env)
+
+async def wait_until_healthy(client, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get("/health")).status_code == 200:
+                return
+        except Exception:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError(f"server not healthy after {timeout}s")
+
+def summarize(latencies, statuses, errors, elapsed):
+    # latencies exclude rate-limited requests, which are reported as their own count
+    ordered = sorted(latencies)
+    pick = lambda q: round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 2) if ordered else None
+    rate_limited = statuses.get(429, 0)
+    total = len(latencies) + rate_limited + errors
+    ok = statuses.get(200, 0)
+    return {
+        "requests": total,
+        "throughput_rps": round(ok / elapsed, 2),
+        "latency_ms": {"p50": pick(0.50), "p90": pick(0.90), "p99": pick(0.99), "max": pick(1.0)},
+        "status_codes": {str(code): n for code, n in sorted(statuses.items())},
+        "rate_limited": rate_limited,
+        "connection_errors": errors,
+        "error_rate": round((total - ok - rate_limited) / total, 4) if total else 0.0,
+    }
+
+async def run_level(client, endpoint, concurrency, duration, prefixes, lengths, weights, server_pid, rng):
+    latencies = []
+    statuses = {}
+    errors = 0
+    rss = []
+    stop_at = time.monotonic() + duration
+
+    async def worker():
+        nonlocal errors
+        while time.monotonic() < stop_at:
+            body = {"prefix": rng.choice(prefixes), "max_length": rng.choices(lengths, weights)[0]}
+            start = time.perf_counter()
+            try:
+                response = await client.post(endpoint, json=body)
+            except Exception:
+                errors += 1
+                continue
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+            if response.status_code != 429:
+                latencies.append(time.perf_counter() - start)
+
+    async def sample_rss():
+        started = time.monotonic()
+        while time.monotonic() < stop_at:
+            rss.append({"t": round(time.monotonic() - started, 2), "rss_bytes": process_tree_rss(server_pid)})
+            await asyncio.sleep(1.0)
+
+    started = time.monotonic()
+    await asyncio.gather(sample_rss(), *(worker() for _ in range(concurrency)))
+    summary = summarize(latencies, statuses, errors, time.monotonic() - started)
+    summary["concurrency"] = concurrency
+    summary["server_rss"] = rss
+    return summary
+
+async def run(args):
+    import httpx
+
+    rng = random.Random(SEED)
+    prefixes = load_prefixes(args.corpus, args.prefixes, rng)
+    lengths, weights = parse_length_mix(args.length_mix)
+    levels = [int(c) for c in args.concurrency.split(",")]
+
+    port = args.port or free_port()
+    server = start_server(port, args.workers, args.rate_limit)
+    try:
+        limits = httpx.Limits(max_connections=max(levels), max_keepalive_connections=max(levels))
+        timeout = httpx.Timeout(args.timeout)
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=timeout) as client:
+            await wait_until_healthy(client, args.startup_timeout)
+            idle_rss = process_tree_rss(server.pid)
+            results = []
+            for concurrency in levels:
+                result = await run_level(client, args.endpoint, concurrency, args.duration,
+                                         prefixes, lengths, weights, server.pid, rng)
+                print(f"concurrency={concurrency:>4}  rps={result['throughput_rps']:>8}  "
+                      f"p50={result['latency_ms']['p50']}ms  p99={result['latency_ms']['p99']}ms  "
+                      f"errors={result['error_rate']:.2%}  429s={result['rate_limited']}", file=sys.stderr)
+                results.append(result)
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "workers": args.workers,
+            "endpoint": args.endpoint,
+            "duration_s": args.duration,
+            "length_mix": args.length_mix,
+            "idle_rss_bytes": idle_rss,
+            "seed": SEED,
+            "rate_limit": args.rate_limit,
+        },
+        "levels": results,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Drive /generate on a local uvicorn and report latency and RSS")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--concurrency", default="1,4,16,64", help="comma-separated in-flight request levels")
+    parser.add_argument("--duration", type=float, default=15.0, help="seconds per concurrency level")
+    parser.add_argument("--endpoint", default="/generate")
+    parser.add_argument("--length-mix", default=DEFAULT_LENGTH_MIX, help="max_length:weight pairs")
+    parser.add_argument("--corpus", default=str(CORPUS_CSV), help="CSV with a story_text column")
+    parser.add_argument("--prefixes", type=int, default=500, help="distinct prompts drawn from the corpus")
+    parser.add_argument("--port", type=int, help="port for uvicorn (default: a free one)")
+    parser.add_argument("--timeout", type=float, default=30.0, help="per-request timeout in seconds")
+    parser.add_argument("--startup-timeout", type=float, default=60.0)
+    parser.add_argument("--rate-limit", action="store_true",
+                        help="keep the server's per-client rate limiter (disabled by default)")
+    parser.add_argument("--output", help="write JSON results here instead of stdout")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+"""Benchmarks for the training and serving hot paths.
+
+Run from the repository root:
+
+    python benchmarks/run_benchmarks.py --output bench.json
+
+Corpus-side benchmarks use a synthetic corpus built from a fixed seed, so numbers
+are comparable across commits. Serving benchmarks use the model in data/processed.
+"""
+from pathlib import Path
+import argparse
+import asyncio
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from models import bpe_train, trigram_model
+
+SEED = 1234
+
+EOS = "\uE000"  # End of Sentence
+EOP = "\uE001"  # End of Paragraph
+EOT = "\uE002"  # End of Story
+
+URDU_LETTERS = list("ابپتٹثجچحخدڈذرڑزژسشصضطظعغفقکگلمنوہھءیےںآ")
+
+PREFIXES = [
+    "ایک دفعہ کا ذکر ہے",
+    "ایک دفعہ کا ذکر ہے کہ ایک چھوٹا بچہ جنگل میں گھوم رہا تھا۔",
+    "بادشاہ نے کہا",
+    "ایک دفعہ کا ذکر ہے کہ ایک چھوٹا بچہ جنگل میں گھوم رہا تھا۔ اچانک اس نے دیکھا کہ ایک پرانا بوڑھا آدمی درخت کے نیچے بیٹھا ہے اور",
+]
+
+def synthetic_corpus(n_stories, words_per_story, vocab_size=3000, seed=SEED):
+    # Zipf-distributed words in the shape preprocessor.py produces
+    rng = random.Random(seed)
+    words = ["".join(rng.choices(URDU_LETTERS, k=rng.randint(1, 7))) for _ in range(vocab_size)]
+    weights = [1 / (rank + 1) for rank in range(vocab_size)]
+
+    stories = []
+    for _ in range(n_stories):
+        paragraphs = []
+        remaining = words_per_story
+        while remaining > 0:
+            sentences = []
+            for _ in range(rng.randint(2, 5)):
+                length = min(rng.randint(5, 15), max(remaining, 1))
+                remaining -= length
+                sentences.append(" ".join(rng.choices(words, weights, k=length)) + "۔ " + EOS)
+            paragraphs.append(" ".join(sentences))
+        stories.append(f" {EOP} ".join(paragraphs) + " " + EOT)
+    return stories
+
+def percentiles(samples):
+    ordered = sorted(samples)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+    return {
+        "p50_ms": round(pick(0.50) * 1000, 3),
+        "p90_ms": round(pick(0.90) * 1000, 3),
+        "p99_ms": round(pick(0.99) * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+def bench_bpe_training(stories, vocab_limit):
+    start = time.perf_counter()
+    merges, vocab = bpe_train.train_bpe(stories, vocab_limit=vocab_limit, verbose=False)
+    elapsed = time.perf_counter() - start
+    return merges, {
+        "merges": len(merges),
+        "seconds": round(elapsed, 3),
+        "merges_per_sec": round(len(merges) / elapsed, 2),
+    }
+
+def bench_tokenize(stories, merges):
+    saved = trigram_model.merges
+    trigram_model.merges = merges
+    try:
+        words = [w for story in stories for w in story.split()]
+        start = time.perf_counter()
+        for word in words:
+            trigram_model.apply_bpe(word)
+        bpe_elapsed = time.perf_counter() - start
+
+        # Start cold, so repeated runs measure tokenizing rather than earlier cache hits
+        trigram_model.bpe_pieces.cache_clear()
+        start = time.perf_counter()
+        tokens = sum(len(trigram_model.tokenize_story(story)) for story in stories)
+        story_elapsed = time.perf_counter() - start
+    finally:
+        trigram_model.merges = saved
+    return {
+        "apply_bpe_words_per_sec": round(len(words) / bpe_elapsed, 1),
+        "tokenize_story_stories_per_sec": round(len(stories) / story_elapsed, 2),
+        "tokenize_story_tokens_per_sec": round(tokens / story_elapsed, 1),
+    }
+
+def bench_ngram_counting(stories, merges):
+    saved = trigram_model.merges
+    trigram_model.merges = merges
+    try:
+        tokenized = [trigram_model.tokenize_story(story) for story in stories]
+    finally:
+        trigram_model.merges = saved
+    tokens = sum(len(t) for t in tokenized)
+
+    for table in (trigram_model.unigram_counts, trigram_model.bigram_counts, trigram_model.trigram_counts):
+        table.clear()
+    start = time.perf_counter()
+    for story_tokens in tokenized:
+        trigram_model.add_ngram_counts(story_tokens)
+    elapsed = time.perf_counter() - start
+    return {
+        "tokens": tokens,
+        "seconds": round(elapsed, 3),
+        "tokens_per_sec": round(tokens / elapsed, 1),
+        "trigrams": len(trigram_model.trigram_counts),
+    }
+
+def bench_model_load(repeats):
+    code = "import time; t = time.perf_counter(); import app.model; print(time.perf_counter() - t)"
+    samples = []
+    for _ in range(repeats):
+        out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+        samples.append(float(out.stdout.strip().splitlines()[-1]))
+    return {"runs": repeats, "best_seconds": round(min(samples), 3), "mean_seconds": round(sum(samples) / repeats, 3)}
+
+def bench_predict_next(serving, n_tokens, with_alias):
+    model = serving.get_model()
+    saved = model.context_alias, model.backoff_alias
+    if with_alias:
+        model.build_alias_tables()
+    else:
+        model.context_alias, model.backoff_alias = {}, {}
+    try:
+        random.seed(SEED)
+        tokens = model.seed_context(serving.tokenize(PREFIXES[0]))
+        w1, w2 = tokens[-2], tokens[-1]
+        start = time.perf_counter()
+        for _ in range(n_tokens):
+            w1, w2 = w2, model.predict_next(w1, w2)
+            if w2 in serving.STORY_END_TOKENS:
+                w1, w2 = tokens[-2], tokens[-1]
+        elapsed = time.perf_counter() - start
+    finally:
+        model.context_alias, model.backoff_alias = saved
+    return {"tokens": n_tokens, "tokens_per_sec": round(n_tokens / elapsed, 1)}
+
+async def _generate_latencies(app, n_requests, max_length):
+    # Latencies of successful requests, and how many were rate limited (kept out of the latencies)
+    import httpx
+
+    latencies = []
+    rate_limited = 0
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for i in range(n_requests):
+            body = {"prefix": PREFIXES[i % len(PREFIXES)], "max_length": max_length}
+            start = time.perf_counter()
+            response = await client.post("/generate", json=body)
+            elapsed = time.perf_counter() - start
+            if response.status_code == 429:
+                rate_limited += 1
+                continue
+            response.raise_for_status()
+            latencies.append(elapsed)
+    return latencies, rate_limited
+
+def bench_generate_endpoint(n_requests, max_length):
+    from app import admission
+    from app.main import app
+
+    # Every request comes from one client, so the per-client limiter would answer
+    # most of them with 429s; a rate of 0 disables it for the run
+    saved = admission.limiter
+    admission.limiter = admission.RateLimiter(rate=0)
+    try:
+        random.seed(SEED)
+        latencies, rate_limited = asyncio.run(_generate_latencies(app, n_requests, max_length))
+    finally:
+        admission.limiter = saved
+    return {"requests": n_requests, "max_length": max_length, "rate_limited": rate_limited, **percentiles(latencies)}
+
+def git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark training and serving hot paths")
+    parser.add_argument("--stories", type=int, default=200, help="synthetic stories to generate")
+    parser.add_argument("--words", type=int, default=300, help="words per synthetic story")
+    parser.add_argument("--vocab-limit", type=int, default=300, help="BPE vocab limit for the training benchmark")
+    parser.add_argument("--tokens", type=int, default=50_000, help="tokens for the predict_next benchmark")
+    parser.add_argument("--requests", type=int, default=200, help="requests for the /generate benchmark")
+    parser.add_argument("--max-length", type=int, default=100)
+    parser.add_argument("--load-repeats", type=int, default=3)
+    parser.add_argument("--output", help="write JSON results here instead of stdout")
+    args = parser.parse_args()
+
+    stories = synthetic_corpus(args.stories, args.words)
+    results = {}
+
+    merges, results["bpe_training"] = bench_bpe_training(stories, args.vocab_limit)
+    results["tokenize"] = bench_tokenize(stories, merges)
+    results["ngram_counting"] = bench_ngram_counting(stories, merges)
+    results["model_load"] = bench_model_load(args.load_repeats)
+
+    import app.model as serving
+    results["predict_next"] = bench_predict_next(serving, args.tokens, with_alias=False)
+    results["predict_next_alias"] = bench_predict_next(serving, args.tokens, with_alias=True)
+    results["generate_endpoint"] = bench_generate_endpoint(args.requests, args.max_length)
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "seed": SEED,
+            "args": vars(args),
+        },
+        "results": results,
+    }
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+
+if __name__ == "__main__":
+    main()
@@ -42,48 +42,59 @@ def build_vocab(word_freq):
             vocab.add(token)
     return vocab
 
-# Load data
-df = pd.read_csv(input_csv)
-story_col = "story_text_tokens"
-stories = df[story_col].dropna().tolist()
+def train_bpe(stories, vocab_limit=vocab_limit, verbose=True):
+    word_freq = build_word_frequency(stories)
+    vocab = build_vocab(word_freq)
 
-word_freq = build_word_frequency(stories)
-vocab = build_vocab(word_freq)
+    merges = []
 
-merges = []
+    if verbose:
+        print("Starting BPE training...")
+        print("Initial vocab size:", len(vocab))
 
-print("Starting BPE training...")
-print("Initial vocab size:", len(vocab))
+    # Force more merges
+    target_merges = vocab_limit - len(vocab)
 
-# Force more merges
-target_merges = vocab_limit - len(vocab)  
+    while len(merges) < target_merges:
+        pair_freq = get_pair_frequency(word_freq)
 
-while len(merges) < target_merges:
-    pair_freq = get_pair_frequency(word_freq)
+        if len(pair_freq) == 0:
+            if verbose:
+                print("No more pairs to merge!")
+            break
 
-    if len(pair_freq) == 0:
-        print("No more pairs to merge!")
-        break
+        best_pair = max(pair_freq, key=pair_freq.get)
+        freq = pair_freq[best_pair]
 
-    best_pair = max(pair_freq, key=pair_freq.get)
-    freq = pair_freq[best_pair]
+        word_freq = merge_pair(best_pair, word_freq)
+        merges.append(best_pair)
 
-    word_freq = merge_pair(best_pair, word_freq)
-    merges.append(best_pair)
+        # Optional: rebuild vocab only every 10 merges to save time
+        if verbose and len(merges) % 10 == 0:
+            vocab = build_vocab(word_freq)
+            print(f"Merge {len(merges)}: {best_pair} (freq {freq}) → vocab now {len(vocab)}")
 
-    # Optional: rebuild vocab only every 10 merges to save time
-    if len(merges) % 10 == 0:
-        vocab = build_vocab(word_freq)
-        print(f"Merge {len(merges)}: {best_pair} (freq {freq}) → vocab now {len(vocab)}")
+    return merges, build_vocab(word_freq)
 
-print("Final vocab size:", len(build_vocab(word_freq)))
-print("Total merges performed:", len(merges))
+def main():
+    # Load data
+    df = pd.read_csv(input_csv)
+    story_col = "story_text_tokens"
+    stories = df[story_col].dropna().tolist()
 
-# Save
-with open(merges_output, "w", encoding="utf-8") as f:
-    json.dump(merges, f, ensure_ascii=False)
+    merges, vocab = train_bpe(stories)
 
-with open(vocab_output, "w", encoding="utf-8") as f:
-    json.dump(list(build_vocab(word_freq)), f, ensure_ascii=False)
+    print("Final vocab size:", len(vocab))
+    print("Total merges performed:", len(merges))
 
-print("BPE training finished")
\ No newline at end of file
+    # Save
+    with open(merges_output, "w", encoding="utf-8") as f:
+        json.dump(merges, f, ensure_ascii=False)
+
+    with open(vocab_output, "w", encoding="utf-8") as f:
+        json.dump(list(vocab), f, ensure_ascii=False)
+
+    print("BPE training finished")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
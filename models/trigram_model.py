@@ -1,6 +1,11 @@
 import pandas as pd
 from collections import Counter
+from pathlib import Path
+import argparse
+import functools
+import hashlib
 import json
+import os
 import random
 
 input_csv = "merged_output_with_special_tokens.csv"
@@ -8,14 +13,18 @@ merges_file = "bpe_merges.json"
 unigram_output = "unigram_counts.json"
 bigram_output = "bigram_counts.json"
 trigram_output = "trigram_counts.json"
+# story_id -> text of every story in the saved counts, so later updates can diff against it
+manifest_output = "story_manifest.json"
 
 EOT = "\uE002"  # End of Story
 
-# Load BPE merges
-with open(merges_file, "r", encoding="utf-8") as f:
-    merges = json.load(f)
+merges = []
 
-print("Merges loaded, count:", len(merges))
+def load_merges(path=merges_file):
+    global merges
+    with open(path, "r", encoding="utf-8") as f:
+        merges = json.load(f)
+    return merges
 
 def apply_bpe(word):
     if not word:
@@ -31,28 +40,34 @@ def apply_bpe(word):
                 i += 1
     return tokens
 
+# Distinct words whose BPE pieces are kept; bounded because the serving process
+# imports this module too
+BPE_CACHE_SIZE = 1 << 16
+
+# (merges list, its fingerprint), recomputed only when merges is replaced
+merges_key = (None, None)
+
+@functools.lru_cache(maxsize=BPE_CACHE_SIZE)
+def bpe_pieces(word, fingerprint):
+    # fingerprint only keys the cache to the merges apply_bpe is using
+    return tuple(apply_bpe(word))
+
 def tokenize_story(story):
-    words = story.split()
+    global merges_key
+    if merges_key[0] is not merges:
+        merges_key = (merges, merges_fingerprint())
+    fingerprint = merges_key[1]
     final_tokens = []
-    for word in words:
-        bpe_tokens = apply_bpe(word)
-        final_tokens.extend(bpe_tokens)
+    for word in story.split():
+        final_tokens.extend(bpe_pieces(word, fingerprint))
     return final_tokens
 
-# Load data
-df = pd.read_csv(input_csv)
-story_col = "story_text_tokens"
-stories = df[story_col].dropna().tolist()
-
-print("Stories loaded:", len(stories))
-
 unigram_counts = Counter()
 bigram_counts = Counter()
 trigram_counts = Counter()
+total_unigrams = 0
 
-# Build n-gram counts
-for story in stories:
-    tokens = tokenize_story(story)
+def add_ngram_counts(tokens):
     for i in range(len(tokens)):
         unigram_counts[(tokens[i],)] += 1
         if i >= 1:
@@ -60,8 +75,25 @@ for story in stories:
         if i >= 2:
             trigram_counts[(tokens[i-2], tokens[i-1], tokens[i])] += 1
 
-total_unigrams = sum(unigram_counts.values())
-print("Unique tokens (vocab size):", len(unigram_counts))
+def subtract_ngram_counts(tokens):
+    # Exact inverse of add_ngram_counts; entries that reach zero are dropped
+    def decrement(table, key):
+        table[key] -= 1
+        if table[key] <= 0:
+            del table[key]
+
+    for i in range(len(tokens)):
+        decrement(unigram_counts, (tokens[i],))
+        if i >= 1:
+            decrement(bigram_counts, (tokens[i-1], tokens[i]))
+        if i >= 2:
+            decrement(trigram_counts, (tokens[i-2], tokens[i-1], tokens[i]))
+
+def count_ngrams(stories):
+    global total_unigrams
+    for story in stories:
+        add_ngram_counts(tokenize_story(story))
+    total_unigrams = sum(unigram_counts.values())
 
 # Weights - strong trigram preference now that merges are good
 lambda1 = 0.03
@@ -167,19 +199,147 @@ def generate_story(prefix, max_length=300):
 def convert_keys(d):
     return {"|||".join(k): v for k, v in d.items()}
 
-with open(unigram_output, "w", encoding="utf-8") as f:
-    json.dump(convert_keys(unigram_counts), f, ensure_ascii=False)
-
-with open(bigram_output, "w", encoding="utf-8") as f:
-    json.dump(convert_keys(bigram_counts), f, ensure_ascii=False)
-
-with open(trigram_output, "w", encoding="utf-8") as f:
-    json.dump(convert_keys(trigram_counts), f, ensure_ascii=False)
-
-print("Trigram model training finished")
-
-# Run example
-prefix = "ایک دفعہ کا ذکر ہے کہ ایک چھوٹا بچہ جنگل میں گھوم رہا تھا۔ اچانک اس نے دیکھا کہ ایک پرانا بوڑھا آدمی درخت کے نیچے بیٹھا ہے اور"
-story = generate_story(prefix)
-print("\nGenerated Story:\n")
-print(story)
\ No newline at end of file
+def reset_counts():
+    global total_unigrams
+    for table in (unigram_counts, bigram_counts, trigram_counts):
+        table.clear()
+    total_unigrams = 0
+
+def load_counts(input_dir="."):
+    # Inverse of save_counts, so new stories can be added to existing tables
+    global total_unigrams
+    input_dir = Path(input_dir)
+    reset_counts()
+    for table, name in ((unigram_counts, unigram_output), (bigram_counts, bigram_output), (trigram_counts, trigram_output)):
+        with open(input_dir / name, "r", encoding="utf-8") as f:
+            table.update({tuple(k.split("|||")): v for k, v in json.load(f).items()})
+    total_unigrams = sum(unigram_counts.values())
+
+def write_atomic(path, write, encoding="utf-8", newline=None):
+    # write(f) fills a temp file that is fsync'd and renamed over path, so readers see
+    # the old file or the new one, never a partial write
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding=encoding, newline=newline) as f:
+        write(f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+def dump_json_atomic(data, path, indent=None):
+    write_atomic(path, lambda f: json.dump(data, f, ensure_ascii=False, indent=indent))
+
+def save_counts(output_dir="."):
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    dump_json_atomic(convert_keys(unigram_counts), output_dir / unigram_output)
+    dump_json_atomic(convert_keys(bigram_counts), output_dir / bigram_output)
+    dump_json_atomic(convert_keys(trigram_counts), output_dir / trigram_output)
+
+def merges_fingerprint(pairs=None):
+    # Of the loaded merges unless others are given
+    pairs = merges if pairs is None else pairs
+    return hashlib.sha256(json.dumps(pairs, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+def counts_digest(output_dir="."):
+    # Hash of the saved tables, or None if any is missing
+    digest = hashlib.sha256()
+    for name in (unigram_output, bigram_output, trigram_output):
+        try:
+            digest.update((Path(output_dir) / name).read_bytes())
+        except FileNotFoundError:
+            return None
+    return digest.hexdigest()
+
+def save_manifest(stories, output_dir="."):
+    # Written after save_counts: it records the digest of the tables it describes, so
+    # a run killed between the two leaves a manifest that no longer matches them
+    manifest = {"merges": merges_fingerprint(), "counts": counts_digest(output_dir), "stories": stories}
+    dump_json_atomic(manifest, Path(output_dir) / manifest_output)
+
+def load_manifest(input_dir="."):
+    try:
+        with open(Path(input_dir) / manifest_output, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+def update_counts(stories, output_dir="."):
+    # stories: story_id -> story_text_tokens for the whole current corpus. Only stories
+    # that are new, edited or gone since the manifest was written are tokenized: edited
+    # and removed stories have their old counts subtracted, new and edited ones added.
+    global total_unigrams
+    output_dir = Path(output_dir)
+    manifest = load_manifest(output_dir)
+    if (manifest is None or manifest["merges"] != merges_fingerprint()
+            or manifest.get("counts") is None or manifest["counts"] != counts_digest(output_dir)):
+        # Different merges tokenize every story differently, and tables that don't match
+        # the manifest may already include some of its stories, so nothing can be reused
+        reset_counts()
+        count_ngrams(stories.values())
+        save_counts(output_dir)
+        save_manifest(stories, output_dir)
+        return {"mode": "full", "added": len(stories), "changed": 0, "removed": 0}
+
+    load_counts(output_dir)
+    counted = manifest["stories"]
+    added = [story_id for story_id in stories if story_id not in counted]
+    changed = [story_id for story_id in stories if story_id in counted and counted[story_id] != stories[story_id]]
+    removed = [story_id for story_id in counted if story_id not in stories]
+
+    for story_id in changed + removed:
+        subtract_ngram_counts(tokenize_story(counted[story_id]))
+    for story_id in changed + added:
+        add_ngram_counts(tokenize_story(stories[story_id]))
+    total_unigrams = sum(unigram_counts.values())
+
+    save_counts(output_dir)
+    save_manifest(stories, output_dir)
+    return {"mode": "update", "added": len(added), "changed": len(changed), "removed": len(removed)}
+
+def main():
+    parser = argparse.ArgumentParser(description="Train trigram counts from the tokenized corpus")
+    # Corpora are told apart by story_id: UP_ for UrduPoint, RK_ for Rekhta
+    parser.add_argument("--story-prefix", help="only train on stories whose story_id starts with this, e.g. UP_")
+    parser.add_argument("--output-dir", default=".", help="directory for the *_counts.json files")
+    parser.add_argument("--update", action="store_true",
+                        help="update the saved counts for stories added, edited or removed since the last run")
+    args = parser.parse_args()
+
+    # Load BPE merges
+    load_merges()
+    print("Merges loaded, count:", len(merges))
+
+    # Load data
+    df = pd.read_csv(input_csv)
+    if args.story_prefix:
+        df = df[df["story_id"].astype(str).str.startswith(args.story_prefix)]
+    story_col = "story_text_tokens"
+    df = df.dropna(subset=[story_col])
+    stories = dict(zip(df["story_id"].astype(str), df[story_col]))
+
+    print("Stories loaded:", len(stories))
+
+    if args.update:
+        changes = update_counts(stories, args.output_dir)
+        print("Counts updated:", changes)
+        print("Unique tokens (vocab size):", len(unigram_counts))
+        return
+
+    # Build n-gram counts
+    count_ngrams(stories.values())
+    print("Unique tokens (vocab size):", len(unigram_counts))
+
+    save_counts(args.output_dir)
+    save_manifest(stories, args.output_dir)
+    print("Trigram model training finished")
+
+    # Run example
+    prefix = "ایک دفعہ کا ذکر ہے کہ ایک چھوٹا بچہ جنگل میں گھوم رہا تھا۔ اچانک اس نے دیکھا کہ ایک پرانا بوڑھا آدمی درخت کے نیچے بیٹھا ہے اور"
+    story = generate_story(prefix)
+    print("\nGenerated Story:\n")
+    print(story)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,174 @@
+"""Rebuild the training data and model counts, redoing only what changed.
+
+    python pipeline.py                  # run every stage that is out of date
+    python pipeline.py --force counts   # rerun one stage regardless
+    python pipeline.py --retrain-bpe    # also relearn BPE merges from the current corpus
+
+Stages run in order: merge -> dedupe -> preprocess -> bpe -> counts. Each stage is
+fingerprinted from its input files, parameters and source code, and skipped when
+the fingerprint and its outputs match the last run recorded in pipeline_state.json.
+
+The dedupe stage drops (or with --near-dup-mode flag, marks) stories that are near
+copies of an earlier one, using a MinHash/LSH index that is kept between runs so only
+new or edited stories are hashed (preprocessing/near_duplicates.py).
+
+The counts stage is incremental per story (trigram_model.update_counts): stories
+added, edited or removed since the last run are tokenized and their counts added to
+or subtracted from the existing tables, without recounting the rest. BPE merges are kept
+across corpus changes (new words still tokenize, falling back to shorter pieces)
+so that the counts stay additive; pass --retrain-bpe to relearn them.
+"""
+from pathlib import Path
+import argparse
+import hashlib
+import importlib.util
+import json
+import time
+
+import pandas as pd
+
+from models import bpe_train, trigram_model
+from preprocessing import merger, near_duplicates, preprocessor
+
+ROOT = Path(__file__).resolve().parent
+RAW_DIR = ROOT / "data/raw"
+PROCESSED_DIR = ROOT / "data/processed"
+
+STATE_FILE = "pipeline_state.json"
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def read_json(path, default):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return default
+
+class Stage:
+    def __init__(self, name, run, inputs, outputs, params=None, code=()):
+        self.name = name
+        self.run = run
+        self.inputs = [Path(p) for p in inputs]
+        self.outputs = [Path(p) for p in outputs]
+        self.params = params or {}
+        # Source files whose edits should invalidate the stage
+        self.code = [Path(p) for p in code]
+
+    def fingerprint(self):
+        digest = hashlib.sha256(self.name.encode())
+        digest.update(json.dumps(self.params, sort_keys=True).encode())
+        for path in self.inputs + self.code:
+            digest.update(path.name.encode())
+            digest.update(file_hash(path).encode())
+        return digest.hexdigest()
+
+    def up_to_date(self, recorded, fingerprint):
+        if not recorded or recorded.get("fingerprint") != fingerprint:
+            return False
+        # Outputs edited or deleted by hand since the last run also count as stale
+        return all(
+            path.exists() and file_hash(path) == recorded["outputs"].get(path.name)
+            for path in self.outputs
+        )
+
+def read_stories(tokens_csv, chunksize=1000):
+    # (story_id, story_text_tokens) pairs, streamed
+    for chunk in pd.read_csv(tokens_csv, usecols=["story_id", preprocessor.tokens_col], chunksize=chunksize):
+        for story_id, text in zip(chunk["story_id"], chunk[preprocessor.tokens_col]):
+            if isinstance(text, str):
+                yield str(story_id), text
+
+def train_bpe(tokens_csv, merges_path, vocab_path, vocab_limit):
+    stories = [text for _, text in read_stories(tokens_csv)]
+    merges, vocab = bpe_train.train_bpe(stories, vocab_limit=vocab_limit, verbose=False)
+    with open(merges_path, "w", encoding="utf-8") as f:
+        json.dump(merges, f, ensure_ascii=False)
+    with open(vocab_path, "w", encoding="utf-8") as f:
+        json.dump(list(vocab), f, ensure_ascii=False)
+
+def update_counts(tokens_csv, merges_path, output_dir):
+    # Tokenizes and counts only the stories added, edited or removed since the last run
+    trigram_model.load_merges(merges_path)
+    stories = dict(read_stories(tokens_csv))
+    return trigram_model.update_counts(stories, output_dir)
+
+def build_stages(args):
+    out = Path(args.output_dir)
+    merged = out / "merged_output.csv"
+    # With pyarrow installed, later stages memory-map an Arrow copy instead of parsing the CSV
+    arrow = out / "merged_output.arrow" if importlib.util.find_spec("pyarrow") else None
+    deduped = out / ("merged_deduplicated.arrow" if arrow else "merged_deduplicated.csv")
+    near_dup_index = out / "near_duplicate_index.npz"
+    near_dup_report = out / "near_duplicates.csv"
+    tokens_csv = out / "merged_output_with_special_tokens.csv"
+    merges = out / trigram_model.merges_file
+    vocab = out / bpe_train.vocab_output
+    counts = [out / name for name in (
+        trigram_model.unigram_output, trigram_model.bigram_output, trigram_model.trigram_output)]
+    models_dir, preprocessing_dir = ROOT / "models", ROOT / "preprocessing"
+
+    return [
+        Stage("merge", lambda: merger.merge_csvs(args.urdupoint, args.rekhta, merged, arrow),
+              [args.urdupoint, args.rekhta], [merged] + ([arrow] if arrow else []), code=[preprocessing_dir / "merger.py"]),
+        Stage("dedupe", lambda: near_duplicates.deduplicate(
+                  arrow or merged, deduped, near_dup_index, args.near_dup_threshold, args.near_dup_mode, near_dup_report),
+              [arrow or merged], [deduped, near_dup_index, near_dup_report],
+              {"threshold": args.near_dup_threshold, "mode": args.near_dup_mode},
+              [preprocessing_dir / "near_duplicates.py"]),
+        Stage("preprocess", lambda: preprocessor.preprocess(deduped, tokens_csv, workers=args.workers),
+              [deduped], [tokens_csv], code=[preprocessing_dir / "preprocessor.py"]),
+        # The corpus is deliberately not an input: merges are only relearned when missing,
+        # when their parameters or code change, or with --retrain-bpe
+        Stage("bpe", lambda: train_bpe(tokens_csv, merges, vocab, args.vocab_limit),
+              [], [merges, vocab], {"vocab_limit": args.vocab_limit}, [models_dir / "bpe_train.py"]),
+        Stage("counts", lambda: update_counts(tokens_csv, merges, out),
+              [tokens_csv, merges], counts, code=[models_dir / "trigram_model.py"]),
+    ]
+
+def run(stages, state_path, force=()):
+    state = read_json(state_path, {})
+    for stage in stages:
+        fingerprint = stage.fingerprint()
+        if stage.name not in force and stage.up_to_date(state.get(stage.name), fingerprint):
+            print(f"[{stage.name}] up to date")
+            continue
+        start = time.perf_counter()
+        result = stage.run()
+        state[stage.name] = {
+            "fingerprint": fingerprint,
+            "outputs": {path.name: file_hash(path) for path in stage.outputs},
+        }
+        trigram_model.dump_json_atomic(state, Path(state_path), indent=1)
+        detail = f" {result}" if result is not None else ""
+        print(f"[{stage.name}] done in {time.perf_counter() - start:.1f}s{detail}")
+    return state
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the data pipeline, skipping up-to-date stages")
+    parser.add_argument("--urdupoint", default=str(RAW_DIR / "urdupoint_stories.csv"))
+    parser.add_argument("--rekhta", default=str(RAW_DIR / "rekhta_stories.csv"))
+    parser.add_argument("--output-dir", default=str(PROCESSED_DIR))
+    parser.add_argument("--vocab-limit", type=int, default=bpe_train.vocab_limit)
+    parser.add_argument("--workers", type=int, default=1, help="preprocessing processes")
+    parser.add_argument("--near-dup-threshold", type=float, default=near_duplicates.THRESHOLD,
+                        help="estimated Jaccard similarity above which a story is a near-duplicate")
+    parser.add_argument("--near-dup-mode", choices=["drop", "flag"], default="drop",
+                        help="drop near-duplicates, or keep them with a near_duplicate_of column")
+    parser.add_argument("--retrain-bpe", action="store_true", help="relearn BPE merges from the current corpus")
+    parser.add_argument("--force", nargs="*", default=[], metavar="STAGE", help="rerun these stages regardless")
+    args = parser.parse_args()
+
+    Path(args.output_dir).mkdir(parents=True, exist_ok=True)
+    force = set(args.force)
+    if args.retrain_bpe:
+        force.add("bpe")
+    run(build_stages(args), Path(args.output_dir) / STATE_FILE, force)
+
+if __name__ == "__main__":
+    main()
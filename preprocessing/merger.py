@@ -1,39 +1,90 @@
 import pandas as pd
+import argparse
 import os
 
 # ==== FILE PATHS ====
 file1 = "raw_stories/urdupoint_stories.csv"
 file2 = "rekhta_stories/rekhta_stories.csv"
+output_path = "raw_stories/merged_output.csv"
 
 # ==== COLUMN NAME THAT HAS IDS ====
 id_column = "story_id"
+REQUIRED_COLUMNS = ["story_id", "story_title", "story_text", "url"]
+
+# ==== REKHTA IDS ARE SHIFTED PAST THE URDUPOINT ONES ====
+id_offset = 250
+ID_PATTERN = r"^([A-Za-z]+)_(\d+)$"
+
+def read_stories(path):
+    # ==== READ FILES WITH UTF-8 ====
+    df = pd.read_csv(path, encoding="utf-8", dtype=str, keep_default_na=False)
+    missing = [col for col in REQUIRED_COLUMNS if col not in df.columns]
+    if missing:
+        raise ValueError(f"{path}: missing columns {missing}")
+    bad_ids = df.loc[~df[id_column].str.match(ID_PATTERN), id_column]
+    if len(bad_ids):
+        raise ValueError(f"{path}: malformed {id_column} values {bad_ids.head(5).tolist()}")
+    return df[REQUIRED_COLUMNS]
+
+def update_ids(ids, offset=id_offset):
+    # Vectorized PREFIX_0001 -> PREFIX_0251
+    parts = ids.str.extract(ID_PATTERN)
+    numbers = (parts[1].astype(int) + offset).astype(str).str.zfill(4)
+    return parts[0] + "_" + numbers
 
-# ==== READ FILES WITH UTF-8 ====
-df1 = pd.read_csv(file1, encoding="utf-8")
-df2 = pd.read_csv(file2, encoding="utf-8")
+def deduplicate(df):
+    # Drop repeats of a URL, then repeats of the same text; the first copy wins. Rows
+    # without a URL or text are kept: they are not copies of each other, and collapsing
+    # all empty stories into one would keep an arbitrary id for them.
+    has_url = df["url"].str.strip() != ""
+    df = df[~(has_url & df["url"].duplicated())]
+    text = df["story_text"].str.strip()
+    content_hash = pd.util.hash_pandas_object(text, index=False)
+    return df[~((text != "") & content_hash.duplicated())]
 
-# ==== FUNCTION TO ADD 251 TO ID ====
-def update_id(id_val):
+def write_arrow(df, path):
+    # Uncompressed Arrow IPC can be memory-mapped by the next stage instead of parsed
     try:
-        prefix, num = str(id_val).split("_")
-        new_num = int(num) + 250
-        return f"{prefix}_{new_num:04d}"
-    except:
-        return id_val
+        import pyarrow
+        import pyarrow.feather
+    except ImportError:
+        raise SystemExit("Arrow output needs pyarrow: pip install pyarrow")
+    table = pyarrow.Table.from_pandas(df, preserve_index=False)
+    pyarrow.feather.write_feather(table, path, compression="uncompressed")
 
-# ==== APPLY TO SECOND CSV ====
-df2[id_column] = df2[id_column].apply(update_id)
+def merge_csvs(file1=file1, file2=file2, output_path=output_path, arrow_path=None):
+    df1 = read_stories(file1)
+    df2 = read_stories(file2)
 
-# ==== MERGE ROW-WISE ====
-merged_df = pd.concat([df1, df2], ignore_index=True)
+    # ==== APPLY TO SECOND CSV ====
+    df2 = df2.assign(**{id_column: update_ids(df2[id_column])})
 
-# ==== SAVE OUTPUT WITH UTF-8 (VERY IMPORTANT) ====
-output_path = "raw_stories/merged_output.csv"
+    # ==== MERGE ROW-WISE ====
+    merged_df = deduplicate(pd.concat([df1, df2], ignore_index=True))
+    duplicate_ids = merged_df[id_column].duplicated()
+    if duplicate_ids.any():
+        raise ValueError(f"duplicate {id_column} values after merging: {merged_df.loc[duplicate_ids, id_column].head(5).tolist()}")
+
+    # ==== SAVE OUTPUT WITH UTF-8 (VERY IMPORTANT) ====
+    merged_df.to_csv(
+        output_path,
+        index=False,
+        encoding="utf-8-sig"   # ← BEST for Urdu + Excel compatibility
+    )
+    if arrow_path:
+        write_arrow(merged_df, arrow_path)
+    return len(merged_df)
+
+def main():
+    parser = argparse.ArgumentParser(description="Merge the UrduPoint and Rekhta story CSVs")
+    parser.add_argument("--urdupoint", default=file1)
+    parser.add_argument("--rekhta", default=file2)
+    parser.add_argument("--output", default=output_path)
+    parser.add_argument("--arrow", help="also write an Arrow file here for downstream stages (needs pyarrow)")
+    args = parser.parse_args()
 
-merged_df.to_csv(
-    output_path,
-    index=False,
-    encoding="utf-8-sig"   # ← BEST for Urdu + Excel compatibility
-)
+    stories = merge_csvs(args.urdupoint, args.rekhta, args.output, args.arrow)
+    print(f"✅ UTF-8 safe merge completed! {stories} stories")
 
-print("✅ UTF-8 safe merge completed!")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""Near-duplicate story detection with MinHash signatures and an LSH index.
+
+Each story is reduced to word shingles, then to a MinHash signature whose values
+agree between two stories with probability equal to their Jaccard similarity. The
+signature is cut into bands; stories sharing any band become candidates, and only
+candidates are compared, so a corpus is checked in near-linear time.
+
+Signatures are saved between runs: stories already seen (by story_id and text
+hash) are not re-hashed, and new stories are checked against the kept ones.
+"""
+from pathlib import Path
+import argparse
+import hashlib
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from preprocessing.preprocessor import chunk_output, read_chunks, story_col
+
+SHINGLE_WORDS = 5
+NUM_PERM = 128
+# 16 bands of 8 rows put the LSH threshold near (1/16)^(1/8) = 0.71
+BANDS = 16
+THRESHOLD = 0.8
+SEED = 1
+
+_rng = np.random.RandomState(SEED)
+# Odd 64-bit multipliers: word positions within a shingle, then the multiply-shift
+# hash functions, h(x) = (a * x + b) mod 2^64 >> 32. uint64 arrays wrap without warnings.
+SHINGLE_MULT = _rng.randint(0, 1 << 63, size=SHINGLE_WORDS, dtype=np.int64).astype(np.uint64) | np.uint64(1)
+PERM_A = _rng.randint(0, 1 << 63, size=NUM_PERM, dtype=np.int64).astype(np.uint64) | np.uint64(1)
+PERM_B = _rng.randint(0, 1 << 63, size=NUM_PERM, dtype=np.int64).astype(np.uint64)
+SHIFT = np.uint64(32)
+
+def shingle_hashes(text, k=SHINGLE_WORDS):
+    # 32-bit hashes of every run of k words; words are hashed once and combined, so
+    # no shingle strings are built. crc32 rather than hash(): results must match across runs.
+    words = " ".join(str(text).split()).encode("utf-8").split(b" ")
+    word_hashes = np.fromiter(map(zlib.crc32, words), dtype=np.uint64, count=len(words))
+    k = min(k, len(words))
+    combined = np.zeros(len(words) - k + 1, dtype=np.uint64)
+    for j in range(k):
+        combined += word_hashes[j:len(words) - k + 1 + j] * SHINGLE_MULT[j]
+    return combined >> SHIFT
+
+def minhash(text):
+    hashes = shingle_hashes(text)
+    return ((PERM_A[:, None] * hashes[None, :] + PERM_B[:, None]) >> SHIFT).min(axis=1).astype(np.uint32)
+
+def text_hash(text):
+    return hashlib.sha1(str(text).encode("utf-8")).hexdigest()
+
+class LSHIndex:
+    """Band buckets over the signatures of kept stories.
+
+    Signatures of every story seen are saved; only the buckets, which are cheap, are
+    rebuilt on each run, so decisions follow the current corpus order and removals.
+    """
+
+    def __init__(self, bands=BANDS):
+        self.bands = bands
+        self.rows = NUM_PERM // bands
+        self.ids = []
+        self.signatures = []
+        self.buckets = {}  # (band, band values) -> positions in ids
+
+    def band_keys(self, signature):
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows].tobytes()
+
+    def add(self, story_id, signature):
+        row = len(self.ids)
+        self.ids.append(story_id)
+        self.signatures.append(signature)
+        for key in self.band_keys(signature):
+            self.buckets.setdefault(key, []).append(row)
+
+    def query(self, signature, threshold=THRESHOLD):
+        # (story_id, estimated Jaccard similarity) of the most similar kept story, if above threshold
+        candidates = {row for key in self.band_keys(signature) for row in self.buckets.get(key, ())}
+        best = None
+        for row in candidates:
+            similarity = float(np.mean(self.signatures[row] == signature))
+            if similarity >= threshold and (best is None or similarity > best[1]):
+                best = (self.ids[row], similarity)
+        return best
+
+def save_signatures(path, signatures):
+    # signatures: story_id -> (text hash, signature)
+    ids = list(signatures)
+    with open(path, "wb") as f:
+        np.savez(
+            f, seed=SEED, shingle_words=SHINGLE_WORDS,
+            ids=np.array(ids, dtype=str),
+            text_hashes=np.array([signatures[i][0] for i in ids], dtype=str),
+            signatures=np.stack([signatures[i][1] for i in ids]) if ids else np.empty((0, NUM_PERM), np.uint32),
+        )
+
+def load_signatures(path):
+    # Empty when missing or built with different hash functions
+    if not Path(path).exists():
+        return {}
+    data = np.load(path)
+    if int(data["seed"]) != SEED or int(data["shingle_words"]) != SHINGLE_WORDS or data["signatures"].shape[1] != NUM_PERM:
+        return {}
+    return {str(i): (str(h), sig) for i, h, sig in zip(data["ids"], data["text_hashes"], data["signatures"])}
+
+def deduplicate(input_path, output_path, index_path, threshold=THRESHOLD, mode="drop", report_path=None):
+    # Streams stories through the index in corpus order; the first of a near-duplicate
+    # group is kept. mode="flag" keeps every story and fills a near_duplicate_of column.
+    # Only stories that are new or edited since the saved index are shingled and hashed.
+    cached = load_signatures(index_path)
+    signatures = {}
+    index = LSHIndex()
+    duplicates = []
+    hashed = 0
+
+    writer = chunk_output(output_path)
+    try:
+        for chunk in read_chunks(input_path):
+            duplicate_of = []
+            for story_id, text in zip(chunk["story_id"].astype(str), chunk[story_col]):
+                digest = text_hash(text)
+                entry = cached.get(story_id)
+                if entry is None or entry[0] != digest:
+                    entry = (digest, minhash(text))
+                    hashed += 1
+                signatures[story_id] = entry
+                match = index.query(entry[1], threshold)
+                if match is None:
+                    index.add(story_id, entry[1])
+                    duplicate_of.append(None)
+                else:
+                    duplicates.append((story_id, match[0], round(match[1], 3)))
+                    duplicate_of.append(match[0])
+            if mode == "flag":
+                writer.write(chunk.assign(near_duplicate_of=duplicate_of))
+            else:
+                writer.write(chunk[[d is None for d in duplicate_of]])
+    finally:
+        writer.close()
+
+    # Stories removed from the corpus drop out of the saved index
+    save_signatures(index_path, signatures)
+    if report_path:
+        pd.DataFrame(duplicates, columns=["story_id", "duplicate_of", "similarity"]).to_csv(
+            report_path, index=False, encoding="utf-8")
+    return {"stories": len(signatures), "hashed": hashed, "near_duplicates": len(duplicates)}
+
+def main():
+    parser = argparse.ArgumentParser(description="Flag or drop near-duplicate stories with MinHash/LSH")
+    parser.add_argument("input", help="merged CSV or Arrow file")
+    parser.add_argument("output", help="CSV, or Arrow if it ends in .arrow")
+    parser.add_argument("--index", default="near_duplicate_index.npz", help="persisted LSH index")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD, help="estimated Jaccard similarity")
+    parser.add_argument("--mode", choices=["drop", "flag"], default="drop")
+    parser.add_argument("--report", help="write the near-duplicate pairs found to this CSV")
+    args = parser.parse_args()
+
+    print(deduplicate(args.input, args.output, args.index, args.threshold, args.mode, args.report))
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,11 @@
 import pandas as pd
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import codecs
+import json
 import re
+import time
 
 EOS = "\uE000"  # End of Sentence
 EOP = "\uE001"  # End of Paragraph
@@ -9,6 +15,18 @@ EOT = "\uE002"  # End of Story
 input_csv = "raw_stories/merged_output.csv"
 output_csv = "raw_stories/merged_output_with_special_tokens.csv"
 
+# Your story column name
+story_col = "story_text"
+tokens_col = "story_text_tokens"
+
+# Stories read and written per chunk; memory stays flat whatever the corpus size
+chunk_size = 256
+
+# Built once at import instead of on every call
+PARAGRAPH_BREAK = re.compile(r"\n\s*\n+")
+# Sentence punctuation is single characters, so EOS insertion needs no regex
+SENTENCE_END = "۔!?"
+
 
 def add_special_tokens(text):
     if pd.isna(text):
@@ -20,7 +38,7 @@ def add_special_tokens(text):
     text = text.replace("\r\n", "\n").replace("\r", "\n")
 
     # Split into paragraphs (blank line means new paragraph)
-    paragraphs = re.split(r"\n\s*\n+", text)
+    paragraphs = PARAGRAPH_BREAK.split(text)
 
     new_paragraphs = []
 
@@ -30,10 +48,11 @@ def add_special_tokens(text):
             continue
 
         # Add EOS after sentence punctuation: ۔ ! ?
-        para = re.sub(r"([۔!?])", r"\1 " + EOS + " ", para)
+        for mark in SENTENCE_END:
+            para = para.replace(mark, mark + " " + EOS + " ")
 
-        # Remove extra spaces
-        para = re.sub(r"\s+", " ", para).strip()
+        # Remove extra spaces (split() breaks on exactly the characters \s matches)
+        para = " ".join(para.split())
 
         new_paragraphs.append(para)
 
@@ -46,17 +65,146 @@ def add_special_tokens(text):
     return final_text
 
 
-# Load CSV
-df = pd.read_csv(input_csv)
-
-# Your story column name
-story_col = "story_text"
-
-# Add new processed column
-df["story_text_tokens"] = df[story_col].apply(add_special_tokens)
-
-# Save output CSV
-df.to_csv(output_csv, index=False, encoding="utf-8-sig")
-
-# Show first 2 results
-df[["story_title", "story_text_tokens"]].head(2)
\ No newline at end of file
+def read_chunks(input_path, chunksize=chunk_size):
+    # DataFrames of up to chunksize stories from a CSV, or from an Arrow file written by
+    # merger.py, which is memory-mapped rather than parsed
+    if str(input_path).endswith((".arrow", ".feather")):
+        import pyarrow
+
+        with pyarrow.memory_map(str(input_path)) as source:
+            table = pyarrow.ipc.open_file(source).read_all()
+            for offset in range(0, table.num_rows, chunksize):
+                yield table.slice(offset, chunksize).to_pandas()
+        return
+    yield from pd.read_csv(input_path, chunksize=chunksize)
+
+
+def transform_texts(texts):
+    return [add_special_tokens(text) for text in texts]
+
+
+def processed_chunks(reader, workers):
+    # Yields chunks with the tokens column added, in input order. With workers > 1
+    # chunks are transformed in a process pool, at most 2 per worker in flight.
+    if workers <= 1:
+        for chunk in reader:
+            chunk[tokens_col] = transform_texts(chunk[story_col])
+            yield chunk
+        return
+
+    with ProcessPoolExecutor(workers) as pool:
+        pending = deque()
+        for chunk in reader:
+            pending.append((chunk, pool.submit(transform_texts, chunk[story_col].tolist())))
+            if len(pending) >= 2 * workers:
+                chunk, future = pending.popleft()
+                chunk[tokens_col] = future.result()
+                yield chunk
+        while pending:
+            chunk, future = pending.popleft()
+            chunk[tokens_col] = future.result()
+            yield chunk
+
+
+class CsvOutput:
+    # UTF-8 with a BOM so Excel shows Urdu correctly; the header goes with the first chunk
+    def __init__(self, path):
+        self.file = open(path, "wb")
+        self.header = True
+
+    def write(self, chunk):
+        if self.header:
+            self.file.write(codecs.BOM_UTF8)
+        chunk.to_csv(self.file, index=False, header=self.header, encoding="utf-8")
+        self.header = False
+
+    def close(self):
+        self.file.close()
+
+
+class ArrowOutput:
+    # Parquet, or an Arrow IPC file for paths ending in .arrow. pyarrow is optional and
+    # only needed for these outputs.
+    def __init__(self, path):
+        try:
+            import pyarrow
+            import pyarrow.ipc
+            import pyarrow.parquet
+        except ImportError:
+            raise SystemExit(f"{path}: Parquet and Arrow output need pyarrow: pip install pyarrow")
+        self.pa = pyarrow
+        self.pq = pyarrow.parquet
+        self.path = str(path)
+        self.writer = None
+        self.schema = None
+
+    def write(self, chunk):
+        # Every column is text; an all-empty column in one chunk must not change the schema
+        if self.writer is None:
+            self.schema = self.pa.schema([(col, self.pa.string()) for col in chunk.columns])
+            if self.path.endswith(".arrow"):
+                self.writer = self.pa.ipc.new_file(self.path, self.schema)
+            else:
+                self.writer = self.pq.ParquetWriter(self.path, self.schema)
+        chunk = chunk.astype(object).where(chunk.notna(), None)
+        self.writer.write_table(self.pa.Table.from_pandas(chunk, schema=self.schema, preserve_index=False))
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+def chunk_output(path):
+    # Writer appending DataFrame chunks to path, in the format its extension names
+    return ArrowOutput(path) if str(path).endswith((".arrow", ".parquet")) else CsvOutput(path)
+
+
+def write_jsonl(f, chunk):
+    for record in chunk.to_dict(orient="records"):
+        record = {k: (None if not isinstance(v, str) and pd.isna(v) else v) for k, v in record.items()}
+        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def preprocess(input_path=input_csv, output_path=output_csv, jsonl_path=None, parquet_path=None,
+               chunksize=chunk_size, workers=1):
+    # Streams the CSV chunk by chunk, appending each processed chunk to every output
+    stories = 0
+    jsonl = open(jsonl_path, "w", encoding="utf-8") if jsonl_path else None
+    parquet = ArrowOutput(parquet_path) if parquet_path else None
+    out = CsvOutput(output_path)
+    try:
+        reader = read_chunks(input_path, chunksize)
+        for chunk in processed_chunks(reader, workers):
+            out.write(chunk)
+            if jsonl:
+                write_jsonl(jsonl, chunk)
+            if parquet:
+                parquet.write(chunk)
+            stories += len(chunk)
+    finally:
+        out.close()
+        if jsonl:
+            jsonl.close()
+        if parquet:
+            parquet.close()
+    return stories
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Add EOS/EOP/EOT tokens to the merged story CSV")
+    parser.add_argument("--input", default=input_csv)
+    parser.add_argument("--output", default=output_csv)
+    parser.add_argument("--jsonl", help="also write one JSON story per line here")
+    parser.add_argument("--parquet", help="also write a Parquet file here (needs pyarrow)")
+    parser.add_argument("--chunksize", type=int, default=chunk_size, help="stories per chunk")
+    parser.add_argument("--workers", type=int, default=1, help="processes transforming chunks in parallel")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    stories = preprocess(args.input, args.output, args.jsonl, args.parquet, args.chunksize, args.workers)
+    elapsed = time.perf_counter() - start
+    print(f"Processed {stories} stories -> {args.output} in {elapsed:.1f}s ({stories / elapsed:.0f} stories/sec)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+# Text cleaning shared by the UrduPoint and Rekhta scrapers
+#
+# Each scraper used to run 20+ uncompiled re.sub passes and count Urdu characters
+# with generator expressions on every line. Here the junk passes are precompiled and
+# skipped when a single alternation finds no junk at all, and each line is checked
+# once, counting only when the result matters.
+
+import argparse
+import json
+import re
+import time
+
+# Removed before the junk phrases, in this order (an email pattern applied together
+# with the URL one would swallow text glued to the front of a URL)
+URL = re.compile(r'http\S+|www\.\S+')
+EMAIL = re.compile(r'\S+@\S+')
+
+# Common English ad/navigation text. The junk patterns are removed one pass each, in
+# list order: the two spanning patterns give different results when run together
+# with the rest (or with each other), and removing one phrase can join the halves
+# of another that a later pass then removes.
+JUNK_PATTERNS = [
+    r'error occurred.*?later',
+    r'Please.*?again.*?later',
+    r'Advertisement',
+    r'Learn more',
+    r'Click here',
+    r'Read more',
+    r'Share',
+    r'Facebook',
+    r'Twitter',
+    r'WhatsApp',
+    r'Subscribe',
+    r'Follow us',
+    r'Sign up',
+    r'Login',
+    r'Register',
+]
+
+# UrduPoint removes the player's mute buttons right after "Learn more"
+URDUPOINT_JUNK = JUNK_PATTERNS[:4] + [r'unmute', r'mute'] + JUNK_PATTERNS[4:] + [
+    # Urdu continuation markers and metadata
+    r'جاری ہے',  # "to be continued"
+    r'تحریر نمبر\s*\d+',  # Story number
+    r'\d{1,2}\s+(?:جنوری|فروری|مارچ|اپریل|مئی|جون|جولائی|اگست|ستمبر|اکتوبر|نومبر|دسمبر)\s+\d{4}',  # Dates
+    r'جمعرات|پیر|منگل|بدھ|جمعہ|ہفتہ|اتوار',  # Days of week
+]
+
+REKHTA_JUNK = JUNK_PATTERNS + [
+    r'More Stories',
+    r'Related Stories',
+    r'Recommended',
+    # Rekhta-specific navigation elements
+    r'Rekhta Dictionary',
+    r'Audio/Video',
+    r'Play Audio',
+    r'Download',
+    r'Meaning in English',
+]
+
+# Standalone English words (1-20 chars). Kept as its own pass after the junk phrases:
+# removing "Share" from "Shareholder" must still leave "holder" to be removed here.
+ENGLISH_WORD = re.compile(r'\b[a-zA-Z]{1,20}\b')
+SPACES = re.compile(r' +')
+
+URDU_CHARS = re.compile('[\u0600-\u06FF]+')
+# Characters ignored when deciding whether a short line is entirely Urdu
+LINE_PUNCTUATION = str.maketrans('', '', ' ۔؟!"،')
+
+
+def urdu_char_count(text):
+    return len(text) - len(URDU_CHARS.sub('', text))
+
+
+def keep_line(line):
+    # Lines with substantial content (more than 10 chars), or short lines that are
+    # entirely in Urdu, like dialogue. The character count only runs for short lines.
+    if len(line) > 10:
+        return True
+    urdu_chars = urdu_char_count(line)
+    return urdu_chars > 3 and urdu_chars == len(line.translate(LINE_PUNCTUATION))
+
+
+class TextCleaner:
+    def __init__(self, junk_patterns):
+        self.passes = [re.compile(pattern, re.IGNORECASE) for pattern in junk_patterns]
+        # Only used to skip the passes on text without any junk. Guarding the English
+        # phrases with a one-letter lookahead lets the engine step over Urdu text
+        # without trying each English alternative case-insensitively.
+        english = [p for p in junk_patterns if p[0].isascii() and p[0].isalpha()]
+        other = [p for p in junk_patterns if p not in english]
+        self.junk = re.compile('|'.join(['(?=[A-Za-z])(?:' + '|'.join(english) + ')'] + other), re.IGNORECASE)
+
+    def remove_junk(self, text):
+        if self.junk.search(text):
+            for pattern in self.passes:
+                text = pattern.sub('', text)
+        return text
+
+    def clean(self, text):
+        """Clean extracted text - Remove ads and navigation while preserving story"""
+        text = URL.sub('', text)
+        text = EMAIL.sub('', text)
+        text = self.remove_junk(text)
+        text = ENGLISH_WORD.sub('', text)
+        text = SPACES.sub(' ', text)
+
+        # Blank lines never pass keep_line, so the result has no paragraph breaks left to
+        # collapse, and the old first-50-chars paragraph dedupe could never fire
+        return '\n'.join(line for line in map(str.strip, text.split('\n')) if keep_line(line))
+
+
+urdupoint = TextCleaner(URDUPOINT_JUNK)
+rekhta = TextCleaner(REKHTA_JUNK)
+CLEANERS = {"urdupoint": urdupoint, "rekhta": rekhta}
+
+
+def validate_urdu_text(text):
+    """Validate that text is primarily Urdu"""
+    if not text or len(text) < 100:
+        return False
+
+    total_chars = len(text) - text.count(' ') - text.count('\n')
+    if total_chars == 0:
+        return False
+
+    urdu_percentage = (urdu_char_count(text) / total_chars) * 100
+    return urdu_percentage > 60  # At least 60% Urdu
+
+
+def reclean(stories, cleaner):
+    # Re-applies the cleaning rules to already scraped stories (e.g. after a rule change)
+    return [{**story, 'story_text': cleaner.clean(story['story_text'])} for story in stories]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-clean scraped stories with the current rules")
+    parser.add_argument("site", choices=sorted(CLEANERS))
+    parser.add_argument("input", help="scraper JSON output, e.g. data/raw/urdupoint_stories.json")
+    parser.add_argument("output")
+    args = parser.parse_args()
+
+    with open(args.input, encoding="utf-8") as f:
+        stories = json.load(f)
+    start = time.perf_counter()
+    stories = reclean(stories, CLEANERS[args.site])
+    elapsed = time.perf_counter() - start
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(stories, f, ensure_ascii=False, indent=2)
+    print(f"Re-cleaned {len(stories)} stories in {elapsed:.2f}s -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+# Concurrent crawling for the scrapers
+#
+# N workers, each with its own browser, pull listing, author and story pages from one
+# shared frontier. Story pages are served first so the target is reached early, and
+# the next listing page is only fetched once there is nothing else to do. Requests to
+# a host are spaced by a shared politeness budget instead of fixed per-page sleeps.
+
+import copy
+import heapq
+import itertools
+import random
+import threading
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+from scraper.store import story_number
+
+# Minimum seconds between requests to the same host, across all workers
+MIN_INTERVAL = 1.0
+
+PRIORITY = {"story": 0, "author": 1, "listing": 2}
+
+
+class HostBudget:
+    """Per-host politeness: requests to a host start at least min_interval apart."""
+
+    def __init__(self, min_interval=MIN_INTERVAL, jitter=0.25):
+        self.min_interval = min_interval
+        self.jitter = jitter
+        self.next_slot = {}
+        self.lock = threading.Lock()
+
+    def reserve(self, url):
+        # Takes the next slot for the url's host; returns the seconds until it starts
+        host = urlsplit(url).netloc
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot.get(host, now))
+            self.next_slot[host] = slot + self.min_interval * (1 + random.uniform(0, self.jitter))
+        return slot - now
+
+    def wait(self, url):
+        delay = self.reserve(url)
+        if delay > 0:
+            time.sleep(delay)
+
+
+class Task:
+    def __init__(self, kind, target, page, author_name=""):
+        self.kind = kind  # "listing" (target is the page number), "author" or "story" (a URL)
+        self.target = target
+        self.page = page  # listing page the task was found through
+        self.author_name = author_name
+
+
+class Frontier:
+    """Shared work queue with URL dedupe against scraped_urls and everything queued so far.
+
+    Also tracks unfinished tasks per listing page, so the resume point is the first
+    page with work left rather than the last page any worker reached.
+    """
+
+    def __init__(self, scraped_urls, max_pages):
+        self.scraped_urls = scraped_urls
+        self.max_pages = max_pages
+        self.heap = []
+        self.order = itertools.count()
+        self.queued = set()
+        self.in_flight = 0
+        self.pending = Counter()  # listing page -> unfinished tasks
+        self.last_page = 0
+        self.closed = False
+        self.cond = threading.Condition()
+
+    def push(self, task):
+        with self.cond:
+            key = (task.kind, task.target)
+            if self.closed or key in self.queued or task.target in self.scraped_urls:
+                return
+            if task.kind == "listing":
+                if task.target > self.max_pages:
+                    return
+                self.last_page = max(self.last_page, task.target)
+            self.queued.add(key)
+            self.pending[task.page] += 1
+            heapq.heappush(self.heap, (PRIORITY[task.kind], next(self.order), task))
+            self.cond.notify()
+
+    def get(self):
+        # Next task, or None once the crawl is closed or nothing is queued or in flight
+        with self.cond:
+            while not self.heap and self.in_flight and not self.closed:
+                self.cond.wait()
+            if self.closed or not self.heap:
+                return None
+            self.in_flight += 1
+            return heapq.heappop(self.heap)[2]
+
+    def done(self, task, finished=True):
+        # Unfinished tasks keep their listing page as the resume point
+        with self.cond:
+            self.in_flight -= 1
+            if finished:
+                self.pending[task.page] -= 1
+                if not self.pending[task.page]:
+                    del self.pending[task.page]
+            self.cond.notify_all()
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+
+    def resume_page(self):
+        with self.cond:
+            return min(self.pending, default=self.last_page + 1)
+
+
+class StoryIds:
+    """Hands out story ids up to the target, reusing the ids of failed scrapes.
+
+    Numbering continues after the highest stored id rather than the story count: a
+    failed id that nothing reused leaves a gap, and counting would reissue a stored id.
+    """
+
+    def __init__(self, prefix, scraped, target, last_number):
+        self.prefix = prefix
+        self.scraped = scraped
+        self.target = target
+        self.last_number = last_number
+        self.next_number = self.last_number + 1
+        self.free = []
+        self.reserved = 0
+        self.lock = threading.Lock()
+
+    def reserve(self):
+        with self.lock:
+            if self.scraped + self.reserved >= self.target:
+                return None
+            self.reserved += 1
+            if self.free:
+                number = heapq.heappop(self.free)
+            else:
+                number = self.next_number
+                self.next_number += 1
+            return f"{self.prefix}_{number:04d}"
+
+    def finish(self, story_id, success):
+        with self.lock:
+            self.reserved -= 1
+            if success:
+                self.scraped += 1
+                self.last_number = max(self.last_number, story_number(story_id))
+            else:
+                heapq.heappush(self.free, story_number(story_id))
+            return self.scraped >= self.target
+
+
+def expand(scraper, task):
+    # Tasks for the links on a listing or author page
+    if task.kind == "listing":
+        if hasattr(scraper, "get_author_links_from_listing"):
+            return [Task("author", url, task.page) for url in scraper.get_author_links_from_listing(task.target)]
+        return [Task("story", url, task.page) for url in scraper.get_story_links_from_listing(task.target)]
+    return [Task("story", url, task.page, author) for url, author in scraper.get_story_links_from_author_page(task.target)]
+
+
+def work(scraper, frontier, ids):
+    while (task := frontier.get()) is not None:
+        finished = True
+        try:
+            if task.kind != "story":
+                links = expand(scraper, task)
+                for found in links:
+                    frontier.push(found)
+                if task.kind != "listing":
+                    continue
+                if not links and not hasattr(scraper, "get_author_links_from_listing"):
+                    # Past the last story listing page, as in the sequential run. It stays
+                    # unfinished, so a resumed crawl starts from it. (Rekhta's letter pages
+                    # can be empty without being the last.)
+                    finished = False
+                    continue
+                # One listing page at a time: queued after this page's links, it is only
+                # fetched once no author or story pages are waiting
+                frontier.push(Task("listing", task.target + 1, task.target + 1))
+                continue
+            story_id = ids.reserve()
+            if story_id is None:
+                # The target is covered by stories in flight
+                finished = False
+                continue
+            if task.author_name:
+                success = scraper.scrape_story(task.target, story_id, task.author_name)
+            else:
+                success = scraper.scrape_story(task.target, story_id)
+            if ids.finish(story_id, success):
+                frontier.close()
+        except Exception as e:
+            print(f"  ✗ {task.kind} {task.target}: {str(e)[:50]}")
+        finally:
+            frontier.done(task, finished)
+
+
+def crawl(scraper, max_stories=250, workers=4, headless=True, min_interval=MIN_INTERVAL, setup=None):
+    """Scrape with `workers` browsers sharing one frontier; returns the total story count.
+
+    setup(worker) must give a worker copy of the scraper its own driver and return
+    True; by default it starts headless Chrome.
+    """
+    if scraper.story_count >= max_stories:
+        print(f"\n✓ Already have {scraper.story_count} stories (target: {max_stories})")
+        return scraper.story_count
+    setup = setup or (lambda worker: worker.setup_driver(headless=headless))
+
+    budget = HostBudget(min_interval)
+    frontier = Frontier(scraper.scraped_urls, scraper.max_pages)
+    ids = StoryIds(scraper.story_prefix, scraper.story_count, max_stories, scraper.last_story_number)
+    frontier.push(Task("listing", scraper.last_page, scraper.last_page))
+
+    # Shallow copies share the store and scraped_urls; each gets its own driver
+    clones = []
+    for _ in range(workers):
+        clone = copy.copy(scraper)
+        clone.driver = None
+        clone.politeness = budget
+        if setup(clone):
+            clones.append(clone)
+    if not clones:
+        return 0
+
+    print(f"\nCrawling with {len(clones)} workers, {min_interval}s between requests per host...")
+    start = time.perf_counter()
+    threads = [threading.Thread(target=work, args=(clone, frontier, ids), daemon=True) for clone in clones]
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        frontier.close()
+        for clone in clones:
+            if clone.driver:
+                clone.driver.quit()
+
+    scraped = ids.scraped - scraper.story_count
+    scraper.story_count = ids.scraped
+    scraper.last_story_number = ids.last_number
+    elapsed = time.perf_counter() - start
+    print(f"\n✓ Scraped {scraped} stories in {elapsed:.0f}s ({scraped / elapsed * 60:.1f} stories/min)")
+    scraper.save_progress(frontier.resume_page())
+    if scraper.story_count:
+        scraper.save_to_csv()
+        scraper.print_statistics()
+    return scraper.story_count
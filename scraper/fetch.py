@@ -0,0 +1,193 @@
+# Plain-HTTP crawling for the scrapers
+#
+# Listing, author and story pages are fetched over one pooled keep-alive HTTP client,
+# many at a time, and handed straight to the scrapers' HTML parsers. No browser is
+# started unless a story page fails validation (e.g. its text is only rendered by
+# JavaScript); those pages are scraped with Selenium once the HTTP pass is over.
+
+import asyncio
+import copy
+import time
+
+import httpx
+
+from scraper.crawl import HostBudget, StoryIds
+
+# Requests in flight at once (and pooled connections)
+CONCURRENCY = 8
+# A plain GET is one HTML response, not a browser loading every script and image,
+# so requests to a host can be spaced closer than crawl.MIN_INTERVAL
+MIN_INTERVAL = 0.25
+TIMEOUT = 30
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+                  "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Accept-Language": "ur,en;q=0.8",
+}
+
+
+class Fetcher:
+    """Pooled HTTP client; callers hold `limit` while a request is theirs."""
+
+    def __init__(self, concurrency=CONCURRENCY, min_interval=MIN_INTERVAL):
+        self.client = httpx.AsyncClient(
+            headers=HEADERS,
+            timeout=TIMEOUT,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency),
+        )
+        self.limit = asyncio.Semaphore(concurrency)
+        self.budget = HostBudget(min_interval)
+
+    async def get(self, url):
+        # Page HTML, or None if the request fails
+        await asyncio.sleep(self.budget.reserve(url))
+        try:
+            response = await self.client.get(url)
+            response.raise_for_status()
+        except httpx.HTTPError as e:
+            print(f"    ✗ {url}: {str(e)[:50]}")
+            return None
+        return response.text
+
+    async def close(self):
+        await self.client.aclose()
+
+
+async def story_links(scraper, fetcher, page_num):
+    # (url, author name) pairs found through a listing page, or None if it can't be fetched
+    url = scraper.listing_url(page_num)
+    async with fetcher.limit:
+        html = await fetcher.get(url)
+    if html is None:
+        return None
+    if not hasattr(scraper, "parse_author_links"):
+        return [(link, "") for link in scraper.parse_story_links(html, url)]
+
+    async def author_links(author_url):
+        async with fetcher.limit:
+            html = await fetcher.get(author_url)
+        return await asyncio.to_thread(scraper.parse_story_links, html, author_url) if html else []
+
+    authors = scraper.parse_author_links(html)
+    print(f"  ✓ Found {len(authors)} author pages")
+    # A story linked from several authors is kept under the first
+    links = {}
+    for found in await asyncio.gather(*map(author_links, authors)):
+        for link, author_name in found:
+            links.setdefault(link, author_name)
+    return list(links.items())
+
+
+def parse_story(scraper, html, url, author_name):
+    # (title, text) through the scraper's own parsers
+    if hasattr(scraper, "title_from_url"):
+        title = scraper.title_from_url(url, author_name) or scraper.parse_story_title(html)
+    else:
+        title = scraper.parse_story_title(html)
+    return title, scraper.parse_story_content(html)
+
+
+async def scrape_stories(scraper, fetcher, ids, links, retry):
+    # Scrapes the links concurrently; returns False if some were left for stories in flight
+    complete = True
+
+    async def scrape(url, author_name):
+        nonlocal complete
+        async with fetcher.limit:
+            story_id = ids.reserve()
+            if story_id is None:
+                complete = False
+                return
+            print(f"  [{story_id}] Fetching story...")
+            html = await fetcher.get(url)
+        # Parsing and the fsync'd store append run in a thread, after the request slot
+        # is released, so the event loop keeps other requests moving meanwhile
+        success = False
+        if html is not None:
+            title, text = await asyncio.to_thread(parse_story, scraper, html, url, author_name)
+            success = await asyncio.to_thread(scraper.accept_story, story_id, title, text, url)
+            if not success:
+                retry.append((url, author_name))
+        ids.finish(story_id, success)
+
+    await asyncio.gather(*(scrape(url, author_name) for url, author_name in links))
+    return complete
+
+
+async def fetch_all(scraper, ids, retry, concurrency, min_interval):
+    fetcher = Fetcher(concurrency, min_interval)
+    page_num = scraper.last_page
+    try:
+        while ids.scraped < ids.target and page_num <= scraper.max_pages:
+            print(f"\n--- Page {page_num} ---")
+            links = await story_links(scraper, fetcher, page_num)
+            if links is None:
+                print(f"  Could not fetch page {page_num}")
+                break
+            print(f"  Found {len(links)} new story links")
+            if not await scrape_stories(scraper, fetcher, ids, links, retry):
+                break
+            page_num += 1
+            scraper.save_progress(page_num)
+    finally:
+        await fetcher.close()
+    return page_num
+
+
+def scrape_with_browser(scraper, ids, pages, min_interval, setup):
+    # Story pages that failed validation over HTTP, rendered by a browser
+    worker = copy.copy(scraper)
+    worker.driver = None
+    worker.politeness = HostBudget(min_interval)
+    if not setup(worker):
+        return
+    print(f"\nRetrying {len(pages)} pages in the browser...")
+    try:
+        for url, author_name in pages:
+            story_id = ids.reserve()
+            if story_id is None:
+                break
+            if author_name:
+                success = worker.scrape_story(url, story_id, author_name)
+            else:
+                success = worker.scrape_story(url, story_id)
+            ids.finish(story_id, success)
+    finally:
+        if worker.driver:
+            worker.driver.quit()
+
+
+def crawl(scraper, max_stories=250, concurrency=CONCURRENCY, headless=True, min_interval=MIN_INTERVAL, setup=None):
+    """Scrape over plain HTTP, using a browser only for failed pages; returns the total story count.
+
+    setup(worker) must give a copy of the scraper a driver and return True; by default
+    it starts headless Chrome. It is only called if some page needs a browser.
+    """
+    if scraper.story_count >= max_stories:
+        print(f"\n✓ Already have {scraper.story_count} stories (target: {max_stories})")
+        return scraper.story_count
+    setup = setup or (lambda worker: worker.setup_driver(headless=headless))
+
+    before = scraper.story_count
+    ids = StoryIds(scraper.story_prefix, before, max_stories, scraper.last_story_number)
+    retry = []
+    print(f"\nFetching over HTTP, {concurrency} requests at a time, {min_interval}s between requests per host...")
+    start = time.perf_counter()
+    page_num = asyncio.run(fetch_all(scraper, ids, retry, concurrency, min_interval))
+    fetched = ids.scraped - before
+
+    if retry and ids.scraped < ids.target:
+        scrape_with_browser(scraper, ids, retry, min_interval, setup)
+
+    scraped = ids.scraped - before
+    scraper.story_count = ids.scraped
+    scraper.last_story_number = ids.last_number
+    elapsed = time.perf_counter() - start
+    print(f"\n✓ Scraped {scraped} stories ({fetched} over HTTP) in {elapsed:.0f}s ({scraped / elapsed * 60:.1f} stories/min)")
+    scraper.save_progress(page_num)
+    if scraper.story_count:
+        scraper.save_to_csv()
+        scraper.print_statistics()
+    return scraper.story_count
@@ -7,22 +7,39 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
+import argparse
 import time
-import csv
 import json
 from pathlib import Path
 import random
 import re
 
+from bs4 import BeautifulSoup
+
+from scraper import cleaning, crawl, fetch
+from scraper.store import StoryStore, story_number
+
+# Author listing pages, one per letter
+ALPHABET = ['a', 'b', 'c', 'd', 'e', 'f', 'g', 'h', 'i', 'j', 'k', 'l', 'm',
+            'n', 'o', 'p', 'q', 'r', 's', 't', 'u', 'v', 'w', 'x', 'y', 'z']
+
 
 class RekhtaSeleniumScraper:
+    story_prefix = "RK"
+    max_pages = 26  # 26 letters of alphabet
+    
     def __init__(self, output_dir="rekhta_stories"):
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(exist_ok=True)
-        self.stories = []
+        # Every scraped story is appended and fsync'd here; CSV/JSON/TXT are exports
+        self.store = StoryStore(self.output_dir / "rekhta_stories.jsonl")
+        self.story_count = 0
+        self.last_story_number = 0  # highest stored id number; new ids continue after it
         self.scraped_urls = set()
         self.base_url = "https://www.rekhta.org"
         self.driver = None
+        self.politeness = None  # per-host budget, set by scraper.crawl for concurrent runs
+        self.render_wait = 1.0  # scales the waits for pages to render and lazy-load
         self.last_page = 1  # Track last scraped page
         
         # Load existing stories if any
@@ -30,33 +47,27 @@ class RekhtaSeleniumScraper:
         self.load_progress()
     
     def load_existing_stories(self):
-        """Load previously scraped stories from CSV to continue from where we left off"""
+        """Resume from the story store, streaming it to count stories and collect scraped URLs"""
         csv_file = self.output_dir / "rekhta_stories.csv"
         
-        if not csv_file.exists():
+        # Stores are created on first run; older runs only left a CSV behind
+        if not self.store.path.exists() and csv_file.exists():
+            print(f"Importing existing stories from {csv_file}...")
+            self.store.import_csv(csv_file)
+        
+        for story in self.store:
+            self.story_count += 1
+            self.last_story_number = max(self.last_story_number, story_number(story.get('story_id', '')))
+            # Track URL to avoid re-scraping
+            if story.get('url'):
+                self.scraped_urls.add(story['url'])
+        
+        if self.story_count == 0:
             print("No existing stories found. Starting fresh.")
             return
         
-        try:
-            with open(csv_file, 'r', encoding='utf-8-sig') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    self.stories.append({
-                        'story_id': row['story_id'],
-                        'story_title': row['story_title'],
-                        'story_text': row['story_text'],
-                        'url': row.get('url', '')
-                    })
-                    # Track URL to avoid re-scraping
-                    if row.get('url'):
-                        self.scraped_urls.add(row['url'])
-            
-            print(f"✓ Loaded {len(self.stories)} existing stories")
-            print(f"  Will continue from story #{len(self.stories) + 1}")
-            
-        except Exception as e:
-            print(f"⚠ Error loading existing stories: {e}")
-            print("  Starting fresh...")
+        print(f"✓ Loaded {self.story_count} existing stories")
+        print(f"  Will continue from story #{self.last_story_number + 1}")
     
     def load_progress(self):
         """Load the last page number from progress file"""
@@ -80,7 +91,7 @@ class RekhtaSeleniumScraper:
         try:
             progress = {
                 'last_page': page_num,
-                'total_stories': len(self.stories),
+                'total_stories': self.story_count,
                 'last_updated': time.strftime('%Y-%m-%d %H:%M:%S')
             }
             with open(progress_file, 'w', encoding='utf-8') as f:
@@ -122,13 +133,28 @@ class RekhtaSeleniumScraper:
             print("3. ChromeDriver in PATH or same folder")
             return False
     
+    def open_page(self, url):
+        """Load a page, waiting for the host's politeness budget in concurrent runs"""
+        if self.politeness:
+            self.politeness.wait(url)
+        self.driver.get(url)
+    
+    def pause(self, low, high):
+        """Fixed delay between requests in sequential runs; concurrent runs use the budget in open_page"""
+        if self.politeness is None:
+            time.sleep(random.uniform(low, high))
+    
+    def settle(self, seconds):
+        """Give scripts and lazy-loaded content time to render"""
+        time.sleep(seconds * self.render_wait)
+    
     def test_connection(self):
         """Test if we can access the website"""
         print("\nTesting connection to Rekhta...")
         
         try:
-            self.driver.get(f"{self.base_url}/children-s-stories?lang=ur")
-            time.sleep(3)
+            self.open_page(f"{self.base_url}/children-s-stories?lang=ur")
+            self.settle(3)
             
             # Check if page loaded
             if "rekhta" in self.driver.current_url.lower():
@@ -142,127 +168,149 @@ class RekhtaSeleniumScraper:
             print(f"✗ Connection failed: {e}")
             return False
     
+    def listing_url(self, page_num):
+        """URL of an author listing page (one per letter, then numbered pages)"""
+        if page_num <= len(ALPHABET):
+            letter = ALPHABET[page_num - 1]
+            return f"{self.base_url}/children-s-stories?startswith={letter}&lang=ur"
+        return f"{self.base_url}/children-s-stories/{page_num - len(ALPHABET)}?lang=ur"
+    
     def get_author_links_from_listing(self, page_num=1):
         """Get author links from listing page"""
-        alphabet = ['a', 'b', 'c', 'd', 'e', 'f', 'g', 'h', 'i', 'j', 'k', 'l', 'm', 
-                   'n', 'o', 'p', 'q', 'r', 's', 't', 'u', 'v', 'w', 'x', 'y', 'z']
+        url = self.listing_url(page_num)
         
-        if page_num <= len(alphabet):
-            letter = alphabet[page_num - 1]
-            url = f"https://www.rekhta.org/children-s-stories?startswith={letter}&lang=ur"
-        else:
-            url = f"https://www.rekhta.org/children-s-stories/{page_num - len(alphabet)}?lang=ur"
-        
-        print(f"\nFetching author listing page {page_num} (letter: {alphabet[page_num-1] if page_num <= 26 else 'N/A'})...")
+        print(f"\nFetching author listing page {page_num} (letter: {ALPHABET[page_num-1] if page_num <= 26 else 'N/A'})...")
         
         try:
-            self.driver.get(url)
-            time.sleep(random.uniform(3, 5))
-            
-            from bs4 import BeautifulSoup
-            soup = BeautifulSoup(self.driver.page_source, 'html.parser')
-            
-            author_links = []
-            all_links = soup.find_all('a', href=True)
+            self.open_page(url)
+            self.pause(3, 5)
             
-            for link in all_links:
-                href = link['href']
-                # Author pages: /authors/name/children-s-stories or /poets/name/children-s-stories
-                if ('/authors/' in href or '/poets/' in href) and '/children-s-stories' in href:
-                    full_url = href if href.startswith('http') else self.base_url + href
-                    if '?lang=ur' not in full_url:
-                        full_url += '?lang=ur' if '?' not in full_url else '&lang=ur'
-                    author_links.append(full_url)
-            
-            author_links = list(dict.fromkeys(author_links))
+            author_links = self.parse_author_links(self.driver.page_source)
             print(f"  ✓ Found {len(author_links)} author pages")
             return author_links
-            
+        
         except Exception as e:
             print(f"  ✗ Error: {e}")
             return []
     
+    def parse_author_links(self, page_source):
+        """Author page URLs on a listing page"""
+        soup = BeautifulSoup(page_source, 'html.parser')
+        
+        author_links = []
+        all_links = soup.find_all('a', href=True)
+        
+        for link in all_links:
+            href = link['href']
+            # Author pages: /authors/name/children-s-stories or /poets/name/children-s-stories
+            if ('/authors/' in href or '/poets/' in href) and '/children-s-stories' in href:
+                full_url = href if href.startswith('http') else self.base_url + href
+                if '?lang=ur' not in full_url:
+                    full_url += '?lang=ur' if '?' not in full_url else '&lang=ur'
+                author_links.append(full_url)
+        
+        return list(dict.fromkeys(author_links))
+    
     def get_story_links_from_author_page(self, author_url):
         """Get individual story links from an author's page"""
         try:
-            # Extract author name from URL
-            # URL format: /authors/aagha-ashraf/children-s-stories
-            author_slug = author_url.split('/')[-2]  # Get the author slug
-            author_name = author_slug.replace('-', ' ').title()
-            
-            self.driver.get(author_url)
-            time.sleep(random.uniform(2, 4))
+            self.open_page(author_url)
+            self.pause(2, 4)
             
             # Scroll to load all stories
             self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(2)
-            
-            from bs4 import BeautifulSoup
-            soup = BeautifulSoup(self.driver.page_source, 'html.parser')
-            
-            story_links = []
-            all_links = soup.find_all('a', href=True)
-            
-            for link in all_links:
-                href = link['href']
-                # Individual story URLs contain the story slug and end with -children-s-stories
-                if 'children-s-stories' in href and href.count('-') >= 3:
-                    # Must not be an author/poet page
-                    if '/authors/' not in href and '/poets/' not in href:
-                        # Must not be a filter page
-                        if 'startswith=' not in href:
-                            full_url = href if href.startswith('http') else self.base_url + href
-                            if '?lang=ur' not in full_url:
-                                full_url += '?lang=ur' if '?' not in full_url else '&lang=ur'
-                            
-                            if full_url not in self.scraped_urls:
-                                # Store as tuple: (url, author_name)
-                                story_links.append((full_url, author_name))
-            
-            # Remove duplicates while keeping author name
-            seen = set()
-            unique_links = []
-            for url, author in story_links:
-                if url not in seen:
-                    seen.add(url)
-                    unique_links.append((url, author))
-            
-            return unique_links
+            self.settle(2)
             
+            return self.parse_story_links(self.driver.page_source, author_url)
+        
         except Exception as e:
             print(f"    Error getting stories from author: {e}")
             return []
     
+    def parse_story_links(self, page_source, author_url):
+        """(story URL, author name) pairs on an author's page, skipping scraped stories"""
+        # Extract author name from URL
+        # URL format: /authors/aagha-ashraf/children-s-stories
+        author_slug = author_url.split('/')[-2]  # Get the author slug
+        author_name = author_slug.replace('-', ' ').title()
+        
+        soup = BeautifulSoup(page_source, 'html.parser')
+        
+        story_links = []
+        all_links = soup.find_all('a', href=True)
+        
+        for link in all_links:
+            href = link['href']
+            # Individual story URLs contain the story slug and end with -children-s-stories
+            if 'children-s-stories' in href and href.count('-') >= 3:
+                # Must not be an author/poet page
+                if '/authors/' not in href and '/poets/' not in href:
+                    # Must not be a filter page
+                    if 'startswith=' not in href:
+                        full_url = href if href.startswith('http') else self.base_url + href
+                        if '?lang=ur' not in full_url:
+                            full_url += '?lang=ur' if '?' not in full_url else '&lang=ur'
+                        
+                        if full_url not in self.scraped_urls:
+                            # Store as tuple: (url, author_name)
+                            story_links.append((full_url, author_name))
+        
+        # Remove duplicates while keeping author name
+        seen = set()
+        unique_links = []
+        for url, author in story_links:
+            if url not in seen:
+                seen.add(url)
+                unique_links.append((url, author))
+        
+        return unique_links
+    
+    def title_from_url(self, url, author_name=""):
+        """English title from the URL slug with the author name removed, or None"""
+        # URL format: /story-name-author-name-children-s-stories
+        # Example: /tinku-aagha-ashraf-children-s-stories
+        
+        # Get the last part of URL (the slug)
+        slug = url.split('/')[-1].split('?')[0]  # Remove query params
+        
+        # Remove the -children-s-stories suffix
+        if slug.endswith('-children-s-stories'):
+            slug = slug[:-len('-children-s-stories')]
+        
+        # Convert dashes to spaces and title case
+        title = slug.replace('-', ' ').title()
+        
+        # Remove author name from title if provided
+        if author_name and author_name in title:
+            # Remove the author name and clean up extra spaces
+            title = title.replace(author_name, '').strip()
+            # Remove trailing/leading spaces and dashes
+            title = re.sub(r'\s+', ' ', title).strip()
+        
+        if title and len(title) > 3:
+            return title
+        return None
+    
+    def parse_story_title(self, page_source):
+        """Title from the page heading, for pages fetched without a browser"""
+        soup = BeautifulSoup(page_source, 'html.parser')
+        for selector in ("h1.hdg", ".contentHeading h1", "h1"):
+            element = soup.select_one(selector)
+            title = element.get_text(strip=True) if element else ""
+            if title and len(title) > 3:
+                return title
+        return "Untitled"
+    
     def extract_story_title(self, url="", author_name=""):
         """Extract story title from URL (English) and remove author name"""
         try:
             # Extract title from URL slug
-            # URL format: /story-name-author-name-children-s-stories
-            # Example: /tinku-aagha-ashraf-children-s-stories
-            
-            if url:
-                # Get the last part of URL (the slug)
-                slug = url.split('/')[-1].split('?')[0]  # Remove query params
-                
-                # Remove the -children-s-stories suffix
-                if slug.endswith('-children-s-stories'):
-                    slug = slug[:-len('-children-s-stories')]
-                
-                # Convert dashes to spaces and title case
-                title = slug.replace('-', ' ').title()
-                
-                # Remove author name from title if provided
-                if author_name and author_name in title:
-                    # Remove the author name and clean up extra spaces
-                    title = title.replace(author_name, '').strip()
-                    # Remove trailing/leading spaces and dashes
-                    title = re.sub(r'\s+', ' ', title).strip()
-                
-                if title and len(title) > 3:
-                    return title
+            title = self.title_from_url(url, author_name) if url else None
+            if title:
+                return title
             
             # Fallback: try to get from page if URL method fails
-            time.sleep(1)
+            self.settle(1)
             
             title_selectors = [
                 (By.CSS_SELECTOR, "h1.hdg"),
@@ -288,109 +336,104 @@ class RekhtaSeleniumScraper:
         """Extract complete story content from page"""
         try:
             # Wait for page to load completely
-            time.sleep(2)
+            self.settle(2)
             
             # Scroll to load all lazy-loaded content
             self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(2)
+            self.settle(2)
             
             # Get the entire page source
-            page_source = self.driver.page_source
-            
-            # Parse with BeautifulSoup
-            from bs4 import BeautifulSoup
-            soup = BeautifulSoup(page_source, 'html.parser')
-            
-            story_text = []
+            return self.parse_story_content(self.driver.page_source)
+        
+        except Exception as e:
+            print(f"    Error extracting content: {e}")
+            import traceback
+            traceback.print_exc()
+            return None
+    
+    def parse_story_content(self, page_source):
+        """Story text from a story page, or None if it has too little Urdu"""
+        # Parse with BeautifulSoup
+        soup = BeautifulSoup(page_source, 'html.parser')
+        
+        story_text = []
+        
+        # Find the main content container: div.pMC
+        pmc_div = soup.find('div', class_=lambda x: x and 'pMC' in str(x))
+        
+        if pmc_div:
+            print(f"    Found pMC div (main content)")
             
-            # Find the main content container: div.pMC
-            pmc_div = soup.find('div', class_=lambda x: x and 'pMC' in str(x))
+            # Find all paragraph containers: div.w with data-p attribute
+            paragraph_divs = pmc_div.find_all('div', class_='w', attrs={'data-p': True})
+            print(f"    Found {len(paragraph_divs)} paragraph divs (data-p)")
             
-            if pmc_div:
-                print(f"    Found pMC div (main content)")
-                
-                # Find all paragraph containers: div.w with data-p attribute
-                paragraph_divs = pmc_div.find_all('div', class_='w', attrs={'data-p': True})
-                print(f"    Found {len(paragraph_divs)} paragraph divs (data-p)")
+            for para_div in paragraph_divs:
+                # Find the content div: div.c
+                content_div = para_div.find('div', class_='c')
                 
-                for para_div in paragraph_divs:
-                    # Get paragraph number
-                    para_num = para_div.get('data-p', '')
+                if content_div:
+                    # Find all line paragraphs: p with data-l attribute
+                    lines = content_div.find_all('p', attrs={'data-l': True})
                     
-                    # Find the content div: div.c
-                    content_div = para_div.find('div', class_='c')
-                    
-                    if content_div:
-                        # Find all line paragraphs: p with data-l attribute
-                        lines = content_div.find_all('p', attrs={'data-l': True})
+                    for line in lines:
+                        # Extract all span text
+                        spans = line.find_all('span')
+                        line_text = []
                         
-                        for line in lines:
-                            # Extract all span text
-                            spans = line.find_all('span')
-                            line_text = []
-                            
-                            for span in spans:
-                                # Get the visible text (not the data-m attribute)
-                                text = span.get_text(strip=True)
-                                if text:
-                                    # Check if it's Urdu
-                                    urdu_chars = sum(1 for c in text if '\u0600' <= c <= '\u06FF')
-                                    if urdu_chars > 0:  # Has Urdu content
-                                        line_text.append(text)
-                            
-                            if line_text:
-                                # Join spans in this line with space
-                                full_line = ' '.join(line_text)
-                                story_text.append(full_line)
+                        for span in spans:
+                            # Get the visible text (not the data-m attribute)
+                            text = span.get_text(strip=True)
+                            if text:
+                                # Check if it's Urdu
+                                if cleaning.urdu_char_count(text) > 0:  # Has Urdu content
+                                    line_text.append(text)
+                        
+                        if line_text:
+                            # Join spans in this line with space
+                            full_line = ' '.join(line_text)
+                            story_text.append(full_line)
+            
+            if story_text:
+                # Join all lines with newlines
+                full_text = '\n'.join(story_text)
                 
-                if story_text:
-                    # Join all lines with newlines
-                    full_text = '\n'.join(story_text)
-                    
-                    # Clean up multiple spaces
-                    full_text = re.sub(r' +', ' ', full_text)
-                    
-                    # Verify Urdu content
-                    urdu_chars = sum(1 for c in full_text if '\u0600' <= c <= '\u06FF')
-                    total_chars = len(full_text)
-                    
-                    print(f"    Extracted: {len(full_text)} chars, {urdu_chars} Urdu chars ({len(story_text)} lines)")
-                    
-                    if urdu_chars > 200:
-                        return full_text
-                    else:
-                        print(f"    Not enough Urdu content")
-            else:
-                print(f"    No pMC div found")
-            
-            # Fallback: try to find any content with Urdu
-            print(f"    Trying fallback extraction...")
-            all_spans = soup.find_all('span')
-            fallback_text = []
-            
-            for span in all_spans:
-                text = span.get_text(strip=True)
-                if text and len(text) > 3:
-                    urdu_chars = sum(1 for c in text if '\u0600' <= c <= '\u06FF')
-                    if urdu_chars > 3:
-                        fallback_text.append(text)
-            
-            if fallback_text and len(fallback_text) > 10:
-                full_text = ' '.join(fallback_text)
-                urdu_chars = sum(1 for c in full_text if '\u0600' <= c <= '\u06FF')
+                # Clean up multiple spaces
+                full_text = re.sub(r' +', ' ', full_text)
+                
+                # Verify Urdu content
+                urdu_chars = cleaning.urdu_char_count(full_text)
+                
+                print(f"    Extracted: {len(full_text)} chars, {urdu_chars} Urdu chars ({len(story_text)} lines)")
                 
                 if urdu_chars > 200:
-                    print(f"    Fallback succeeded: {len(full_text)} chars, {urdu_chars} Urdu chars")
                     return full_text
+                else:
+                    print(f"    Not enough Urdu content")
+        else:
+            print(f"    No pMC div found")
+        
+        # Fallback: try to find any content with Urdu
+        print(f"    Trying fallback extraction...")
+        all_spans = soup.find_all('span')
+        fallback_text = []
+        
+        for span in all_spans:
+            text = span.get_text(strip=True)
+            if text and len(text) > 3:
+                if cleaning.urdu_char_count(text) > 3:
+                    fallback_text.append(text)
+        
+        if fallback_text and len(fallback_text) > 10:
+            full_text = ' '.join(fallback_text)
+            urdu_chars = cleaning.urdu_char_count(full_text)
             
-            print(f"    No valid content found")
-            return None
-            
-        except Exception as e:
-            print(f"    Error extracting content: {e}")
-            import traceback
-            traceback.print_exc()
-            return None
+            if urdu_chars > 200:
+                print(f"    Fallback succeeded: {len(full_text)} chars, {urdu_chars} Urdu chars")
+                return full_text
+        
+        print(f"    No valid content found")
+        return None
     
     def scrape_story(self, url, story_id, author_name=""):
         """Scrape a single story - URDU ONLY"""
@@ -400,12 +443,12 @@ class RekhtaSeleniumScraper:
         print(f"  [{story_id}] Scraping story...")
         
         try:
-            self.driver.get(url)
-            time.sleep(random.uniform(2, 4))
+            self.open_page(url)
+            self.pause(2, 4)
             
             # Scroll to ensure content loads
             self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight/2);")
-            time.sleep(1)
+            self.settle(1)
             
             # Extract title from URL (English) and remove author name
             story_title = self.extract_story_title(url, author_name)
@@ -413,189 +456,81 @@ class RekhtaSeleniumScraper:
             # Extract content
             story_text = self.extract_story_content()
             
-            if story_text and len(story_text) > 100:
-                # Clean the text
-                story_text = self.clean_text(story_text)
-                
-                # Validate it's Urdu content
-                urdu_chars = sum(1 for c in story_text if '\u0600' <= c <= '\u06FF')
-                total_chars = len(story_text)
-                urdu_percentage = (urdu_chars / total_chars * 100) if total_chars > 0 else 0
-                
-                # Must be at least 60% Urdu characters
-                if urdu_chars > 100 and urdu_percentage > 60:
-                    self.stories.append({
-                        'story_id': story_id,
-                        'story_title': story_title,
-                        'story_text': story_text,
-                        'url': url
-                    })
-                    self.scraped_urls.add(url)
-                    print(f"    ✓ '{story_title[:40]}...' ({len(story_text)} chars)")
-                    return True
-                else:
-                    print(f"    ✗ Not enough Urdu content ({urdu_percentage:.1f}% Urdu)")
-                    return False
-            else:
-                print(f"    ✗ No content found")
-                return False
+            return self.accept_story(story_id, story_title, story_text, url)
                 
         except Exception as e:
             print(f"    ✗ Error: {str(e)[:50]}")
             return False
     
+    def accept_story(self, story_id, story_title, story_text, url):
+        """Clean and validate extracted text, and store the story if it is Urdu"""
+        if story_text and len(story_text) > 100:
+            # Clean the text
+            story_text = self.clean_text(story_text)
+            
+            # Validate it's Urdu content
+            urdu_chars = cleaning.urdu_char_count(story_text)
+            total_chars = len(story_text)
+            urdu_percentage = (urdu_chars / total_chars * 100) if total_chars > 0 else 0
+            
+            # Must be at least 60% Urdu characters
+            if urdu_chars > 100 and urdu_percentage > 60:
+                self.store.append({
+                    'story_id': story_id,
+                    'story_title': story_title,
+                    'story_text': story_text,
+                    'url': url
+                })
+                self.story_count += 1
+                self.last_story_number = max(self.last_story_number, story_number(story_id))
+                self.scraped_urls.add(url)
+                print(f"    ✓ '{story_title[:40]}...' ({len(story_text)} chars)")
+                return True
+            else:
+                print(f"    ✗ Not enough Urdu content ({urdu_percentage:.1f}% Urdu)")
+                return False
+        else:
+            print(f"    ✗ No content found")
+            return False
+    
     def clean_text(self, text):
         """Clean extracted text - Remove ads and navigation while preserving story"""
-        # Remove URLs
-        text = re.sub(r'http\S+|www\.\S+', '', text)
-        # Remove email addresses
-        text = re.sub(r'\S+@\S+', '', text)
-        
-        # Remove common English ad/navigation text
-        junk_patterns = [
-            r'error occurred.*?later',
-            r'Please.*?again.*?later',
-            r'Advertisement',
-            r'Learn more',
-            r'Click here',
-            r'Read more',
-            r'Share',
-            r'Facebook',
-            r'Twitter',
-            r'WhatsApp',
-            r'Subscribe',
-            r'Follow us',
-            r'Sign up',
-            r'Login',
-            r'Register',
-            r'More Stories',
-            r'Related Stories',
-            r'Recommended',
-        ]
-        
-        for pattern in junk_patterns:
-            text = re.sub(pattern, '', text, flags=re.IGNORECASE)
-        
-        # Remove Rekhta-specific navigation elements
-        rekhta_junk = [
-            r'Rekhta Dictionary',
-            r'Audio/Video',
-            r'Play Audio',
-            r'Download',
-            r'Meaning in English',
-        ]
-        
-        for pattern in rekhta_junk:
-            text = re.sub(pattern, '', text, flags=re.IGNORECASE)
-        
-        # Remove standalone English words (1-20 chars) but keep Urdu
-        text = re.sub(r'\b[a-zA-Z]{1,20}\b', '', text)
-        
-        # Clean up excessive whitespace
-        text = re.sub(r' +', ' ', text)  # Multiple spaces to single
-        text = re.sub(r'\n\n\n+', '\n\n', text)  # Max 2 newlines
-        
-        # Remove very short lines (likely navigation/ads)
-        lines = []
-        for line in text.split('\n'):
-            line = line.strip()
-            # Keep lines that have substantial content (more than 10 chars)
-            # OR lines that are entirely in Urdu (even if short, like dialogue)
-            urdu_chars = sum(1 for c in line if '\u0600' <= c <= '\u06FF')
-            if len(line) > 10 or (urdu_chars > 3 and urdu_chars == len(line.replace(' ', '').replace('۔', '').replace('؟', '').replace('!', '').replace('"', '').replace('،', ''))):
-                lines.append(line)
-        
-        text = '\n'.join(lines)
-        
-        # Remove common duplicate phrases
-        paragraphs = text.split('\n\n')
-        seen = set()
-        unique_paragraphs = []
-        for para in paragraphs:
-            # Use first 50 chars as key to detect duplicates
-            key = para[:50] if len(para) > 50 else para
-            if key not in seen:
-                seen.add(key)
-                unique_paragraphs.append(para)
-        
-        text = '\n\n'.join(unique_paragraphs)
-        
-        return text.strip()
+        return cleaning.rekhta.clean(text)
     
     def validate_urdu_text(self, text):
         """Validate that text is primarily Urdu"""
-        if not text or len(text) < 100:
-            return False
-        
-        urdu_chars = sum(1 for c in text if '\u0600' <= c <= '\u06FF')
-        total_chars = len(text.replace(' ', '').replace('\n', ''))
-        
-        if total_chars == 0:
-            return False
-        
-        urdu_percentage = (urdu_chars / total_chars) * 100
-        return urdu_percentage > 60  # At least 60% Urdu
+        return cleaning.validate_urdu_text(text)
     
     def save_to_csv(self, filename="rekhta_stories.csv"):
-        """Save stories to CSV with story_id, story_title, story_text, and url columns"""
-        if not self.stories:
+        """Export the story store to CSV (story_id, story_title, story_text, url), plus JSON and TXT copies"""
+        if self.story_count == 0:
             print("\n✗ No stories to save!")
             return
         
         filepath = self.output_dir / filename
-        print(f"\nSaving {len(self.stories)} stories to {filepath}...")
-        
-        # Save CSV with UTF-8 BOM for better Excel compatibility
-        with open(filepath, 'w', encoding='utf-8-sig', newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=['story_id', 'story_title', 'story_text', 'url'])
-            writer.writeheader()
-            
-            for story in self.stories:
-                writer.writerow({
-                    'story_id': story['story_id'],
-                    'story_title': story['story_title'],
-                    'story_text': story['story_text'],
-                    'url': story.get('url', '')
-                })
-        
+        print(f"\nExporting {self.story_count} stories to {filepath}...")
+        self.store.export(filepath)
         print(f"✓ CSV saved with UTF-8 encoding (4 columns: story_id, story_title, story_text, url)")
-        
-        # JSON backup (UTF-8)
-        json_file = filepath.with_suffix('.json')
-        with open(json_file, 'w', encoding='utf-8') as f:
-            json.dump(self.stories, f, ensure_ascii=False, indent=2)
-        print(f"✓ JSON backup saved")
-        
-        # Also save a plain text file for verification
-        txt_file = self.output_dir / "rekhta_stories.txt"
-        with open(txt_file, 'w', encoding='utf-8') as f:
-            for story in self.stories:
-                f.write(f"{'='*60}\n")
-                f.write(f"Story ID: {story['story_id']}\n")
-                f.write(f"Title: {story['story_title']}\n")
-                f.write(f"{'='*60}\n")
-                f.write(f"{story['story_text']}\n\n")
-        print(f"✓ Text file saved for verification")
+        print(f"✓ JSON backup and text file saved for verification")
     
     def print_statistics(self):
         """Print statistics with Urdu content analysis"""
-        if not self.stories:
+        if self.story_count == 0:
             return
         
-        total_chars = sum(len(s['story_text']) for s in self.stories)
-        avg_length = total_chars // len(self.stories)
-        
-        # Calculate Urdu content statistics
-        total_urdu_chars = sum(
-            sum(1 for c in s['story_text'] if '\u0600' <= c <= '\u06FF')
-            for s in self.stories
-        )
+        total_chars = 0
+        total_urdu_chars = 0
+        for story in self.store:
+            total_chars += len(story['story_text'])
+            # Calculate Urdu content statistics
+            total_urdu_chars += cleaning.urdu_char_count(story['story_text'])
+        avg_length = total_chars // self.story_count
         avg_urdu_percentage = (total_urdu_chars / total_chars * 100) if total_chars > 0 else 0
         
         print("\n" + "="*60)
         print("SCRAPING STATISTICS")
         print("="*60)
-        print(f"Total stories scraped: {len(self.stories)}")
+        print(f"Total stories scraped: {self.story_count}")
         print(f"Total characters: {total_chars:,}")
         print(f"Average story length: {avg_length} characters")
         print(f"Total Urdu characters: {total_urdu_chars:,}")
@@ -608,19 +543,19 @@ class RekhtaSeleniumScraper:
         print("REKHTA SELENIUM SCRAPER")
         print("="*60)
         print(f"Target: {max_stories} stories")
-        print(f"Already scraped: {len(self.stories)} stories")
-        print(f"Remaining: {max(0, max_stories - len(self.stories))} stories")
+        print(f"Already scraped: {self.story_count} stories")
+        print(f"Remaining: {max(0, max_stories - self.story_count)} stories")
         print(f"Starting from page: {self.last_page}")
         print(f"Mode: {'Headless' if headless else 'Browser visible'}")
-        print(f"Auto-save: Every 20 stories")
+        print(f"Storage: {self.store.path} (appended per story)")
         print("="*60)
         
         # If we already have enough stories, don't scrape
-        if len(self.stories) >= max_stories:
-            print(f"\n✓ Already have {len(self.stories)} stories (target: {max_stories})")
+        if self.story_count >= max_stories:
+            print(f"\n✓ Already have {self.story_count} stories (target: {max_stories})")
             print("No additional scraping needed.")
             self.print_statistics()
-            return len(self.stories)
+            return self.story_count
         
         # Setup driver
         if not self.setup_driver(headless=headless):
@@ -633,9 +568,9 @@ class RekhtaSeleniumScraper:
                 return 0
             
             # Start from where we left off
-            story_counter = len(self.stories)
+            story_counter = self.story_count
             page_num = self.last_page
-            max_pages = 26  # 26 letters of alphabet
+            max_pages = self.max_pages
             
             while story_counter < max_stories and page_num <= max_pages:
                 print(f"\n--- Page {page_num} ---")
@@ -665,7 +600,7 @@ class RekhtaSeleniumScraper:
                         # Unpack tuple: (url, author_name)
                         link, author_name = link_tuple
                         
-                        story_id = f"RK_{story_counter + 1:04d}"
+                        story_id = f"{self.story_prefix}_{self.last_story_number + 1:04d}"
                         success = self.scrape_story(link, story_id, author_name)
                         
                         if success:
@@ -673,13 +608,11 @@ class RekhtaSeleniumScraper:
                             if story_counter % 10 == 0:
                                 print(f"\n  Progress: {story_counter}/{max_stories}")
                             
-                            # Save after every 20 stories
+                            # Stories are already in the store; record the page every 20 stories
                             if story_counter % 20 == 0:
-                                print(f"\n  💾 Auto-saving at {story_counter} stories...")
-                                self.save_to_csv()
                                 self.save_progress(page_num)
                     
-                    time.sleep(random.uniform(1, 2))  # Small delay between authors
+                    self.pause(1, 2)  # Small delay between authors
                 
                 # Save progress after completing each page
                 self.save_progress(page_num + 1)
@@ -687,13 +620,13 @@ class RekhtaSeleniumScraper:
                 page_num += 1
                 
                 if story_counter < max_stories:
-                    time.sleep(random.uniform(2, 4))
+                    self.pause(2, 4)
             
             print("\n" + "="*60)
             print("COMPLETE")
             print("="*60)
             
-            if len(self.stories) == 0:
+            if self.story_count == 0:
                 print("\n✗ Could not scrape any stories")
                 return 0
             
@@ -701,7 +634,7 @@ class RekhtaSeleniumScraper:
             self.save_progress(page_num)
             self.print_statistics()
             
-            return len(self.stories)
+            return self.story_count
             
         finally:
             # Always close the driver
@@ -711,9 +644,21 @@ class RekhtaSeleniumScraper:
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--max-stories", type=int, default=250)
+    parser.add_argument("--workers", type=int, default=1, help="browsers scraping concurrently")
+    parser.add_argument("--http", action="store_true",
+                        help="fetch pages over plain HTTP; a browser only opens pages that fail validation")
+    args = parser.parse_args()
+    
     scraper = RekhtaSeleniumScraper()
     
-    count = scraper.run(max_stories=250, headless=True)
+    if args.http:
+        count = fetch.crawl(scraper, max_stories=args.max_stories)
+    elif args.workers > 1:
+        count = crawl.crawl(scraper, max_stories=args.max_stories, workers=args.workers)
+    else:
+        count = scraper.run(max_stories=args.max_stories, headless=True)
     
     if count > 0:
         print(f"\nSuccessfully scraped {count} stories!")
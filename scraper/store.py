@@ -0,0 +1,147 @@
+# Append-only story store for the scrapers
+#
+# Each scraped story is one JSON line, written with a single O_APPEND write and
+# fsync'd before the scraper moves on, so a crash loses at most the story in flight.
+# A line torn by a kill mid-write is dropped when the store is next opened. The CSV,
+# JSON and TXT files are exports generated from the store on demand.
+
+import argparse
+import csv
+import json
+import os
+import threading
+from pathlib import Path
+
+from models.trigram_model import write_atomic
+
+FIELDS = ['story_id', 'story_title', 'story_text', 'url']
+
+
+def story_number(story_id):
+    # 42 for "UP_0042"; ids without a number count as 0
+    number = str(story_id).rsplit('_', 1)[-1]
+    return int(number) if number.isdigit() else 0
+
+
+def atomic_export(path, write):
+    # Readers of an export never see it half written, and it is on disk before it
+    # replaces the old one, like every line of the store
+    path = Path(path)
+    write_atomic(path, write, encoding='utf-8-sig' if path.suffix == '.csv' else 'utf-8', newline='')
+
+
+def story_line(story):
+    return (json.dumps({field: story.get(field, '') for field in FIELDS}, ensure_ascii=False) + '\n').encode('utf-8')
+
+
+class StoryStore:
+    def __init__(self, path):
+        self.path = Path(path)
+        self.lock = threading.Lock()
+        self.repair()
+
+    def repair(self):
+        # Truncate a torn last line so the next append starts on a line of its own
+        if not self.path.exists():
+            return
+        with open(self.path, 'rb+') as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            if size == 0:
+                return
+            f.seek(max(0, size - (1 << 20)))
+            tail = f.read()
+            if tail.endswith(b'\n'):
+                return
+            end = tail.rfind(b'\n')
+            if end == -1 and size > len(tail):
+                raise ValueError(f"{self.path}: last line is longer than 1 MiB and unterminated")
+            f.truncate(size - len(tail) + end + 1)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def append(self, story):
+        line = story_line(story)
+        with self.lock:
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                view = memoryview(line)
+                while view:
+                    view = view[os.write(fd, view):]
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+    def __iter__(self):
+        # Streams stories one line at a time
+        if not self.path.exists():
+            return
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                if line.endswith('\n'):
+                    yield json.loads(line)
+
+    def import_csv(self, csv_path):
+        # One-time migration from a CSV written by the old save_to_csv. The store only
+        # appears once every row is on disk: a partial store would count as migrated,
+        # and the next export would overwrite the CSV with the truncated set.
+        tmp = self.path.with_name(self.path.name + '.tmp')
+        with open(csv_path, 'r', encoding='utf-8-sig', newline='') as f, open(tmp, 'wb') as out:
+            for row in csv.DictReader(f):
+                out.write(story_line(row))
+            out.flush()
+            os.fsync(out.fileno())
+        os.replace(tmp, self.path)
+
+    def export_csv(self, path):
+        def write(f):
+            writer = csv.DictWriter(f, fieldnames=FIELDS)
+            writer.writeheader()
+            writer.writerows(self)
+        atomic_export(path, write)
+
+    def export_json(self, path):
+        # Same layout as json.dump(stories, f, ensure_ascii=False, indent=2), one story at a time
+        def write(f):
+            count = 0
+            f.write('[')
+            for story in self:
+                item = json.dumps(story, ensure_ascii=False, indent=2).replace('\n', '\n  ')
+                f.write((',\n  ' if count else '\n  ') + item)
+                count += 1
+            f.write('\n]' if count else ']')
+        atomic_export(path, write)
+
+    def export_txt(self, path):
+        def write(f):
+            for story in self:
+                f.write(f"{'='*60}\n")
+                f.write(f"Story ID: {story['story_id']}\n")
+                f.write(f"Title: {story['story_title']}\n")
+                f.write(f"{'='*60}\n")
+                f.write(f"{story['story_text']}\n\n")
+        atomic_export(path, write)
+
+    def export(self, csv_path):
+        # CSV, plus JSON and TXT copies next to it
+        csv_path = Path(csv_path)
+        self.export_csv(csv_path)
+        self.export_json(csv_path.with_suffix('.json'))
+        self.export_txt(csv_path.with_suffix('.txt'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export a scraper's story store to CSV, JSON and TXT")
+    parser.add_argument("store", help="e.g. raw_stories/urdupoint_stories.jsonl")
+    parser.add_argument("--csv", help="CSV path; .json and .txt copies are written next to it "
+                                      "(default: the store path with a .csv suffix)")
+    args = parser.parse_args()
+
+    store = StoryStore(args.store)
+    csv_path = Path(args.csv or Path(args.store).with_suffix('.csv'))
+    store.export(csv_path)
+    print(f"✓ Exported {sum(1 for _ in store)} stories to {csv_path} (+ .json, .txt)")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,22 +6,36 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
+import argparse
 import time
-import csv
 import json
 from pathlib import Path
 import random
 import re
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup
+
+from scraper import cleaning, crawl, fetch
+from scraper.store import StoryStore, story_number
 
 
 class UrduPointSeleniumScraper:
+    story_prefix = "UP"
+    max_pages = 30
+    
     def __init__(self, output_dir="raw_stories"):
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(exist_ok=True)
-        self.stories = []
+        # Every scraped story is appended and fsync'd here; CSV/JSON/TXT are exports
+        self.store = StoryStore(self.output_dir / "urdupoint_stories.jsonl")
+        self.story_count = 0
+        self.last_story_number = 0  # highest stored id number; new ids continue after it
         self.scraped_urls = set()
         self.base_url = "https://www.urdupoint.com"
         self.driver = None
+        self.politeness = None  # per-host budget, set by scraper.crawl for concurrent runs
+        self.render_wait = 1.0  # scales the waits for pages to render and lazy-load
         self.last_page = 1
         
         # Load existing stories if any
@@ -29,33 +43,27 @@ class UrduPointSeleniumScraper:
         self.load_progress()
     
     def load_existing_stories(self):
-        #Load previously scraped stories from CSV to continue from where we left off
+        """Resume from the story store, streaming it to count stories and collect scraped URLs"""
         csv_file = self.output_dir / "urdupoint_stories.csv"
         
-        if not csv_file.exists():
+        # Stores are created on first run; older runs only left a CSV behind
+        if not self.store.path.exists() and csv_file.exists():
+            print(f"Importing existing stories from {csv_file}...")
+            self.store.import_csv(csv_file)
+        
+        for story in self.store:
+            self.story_count += 1
+            self.last_story_number = max(self.last_story_number, story_number(story.get('story_id', '')))
+            # Track URL to avoid re-scraping
+            if story.get('url'):
+                self.scraped_urls.add(story['url'])
+        
+        if self.story_count == 0:
             print("No existing stories found. Starting fresh.")
             return
         
-        try:
-            with open(csv_file, 'r', encoding='utf-8-sig') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    self.stories.append({
-                        'story_id': row['story_id'],
-                        'story_title': row['story_title'],
-                        'story_text': row['story_text'],
-                        'url': row.get('url', '')  
-                    })
-                    # Track URL to avoid re-scraping
-                    if row.get('url'):
-                        self.scraped_urls.add(row['url'])
-            
-            print(f"  Loaded {len(self.stories)} existing stories")
-            print(f"  Will continue from story #{len(self.stories) + 1}")
-            
-        except Exception as e:
-            print(f" Error loading existing stories: {e}")
-            print("  Starting fresh...")
+        print(f"  Loaded {self.story_count} existing stories")
+        print(f"  Will continue from story #{self.last_story_number + 1}")
     
     def load_progress(self):
         # Load the last page number from progress file
@@ -79,7 +87,7 @@ class UrduPointSeleniumScraper:
         try:
             progress = {
                 'last_page': page_num,
-                'total_stories': len(self.stories),
+                'total_stories': self.story_count,
                 'last_updated': time.strftime('%Y-%m-%d %H:%M:%S')
             }
             
@@ -122,13 +130,28 @@ class UrduPointSeleniumScraper:
             print("3. ChromeDriver in PATH or same folder")
             return False
     
+    def open_page(self, url):
+        # Load a page, waiting for the host's politeness budget in concurrent runs
+        if self.politeness:
+            self.politeness.wait(url)
+        self.driver.get(url)
+    
+    def pause(self, low, high):
+        # Fixed delay between requests in sequential runs; concurrent runs use the budget in open_page
+        if self.politeness is None:
+            time.sleep(random.uniform(low, high))
+    
+    def settle(self, seconds):
+        # Give scripts and lazy-loaded content time to render
+        time.sleep(seconds * self.render_wait)
+    
     def test_connection(self):
         # Test if we can access the website
         print("\nTesting connection to UrduPoint...")
         
         try:
-            self.driver.get(f"{self.base_url}/kids/")
-            time.sleep(3)
+            self.open_page(f"{self.base_url}/kids/")
+            self.settle(3)
             
             # Check if page loaded
             if "urdupoint" in self.driver.current_url.lower():
@@ -142,42 +165,28 @@ class UrduPointSeleniumScraper:
             print(f" Connection failed: {e}")
             return False
     
+    def listing_url(self, page_num):
+        # URL of a moral stories listing page - URDU VERSION
+        if page_num == 1:
+            return f"{self.base_url}/kids/category/moral-stories.html?lang=ur"
+        return f"{self.base_url}/kids/category/moral-stories-page{page_num}.html?lang=ur"
+    
     def get_story_links_from_listing(self, page_num=1):
         # Get story links from listing page - URDU VERSION
-        
-        if page_num == 1:
-            url = f"{self.base_url}/kids/category/moral-stories.html?lang=ur"
-        else:
-            url = f"{self.base_url}/kids/category/moral-stories-page{page_num}.html?lang=ur"
+        url = self.listing_url(page_num)
         
         print(f"\nFetching listing page {page_num} (Urdu)...")
         
         try:
-            self.driver.get(url)
-            time.sleep(random.uniform(3, 5))
+            self.open_page(url)
+            self.pause(3, 5)
             
             # Scroll to load all content
             self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(2)
+            self.settle(2)
             
             # Find all story links
-            story_links = []
-            links = self.driver.find_elements(By.TAG_NAME, "a")
-            
-            for link in links:
-                try:
-                    href = link.get_attribute("href")
-                    if href and '/kids/detail/moral-stories/' in href and href.endswith('.html'):
-                        # Ensure Urdu language parameter
-                        if '?lang=ur' not in href:
-                            href += '?lang=ur'
-                        if href not in self.scraped_urls:
-                            story_links.append(href)
-                except:
-                    continue
-            
-            # Remove duplicates
-            story_links = list(dict.fromkeys(story_links))
+            story_links = self.parse_story_links(self.driver.page_source, url)
             print(f"   Found {len(story_links)} story links")
             
             return story_links
@@ -186,6 +195,24 @@ class UrduPointSeleniumScraper:
             print(f"   Error: {e}")
             return []
     
+    def parse_story_links(self, page_source, page_url):
+        # Story URLs on a listing page that have not been scraped yet
+        soup = BeautifulSoup(page_source, 'html.parser')
+        
+        story_links = []
+        for link in soup.find_all('a', href=True):
+            # Absolute, as the browser reports them
+            href = urljoin(page_url, link['href'])
+            if '/kids/detail/moral-stories/' in href and href.endswith('.html'):
+                # Ensure Urdu language parameter
+                if '?lang=ur' not in href:
+                    href += '?lang=ur'
+                if href not in self.scraped_urls:
+                    story_links.append(href)
+        
+        # Remove duplicates
+        return list(dict.fromkeys(story_links))
+    
     def extract_story_title(self):
         # Extract story title from page
         
@@ -217,6 +244,23 @@ class UrduPointSeleniumScraper:
         except Exception as e:
             return "Untitled"
     
+    def parse_story_title(self, page_source):
+        # Story title from the page HTML, for pages fetched without a browser
+        soup = BeautifulSoup(page_source, 'html.parser')
+        
+        for selector in ("h1", ".title", ".story-title", ".heading"):
+            element = soup.select_one(selector)
+            title = element.get_text(strip=True) if element else ""
+            if title and len(title) > 3:
+                # Remove date and author info from title
+                title = re.sub(r'تحریر نمبر.*', '', title)
+                title = re.sub(r'\d{1,2}\s+[^\s]+\s+\d{4}', '', title)
+                title = title.strip()
+                if title:
+                    return title
+        
+        return "Untitled"
+    
 
     
     def extract_story_content(self):
@@ -228,64 +272,7 @@ class UrduPointSeleniumScraper:
             )
             
             # Get the entire page source
-            page_source = self.driver.page_source
-            
-            # Parse with BeautifulSoup for better HTML handling
-            from bs4 import BeautifulSoup
-            soup = BeautifulSoup(page_source, 'html.parser')
-            
-            # Find all divs with class containing 'clear' and 'mt'
-            story_divs = []
-            for div in soup.find_all('div'):
-                div_class = div.get('class', [])
-                div_class_str = ' '.join(div_class) if isinstance(div_class, list) else str(div_class)
-                
-                # Check if it's a story content div
-                if 'clear' in div_class_str and 'mt' in div_class_str:
-                    story_divs.append(div)
-            
-            if story_divs:
-                # Extract text from all story divs
-                story_parts = []
-                for div in story_divs:
-                    # Get text with line breaks preserved
-                    text = div.get_text(separator='\n', strip=False)
-                    
-                    # Check if it has Urdu content
-                    urdu_chars = sum(1 for c in text if '\u0600' <= c <= '\u06FF')
-                    if urdu_chars > 20:  # Has some Urdu content
-                        story_parts.append(text.strip())
-                
-                if story_parts:
-                    # Join all parts
-                    full_text = '\n'.join(story_parts)
-                    
-                    # Minimal cleaning - only remove excessive whitespace
-                    lines = []
-                    for line in full_text.split('\n'):
-                        line = line.strip()
-                        if line:  # Keep all non-empty lines
-                            lines.append(line)
-                    
-                    full_text = '\n'.join(lines)
-                    
-                    # Verify Urdu content
-                    urdu_chars = sum(1 for c in full_text if '\u0600' <= c <= '\u06FF')
-                    if urdu_chars > 200:
-                        return full_text
-            
-            # Fallback: Try to find main content area
-            content_divs = soup.find_all('div', class_=lambda x: x and ('content' in str(x).lower() or 'story' in str(x).lower() or 'detail' in str(x).lower()))
-            
-            for div in content_divs:
-                text = div.get_text(separator='\n', strip=False)
-                urdu_chars = sum(1 for c in text if '\u0600' <= c <= '\u06FF')
-                
-                if urdu_chars > 300 and 1000 < len(text) < 20000:
-                    lines = [line.strip() for line in text.split('\n') if line.strip()]
-                    return '\n'.join(lines)
-            
-            return None
+            return self.parse_story_content(self.driver.page_source)
             
         except Exception as e:
             print(f"    Error extracting content: {e}")
@@ -293,6 +280,64 @@ class UrduPointSeleniumScraper:
             traceback.print_exc()
             return None
     
+    def parse_story_content(self, page_source):
+        # Story text from the clear_mt divs of a story page, or None if too little Urdu
+        # Parse with BeautifulSoup for better HTML handling
+        soup = BeautifulSoup(page_source, 'html.parser')
+        
+        # Find all divs with class containing 'clear' and 'mt'
+        story_divs = []
+        for div in soup.find_all('div'):
+            div_class = div.get('class', [])
+            div_class_str = ' '.join(div_class) if isinstance(div_class, list) else str(div_class)
+            
+            # Check if it's a story content div
+            if 'clear' in div_class_str and 'mt' in div_class_str:
+                story_divs.append(div)
+        
+        if story_divs:
+            # Extract text from all story divs
+            story_parts = []
+            for div in story_divs:
+                # Get text with line breaks preserved
+                text = div.get_text(separator='\n', strip=False)
+                
+                # Check if it has Urdu content
+                urdu_chars = cleaning.urdu_char_count(text)
+                if urdu_chars > 20:  # Has some Urdu content
+                    story_parts.append(text.strip())
+            
+            if story_parts:
+                # Join all parts
+                full_text = '\n'.join(story_parts)
+                
+                # Minimal cleaning - only remove excessive whitespace
+                lines = []
+                for line in full_text.split('\n'):
+                    line = line.strip()
+                    if line:  # Keep all non-empty lines
+                        lines.append(line)
+                
+                full_text = '\n'.join(lines)
+                
+                # Verify Urdu content
+                urdu_chars = cleaning.urdu_char_count(full_text)
+                if urdu_chars > 200:
+                    return full_text
+        
+        # Fallback: Try to find main content area
+        content_divs = soup.find_all('div', class_=lambda x: x and ('content' in str(x).lower() or 'story' in str(x).lower() or 'detail' in str(x).lower()))
+        
+        for div in content_divs:
+            text = div.get_text(separator='\n', strip=False)
+            urdu_chars = cleaning.urdu_char_count(text)
+            
+            if urdu_chars > 300 and 1000 < len(text) < 20000:
+                lines = [line.strip() for line in text.split('\n') if line.strip()]
+                return '\n'.join(lines)
+        
+        return None
+    
     def scrape_story(self, url, story_id):
         """Scrape a single story with title - URDU ONLY"""
         if url in self.scraped_urls:
@@ -305,12 +350,12 @@ class UrduPointSeleniumScraper:
             if '?lang=ur' not in url:
                 url += '?lang=ur'
             
-            self.driver.get(url)
-            time.sleep(random.uniform(2, 4))
+            self.open_page(url)
+            self.pause(2, 4)
             
             # Scroll to ensure content loads
             self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight/2);")
-            time.sleep(1)
+            self.settle(1)
             
             # Extract title
             story_title = self.extract_story_title()
@@ -318,189 +363,81 @@ class UrduPointSeleniumScraper:
             # Extract content
             story_text = self.extract_story_content()
             
-            if story_text and len(story_text) > 100:
-                # Clean the text (no author removal)
-                story_text = self.clean_text(story_text)
-                
-                # Validate it's Urdu content
-                urdu_chars = sum(1 for c in story_text if '\u0600' <= c <= '\u06FF')
-                total_chars = len(story_text)
-                urdu_percentage = (urdu_chars / total_chars * 100) if total_chars > 0 else 0
-                
-                # Must be at least 60% Urdu characters
-                if urdu_chars > 100 and urdu_percentage > 60:
-                    self.stories.append({
-                        'story_id': story_id,
-                        'story_title': story_title,
-                        'story_text': story_text,
-                        'url': url
-                    })
-                    self.scraped_urls.add(url)
-                    print(f"    ✓ '{story_title[:30]}...' ({len(story_text)} chars)")
-                    return True
-                else:
-                    print(f"    ✗ Not enough Urdu content ({urdu_percentage:.1f}% Urdu)")
-                    return False
-            else:
-                print(f"    ✗ No content found")
-                return False
+            return self.accept_story(story_id, story_title, story_text, url)
                 
         except Exception as e:
             print(f"    ✗ Error: {str(e)[:50]}")
             return False
     
+    def accept_story(self, story_id, story_title, story_text, url):
+        # Clean and validate extracted text, and store the story if it is Urdu
+        if story_text and len(story_text) > 100:
+            # Clean the text (no author removal)
+            story_text = self.clean_text(story_text)
+            
+            # Validate it's Urdu content
+            urdu_chars = cleaning.urdu_char_count(story_text)
+            total_chars = len(story_text)
+            urdu_percentage = (urdu_chars / total_chars * 100) if total_chars > 0 else 0
+            
+            # Must be at least 60% Urdu characters
+            if urdu_chars > 100 and urdu_percentage > 60:
+                self.store.append({
+                    'story_id': story_id,
+                    'story_title': story_title,
+                    'story_text': story_text,
+                    'url': url
+                })
+                self.story_count += 1
+                self.last_story_number = max(self.last_story_number, story_number(story_id))
+                self.scraped_urls.add(url)
+                print(f"    ✓ '{story_title[:30]}...' ({len(story_text)} chars)")
+                return True
+            else:
+                print(f"    ✗ Not enough Urdu content ({urdu_percentage:.1f}% Urdu)")
+                return False
+        else:
+            print(f"    ✗ No content found")
+            return False
+    
     def clean_text(self, text):
         """Clean extracted text - Remove ads and navigation while preserving story"""
-        # Remove URLs
-        text = re.sub(r'http\S+|www\.\S+', '', text)
-        # Remove email addresses
-        text = re.sub(r'\S+@\S+', '', text)
-        
-        # Remove common English ad/navigation text
-        junk_patterns = [
-            r'error occurred.*?later',
-            r'Please.*?again.*?later',
-            r'Advertisement',
-            r'Learn more',
-            r'unmute',
-            r'mute',
-            r'Click here',
-            r'Read more',
-            r'Share',
-            r'Facebook',
-            r'Twitter',
-            r'WhatsApp',
-            r'Subscribe',
-            r'Follow us',
-            r'Sign up',
-            r'Login',
-            r'Register',
-        ]
-        
-        for pattern in junk_patterns:
-            text = re.sub(pattern, '', text, flags=re.IGNORECASE)
-        
-        # Remove Urdu continuation markers and metadata
-        urdu_junk_patterns = [
-            r'جاری ہے',  # "to be continued"
-            r'تحریر نمبر\s*\d+',  # Story number
-            r'\d{1,2}\s+(جنوری|فروری|مارچ|اپریل|مئی|جون|جولائی|اگست|ستمبر|اکتوبر|نومبر|دسمبر)\s+\d{4}',  # Dates
-            r'جمعرات|پیر|منگل|بدھ|جمعہ|ہفتہ|اتوار',  # Days of week
-        ]
-        
-        for pattern in urdu_junk_patterns:
-            text = re.sub(pattern, '', text)
-        
-        # Remove standalone English words (1-20 chars) but keep Urdu
-        # This removes words like "error", "later", etc.
-        text = re.sub(r'\b[a-zA-Z]{1,20}\b', '', text)
-        
-        # Clean up excessive whitespace
-        text = re.sub(r' +', ' ', text)  # Multiple spaces to single
-        text = re.sub(r'\n\n\n+', '\n\n', text)  # Max 2 newlines
-        
-        # Remove very short lines (likely navigation/ads)
-        lines = []
-        for line in text.split('\n'):
-            line = line.strip()
-            # Keep lines that have substantial content (more than 10 chars)
-            # OR lines that are entirely in Urdu (even if short, like dialogue)
-            urdu_chars = sum(1 for c in line if '\u0600' <= c <= '\u06FF')
-            if len(line) > 10 or (urdu_chars > 3 and urdu_chars == len(line.replace(' ', '').replace('۔', '').replace('؟', '').replace('!', '').replace('"', '').replace('،', ''))):
-                lines.append(line)
-        
-        text = '\n'.join(lines)
-        
-        # Remove common duplicate phrases (sometimes pages repeat content)
-        # Split by double newline and remove duplicates while preserving order
-        paragraphs = text.split('\n\n')
-        seen = set()
-        unique_paragraphs = []
-        for para in paragraphs:
-            # Use first 50 chars as key to detect duplicates
-            key = para[:50] if len(para) > 50 else para
-            if key not in seen:
-                seen.add(key)
-                unique_paragraphs.append(para)
-        
-        text = '\n\n'.join(unique_paragraphs)
-        
-        return text.strip()
+        return cleaning.urdupoint.clean(text)
     
     def validate_urdu_text(self, text):
         """Validate that text is primarily Urdu"""
-        if not text or len(text) < 100:
-            return False
-        
-        urdu_chars = sum(1 for c in text if '\u0600' <= c <= '\u06FF')
-        total_chars = len(text.replace(' ', '').replace('\n', ''))
-        
-        if total_chars == 0:
-            return False
-        
-        urdu_percentage = (urdu_chars / total_chars) * 100
-        return urdu_percentage > 60  # At least 60% Urdu
+        return cleaning.validate_urdu_text(text)
     
     def save_to_csv(self, filename="urdupoint_stories.csv"):
-        """Save stories to CSV with story_id, story_title, story_text, and url columns"""
-        if not self.stories:
+        """Export the story store to CSV (story_id, story_title, story_text, url), plus JSON and TXT copies"""
+        if self.story_count == 0:
             print("\n✗ No stories to save!")
             return
         
         filepath = self.output_dir / filename
-        print(f"\nSaving {len(self.stories)} stories to {filepath}...")
-        
-        # Save CSV with UTF-8 BOM for better Excel compatibility
-        with open(filepath, 'w', encoding='utf-8-sig', newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=['story_id', 'story_title', 'story_text', 'url'])
-            writer.writeheader()
-            
-            for story in self.stories:
-                writer.writerow({
-                    'story_id': story['story_id'],
-                    'story_title': story['story_title'],
-                    'story_text': story['story_text'],
-                    'url': story.get('url', '')
-                })
-        
+        print(f"\nExporting {self.story_count} stories to {filepath}...")
+        self.store.export(filepath)
         print(f"✓ CSV saved with UTF-8 encoding (4 columns: story_id, story_title, story_text, url)")
-        
-        # JSON backup (UTF-8)
-        json_file = filepath.with_suffix('.json')
-        with open(json_file, 'w', encoding='utf-8') as f:
-            json.dump(self.stories, f, ensure_ascii=False, indent=2)
-        print(f"✓ JSON backup saved")
-        
-        # Also save a plain text file for verification
-        txt_file = self.output_dir / "urdupoint_stories.txt"
-        with open(txt_file, 'w', encoding='utf-8') as f:
-            for story in self.stories:
-                f.write(f"{'='*60}\n")
-                f.write(f"Story ID: {story['story_id']}\n")
-                f.write(f"Title: {story['story_title']}\n")
-                f.write(f"{'='*60}\n")
-                f.write(f"{story['story_text']}\n\n")
-        print(f"✓ Text file saved for verification")
+        print(f"✓ JSON backup and text file saved for verification")
     
     def print_statistics(self):
         """Print statistics with Urdu content analysis"""
-        if not self.stories:
+        if self.story_count == 0:
             return
         
-        total_chars = sum(len(s['story_text']) for s in self.stories)
-        avg_length = total_chars // len(self.stories)
-        
-        # Calculate Urdu content statistics
-        total_urdu_chars = sum(
-            sum(1 for c in s['story_text'] if '\u0600' <= c <= '\u06FF')
-            for s in self.stories
-        )
+        total_chars = 0
+        total_urdu_chars = 0
+        for story in self.store:
+            total_chars += len(story['story_text'])
+            # Calculate Urdu content statistics
+            total_urdu_chars += cleaning.urdu_char_count(story['story_text'])
+        avg_length = total_chars // self.story_count
         avg_urdu_percentage = (total_urdu_chars / total_chars * 100) if total_chars > 0 else 0
         
         print("\n" + "="*60)
         print("SCRAPING STATISTICS")
         print("="*60)
-        print(f"Total stories scraped: {len(self.stories)}")
+        print(f"Total stories scraped: {self.story_count}")
         print(f"Total characters: {total_chars:,}")
         print(f"Average story length: {avg_length} characters")
         print(f"Total Urdu characters: {total_urdu_chars:,}")
@@ -513,19 +450,19 @@ class UrduPointSeleniumScraper:
         print("URDUPOINT SELENIUM SCRAPER")
         print("="*60)
         print(f"Target: {max_stories} stories")
-        print(f"Already scraped: {len(self.stories)} stories")
-        print(f"Remaining: {max(0, max_stories - len(self.stories))} stories")
+        print(f"Already scraped: {self.story_count} stories")
+        print(f"Remaining: {max(0, max_stories - self.story_count)} stories")
         print(f"Starting from page: {self.last_page}")
         print(f"Mode: {'Headless' if headless else 'Browser visible'}")
-        print(f"Auto-save: Every 20 stories")
+        print(f"Storage: {self.store.path} (appended per story)")
         print("="*60)
         
         # If we already have enough stories, don't scrape
-        if len(self.stories) >= max_stories:
-            print(f"\n Already have {len(self.stories)} stories (target: {max_stories})")
+        if self.story_count >= max_stories:
+            print(f"\n Already have {self.story_count} stories (target: {max_stories})")
             print("No additional scraping needed.")
             self.print_statistics()
-            return len(self.stories)
+            return self.story_count
         
         # Setup driver
         if not self.setup_driver(headless=headless):
@@ -538,9 +475,9 @@ class UrduPointSeleniumScraper:
                 return 0
             
             # Start from where we left off
-            story_counter = len(self.stories)
+            story_counter = self.story_count
             page_num = self.last_page
-            max_pages = 30
+            max_pages = self.max_pages
             
             while story_counter < max_stories and page_num <= max_pages:
                 print(f"\n--- Page {page_num} ---")
@@ -555,7 +492,7 @@ class UrduPointSeleniumScraper:
                     if story_counter >= max_stories:
                         break
                     
-                    story_id = f"UP_{story_counter + 1:04d}"
+                    story_id = f"{self.story_prefix}_{self.last_story_number + 1:04d}"
                     success = self.scrape_story(link, story_id)
                     
                     if success:
@@ -563,10 +500,8 @@ class UrduPointSeleniumScraper:
                         if story_counter % 10 == 0:
                             print(f"\n  Progress: {story_counter}/{max_stories}")
                         
-                        # Save after every 20 stories
+                        # Stories are already in the store; record the page every 20 stories
                         if story_counter % 20 == 0:
-                            print(f"\n  💾 Auto-saving at {story_counter} stories...")
-                            self.save_to_csv()
                             self.save_progress(page_num)
                 
                 # Save progress after completing each page
@@ -575,13 +510,13 @@ class UrduPointSeleniumScraper:
                 page_num += 1
                 
                 if story_counter < max_stories:
-                    time.sleep(random.uniform(3, 5))
+                    self.pause(3, 5)
             
             print("\n" + "="*60)
             print("COMPLETE")
             print("="*60)
             
-            if len(self.stories) == 0:
+            if self.story_count == 0:
                 print("\n Could not scrape any stories")
                 return 0
             
@@ -589,7 +524,7 @@ class UrduPointSeleniumScraper:
             self.save_progress(page_num)
             self.print_statistics()
             
-            return len(self.stories)
+            return self.story_count
             
         finally:
             
@@ -599,9 +534,21 @@ class UrduPointSeleniumScraper:
 
 
 if(__name__ == "__main__"):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--max-stories", type=int, default=250)
+    parser.add_argument("--workers", type=int, default=1, help="browsers scraping concurrently")
+    parser.add_argument("--http", action="store_true",
+                        help="fetch pages over plain HTTP; a browser only opens pages that fail validation")
+    args = parser.parse_args()
+    
     scraper = UrduPointSeleniumScraper()
     
-    count = scraper.run(max_stories=250, headless=True)
+    if args.http:
+        count = fetch.crawl(scraper, max_stories=args.max_stories)
+    elif args.workers > 1:
+        count = crawl.crawl(scraper, max_stories=args.max_stories, workers=args.workers)
+    else:
+        count = scraper.run(max_stories=args.max_stories, headless=True)
     
     if(count > 0):
         print(f"\n Successfully scraped {count} stories!")
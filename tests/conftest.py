@@ -0,0 +1,82 @@
+import functools
+import http.server
+import threading
+import urllib.error
+import urllib.request
+from pathlib import Path
+from types import SimpleNamespace
+from urllib.parse import urlsplit
+
+import pytest
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+
+class FixtureDriver:
+    # Stands in for Chrome: loads pages over HTTP without running scripts. Where
+    # `rendered` holds a recorded copy of a page as the browser renders it, that is shown.
+    def __init__(self, rendered=None):
+        self.rendered = rendered
+
+    def get(self, url):
+        self.current_url = url
+        recorded = self.rendered / urlsplit(url).path.lstrip("/") if self.rendered else None
+        if recorded and recorded.is_file():
+            self.page_source = recorded.read_text(encoding="utf-8")
+            return
+        try:
+            with urllib.request.urlopen(url) as response:
+                self.page_source = response.read().decode("utf-8")
+        except urllib.error.HTTPError:
+            self.page_source = "<html><body>Not found</body></html>"
+
+    def find_element(self, by, value):
+        from bs4 import BeautifulSoup
+        from selenium.common.exceptions import NoSuchElementException
+        from selenium.webdriver.common.by import By
+
+        soup = BeautifulSoup(self.page_source, "html.parser")
+        element = soup.find(value) if by == By.TAG_NAME else soup.find(class_=value) if by == By.CLASS_NAME else soup.select_one(value)
+        if element is None:
+            raise NoSuchElementException(value)
+        return SimpleNamespace(text=element.get_text(strip=True))
+
+    def execute_script(self, script):
+        return None
+
+    def quit(self):
+        pass
+
+class QuietHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def serve():
+    # serve(site) starts a server over the recorded pages in fixtures/<site> and returns
+    # its base URL; query strings are ignored
+    servers = []
+
+    def start(site):
+        server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(QuietHandler, directory=FIXTURES / site))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_address[1]}"
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+@pytest.fixture
+def browser():
+    # browser(site) is a crawl setup callable giving each worker a FixtureDriver over
+    # fixtures/<site>/rendered; setup.calls counts the browsers started
+    def make(site):
+        def setup(worker):
+            setup.calls += 1
+            worker.driver = FixtureDriver(FIXTURES / site / "rendered")
+            return True
+        setup.calls = 0
+        return setup
+
+    return make
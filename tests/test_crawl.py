@@ -0,0 +1,83 @@
+import json
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("bs4")
+
+from scraper import crawl
+from scraper.rekhta_scraper import RekhtaSeleniumScraper
+from scraper.store import StoryStore
+from scraper.urdupoint_scraper import UrduPointSeleniumScraper
+
+@pytest.fixture
+def fixture_site(serve):
+    # Static copies of Rekhta listing, author and story pages
+    return serve("rekhta")
+
+def scraper_for(site, output_dir):
+    scraper = RekhtaSeleniumScraper(output_dir=output_dir)
+    scraper.base_url = site
+    scraper.render_wait = 0
+    return scraper
+
+def test_crawl_shares_frontier_and_dedupes_across_workers(fixture_site, browser, tmp_path):
+    scraper = scraper_for(fixture_site, tmp_path)
+    assert crawl.crawl(scraper, max_stories=10, workers=3, min_interval=0, setup=browser("rekhta")) == 4
+
+    stories = list(scraper.store)
+    # The story linked from both authors is scraped once; the id of the broken link is reused
+    assert sorted(s["story_id"] for s in stories) == ["RK_0001", "RK_0002", "RK_0003", "RK_0004"]
+    assert len({s["url"] for s in stories}) == 4
+    assert json.loads((tmp_path / "scraping_progress.json").read_text())["last_page"] == 27
+
+    # A resumed crawl finds nothing new
+    assert crawl.crawl(scraper_for(fixture_site, tmp_path), max_stories=10, workers=2, min_interval=0,
+                       setup=browser("rekhta")) == 4
+
+def test_crawl_stops_at_target_and_resumes_from_unfinished_page(fixture_site, browser, tmp_path):
+    # One worker, so the authors are always found through listing page 1
+    scraper = scraper_for(fixture_site, tmp_path)
+    assert crawl.crawl(scraper, max_stories=2, workers=1, min_interval=0, setup=browser("rekhta")) == 2
+    assert len(list(scraper.store)) == 2
+    assert json.loads((tmp_path / "scraping_progress.json").read_text())["last_page"] == 1
+
+def test_crawl_resumes_after_the_highest_stored_id(fixture_site, browser, tmp_path):
+    # A run where RK_0002 failed and no later story reused its id
+    store = StoryStore(tmp_path / "rekhta_stories.jsonl")
+    for number in (1, 3):
+        store.append({"story_id": f"RK_{number:04d}", "story_title": "t", "story_text": "کہانی", "url": f"https://x/{number}"})
+
+    scraper = scraper_for(fixture_site, tmp_path)
+    assert crawl.crawl(scraper, max_stories=10, workers=2, min_interval=0, setup=browser("rekhta")) == 6
+    assert sorted(s["story_id"] for s in scraper.store) == ["RK_0001", "RK_0003", "RK_0004", "RK_0005", "RK_0006", "RK_0007"]
+    assert scraper.last_story_number == 7
+
+def test_crawl_stops_queueing_listing_pages_after_an_empty_one(serve, browser, tmp_path, monkeypatch):
+    # The UrduPoint fixture has two listing pages; page 3 is a 404 with no story links
+    listed = []
+    get_links = UrduPointSeleniumScraper.get_story_links_from_listing
+    monkeypatch.setattr(UrduPointSeleniumScraper, "get_story_links_from_listing",
+                        lambda self, page_num: listed.append(page_num) or get_links(self, page_num))
+    scraper = UrduPointSeleniumScraper(output_dir=tmp_path)
+    scraper.base_url = serve("urdupoint")
+    scraper.render_wait = 0
+
+    assert crawl.crawl(scraper, max_stories=10, workers=2, min_interval=0, setup=browser("urdupoint")) == 4
+    assert sorted(listed) == [1, 2, 3]
+    # The empty page is where a later run looks for new stories, as in the sequential run
+    assert json.loads((tmp_path / "scraping_progress.json").read_text())["last_page"] == 3
+
+def test_host_budget_spaces_requests_to_a_host():
+    budget = crawl.HostBudget(min_interval=0.05, jitter=0)
+    start = time.monotonic()
+    threads = [threading.Thread(target=budget.wait, args=("https://www.rekhta.org/x",)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert time.monotonic() - start >= 0.15
+    other = time.monotonic()
+    budget.wait("https://www.urdupoint.com/y")
+    assert time.monotonic() - other < 0.05
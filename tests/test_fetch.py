@@ -0,0 +1,89 @@
+import json
+import threading
+
+import pytest
+
+pytest.importorskip("bs4")
+pytest.importorskip("httpx")
+
+from scraper import fetch
+from scraper.rekhta_scraper import RekhtaSeleniumScraper
+from scraper.store import StoryStore
+from scraper.urdupoint_scraper import UrduPointSeleniumScraper
+
+def site_scraper(cls, site, output_dir):
+    scraper = cls(output_dir=output_dir)
+    scraper.base_url = site
+    scraper.render_wait = 0
+    return scraper
+
+def last_page(output_dir):
+    return json.loads((output_dir / "scraping_progress.json").read_text())["last_page"]
+
+def test_fetch_scrapes_recorded_pages_without_a_browser(serve, browser, tmp_path):
+    site = serve("rekhta")
+    setup = browser("rekhta")
+    scraper = site_scraper(RekhtaSeleniumScraper, site, tmp_path)
+    assert fetch.crawl(scraper, max_stories=10, min_interval=0, setup=setup) == 4
+    assert setup.calls == 0
+
+    stories = list(scraper.store)
+    # The story linked from both authors is fetched once, under the first author
+    assert sorted(s["story_id"] for s in stories) == ["RK_0001", "RK_0002", "RK_0003", "RK_0004"]
+    assert {s["story_title"] for s in stories} == {"First Tale", "Second Tale", "Shared Tale Author Two", "Third Tale"}
+    assert last_page(tmp_path) == 27
+
+def test_fetch_stops_at_target(serve, browser, tmp_path):
+    scraper = site_scraper(RekhtaSeleniumScraper, serve("rekhta"), tmp_path)
+    assert fetch.crawl(scraper, max_stories=2, min_interval=0, setup=browser("rekhta")) == 2
+    assert len(list(scraper.store)) == 2
+    assert last_page(tmp_path) == 1
+
+def test_fetch_falls_back_to_browser_for_pages_that_fail_validation(serve, browser, tmp_path):
+    site = serve("urdupoint")
+    setup = browser("urdupoint")
+    scraper = site_scraper(UrduPointSeleniumScraper, site, tmp_path)
+    assert fetch.crawl(scraper, max_stories=10, min_interval=0, setup=setup) == 4
+    # Only the story whose text is rendered by a script needed the browser
+    assert setup.calls == 1
+
+    stories = {s["url"].split("/")[-1]: s for s in scraper.store}
+    assert sorted(stories) == [f"{slug}.html?lang=ur" for slug in
+                               ("clever-rabbit-1236", "greedy-dog-1237", "honest-woodcutter-1234", "thirsty-crow-1235")]
+    assert stories["clever-rabbit-1236.html?lang=ur"]["story_title"] == "چالاک خرگوش"
+    assert stories["clever-rabbit-1236.html?lang=ur"]["story_id"] == "UP_0004"
+    assert "خرگوش" in stories["clever-rabbit-1236.html?lang=ur"]["story_text"]
+    # Listing page 3 is not recorded, so a later run starts there
+    assert last_page(tmp_path) == 3
+
+def test_fetch_parses_and_stores_stories_off_the_event_loop(serve, browser, tmp_path, monkeypatch):
+    threads = set()
+    parse_story = fetch.parse_story
+
+    def parse_off_loop(*args):
+        threads.add(threading.current_thread())
+        return parse_story(*args)
+
+    monkeypatch.setattr(fetch, "parse_story", parse_off_loop)
+    scraper = site_scraper(RekhtaSeleniumScraper, serve("rekhta"), tmp_path)
+    accept_story = scraper.accept_story
+    scraper.accept_story = lambda *args: threads.add(threading.current_thread()) or accept_story(*args)
+    assert fetch.crawl(scraper, max_stories=10, min_interval=0, setup=browser("rekhta")) == 4
+    assert threads and threading.main_thread() not in threads
+
+@pytest.mark.parametrize("runner", ["fetch", "sequential"])
+def test_resumed_runs_number_stories_after_the_highest_stored_id(serve, browser, tmp_path, monkeypatch, runner):
+    # A run where RK_0002 failed and no later story reused its id
+    store = StoryStore(tmp_path / "rekhta_stories.jsonl")
+    for number in (1, 3):
+        store.append({"story_id": f"RK_{number:04d}", "story_title": "t", "story_text": "کہانی", "url": f"https://x/{number}"})
+
+    scraper = site_scraper(RekhtaSeleniumScraper, serve("rekhta"), tmp_path)
+    if runner == "fetch":
+        assert fetch.crawl(scraper, max_stories=10, min_interval=0, setup=browser("rekhta")) == 6
+    else:
+        monkeypatch.setattr(scraper, "setup_driver", lambda headless: browser("rekhta")(scraper))
+        monkeypatch.setattr(scraper, "test_connection", lambda: True)
+        monkeypatch.setattr(scraper, "pause", lambda low, high: None)
+        assert scraper.run(max_stories=10) == 6
+    assert sorted(s["story_id"] for s in scraper.store) == ["RK_0001", "RK_0003", "RK_0004", "RK_0005", "RK_0006", "RK_0007"]
@@ -11,4 +11,361 @@ def test_root():
 def test_health():
     response = client.get("/health")
     assert response.status_code == 200
-    assert response.json() == {"status": "ok"}
\ No newline at end of file
+    assert response.json() == {"status": "ok"}
+
+def test_generate():
+    response = client.post("/generate", json={"prefix": "ایک دفعہ کا ذکر ہے", "max_length": 20})
+    assert response.status_code == 200
+    assert response.json()["generated_story"]
+
+def test_generate_sampling_options():
+    response = client.post(
+        "/generate",
+        json={"prefix": "ایک دفعہ", "max_length": 20, "temperature": 0.8, "top_k": 5, "top_p": 0.9},
+    )
+    assert response.status_code == 200
+
+def test_generate_rejects_invalid_top_p():
+    response = client.post("/generate", json={"prefix": "ایک", "top_p": 1.5})
+    assert response.status_code == 422
+
+def test_repetition_guard_window_and_ngrams():
+    from app.model import RepetitionGuard
+
+    guard = RepetitionGuard(window=2, penalty=2.0, no_repeat_ngram_size=2)
+    for token in ["a", "b", "a"]:
+        guard.push(token)
+    assert guard.weight("a") == 0.5
+    assert guard.weight("c") == 1.0
+    # "a b" already occurred, so "b" cannot follow "a" again
+    assert guard.weight("b") == 0.0
+
+def test_generate_rejects_oversized_max_length():
+    response = client.post("/generate", json={"prefix": "ایک", "max_length": 10_000_000})
+    assert response.status_code == 422
+
+def test_generate_returns_partial_story_when_time_budget_runs_out():
+    from app.model import generate_story
+
+    story, truncated = generate_story("ایک دفعہ کا ذکر ہے", max_length=1000, time_budget=0)
+    assert truncated
+    assert story.startswith("ایک")
+
+def test_seed_context_starts_from_a_known_context():
+    from app.model import get_model, tokenize
+
+    model = get_model()
+    for prompt in ["", "hello", "ایک دفعہ کا ذکر ہے"]:
+        tokens = model.seed_context(tokenize(prompt))
+        assert (tokens[-2], tokens[-1]) in model.context_successors
+
+def test_metrics():
+    client.post("/generate", json={"prefix": "ایک دفعہ", "max_length": 20})
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert 'urdu_generate_stage_seconds_count{stage="sampling"}' in response.text
+    assert 'urdu_predict_next_branch_total{branch="context"}' in response.text
+    assert "urdu_generate_queue_depth 0" in response.text
+
+def test_profiling_is_admin_only_and_opt_in(monkeypatch, tmp_path):
+    import app.main
+    from app import profiling
+
+    monkeypatch.setattr(app.main, "ADMIN_TOKEN", "secret")
+    monkeypatch.setattr(profiling, "PROFILE_DIR", tmp_path)
+    assert client.post("/admin/profiling", json={"enabled": True}).status_code == 403
+
+    response = client.post("/admin/profiling", json={"enabled": True}, headers={"X-Admin-Token": "secret"})
+    assert response.status_code == 200
+    try:
+        body = {"prefix": "ایک دفعہ", "max_length": 20}
+        assert "profile" not in client.post("/generate", json=body).json()
+
+        profile = client.post("/generate?profile=1", json=body).json()["profile"]
+        assert "predict_next" in profile["functions"]
+        assert list(tmp_path.glob("*.prof"))
+    finally:
+        profiling.configure(False)
+
+def test_reload_swaps_to_a_published_model(monkeypatch, tmp_path):
+    import json
+    import app.main
+    from app import model as serving
+
+    counts = tmp_path / "counts.json"
+    counts.write_text(json.dumps({"ایک</w>|||دفعہ</w>|||کا</w>": 3, "دفعہ</w>|||کا</w>|||ذکر</w>": 2}))
+    version = serving.publish_model(counts, tmp_path / "registry")
+    assert (tmp_path / "registry" / f"trigram-{version}.pkl").exists()
+
+    monkeypatch.setattr(app.main, "ADMIN_TOKEN", "secret")
+    monkeypatch.setattr(serving, "MODEL_REGISTRY_DIR", tmp_path / "registry")
+    original = serving.get_model()
+    try:
+        response = client.post("/admin/reload", json={}, headers={"X-Admin-Token": "secret"})
+        assert response.json() == {"previous_version": original.version, "model_version": version}
+
+        body = {"prefix": "ایک دفعہ", "max_length": 5}
+        assert client.post("/generate", json=body).json()["model_version"] == version
+
+        missing = client.post("/admin/reload", json={"version": "0" * 12}, headers={"X-Admin-Token": "secret"})
+        assert missing.status_code == 404
+    finally:
+        serving.swap_model(original)
+    assert client.post("/generate", json=body).json()["model_version"] == original.version
+
+def test_named_models_are_served_from_an_lru_pool(monkeypatch, tmp_path):
+    import json
+    from app import model as serving
+
+    versions = {}
+    for name, words in [("urdupoint", "ایک</w>|||دفعہ</w>|||کا</w>"), ("rekhta", "دفعہ</w>|||کا</w>|||ذکر</w>")]:
+        counts = tmp_path / f"{name}.json"
+        counts.write_text(json.dumps({words: 1}))
+        versions[name] = serving.publish_model(counts, tmp_path / name)
+
+    pool = serving.ModelPool(budget_bytes=1, registry_dir=tmp_path)
+    monkeypatch.setattr(serving, "model_pool", pool)
+
+    body = {"prefix": "ایک دفعہ", "max_length": 5}
+    for name in ["urdupoint", "rekhta"]:
+        response = client.post("/generate", json={**body, "model": name})
+        assert response.json()["model_version"] == versions[name]
+    # A budget smaller than any model keeps only the most recently used one
+    assert list(pool.models) == ["rekhta"]
+
+    assert client.post("/generate", json={**body, "model": "missing"}).status_code == 404
+    assert client.post("/generate", json={**body, "model": "../x"}).status_code == 422
+
+def test_seeded_requests_are_coalesced_and_cached():
+    import threading
+    import time
+    from app import metrics
+    from app.coalescing import SingleFlight
+
+    body = {"prefix": "ایک دفعہ", "max_length": 30, "seed": 7}
+    first = client.post("/generate", json=body).json()
+    cached = metrics.coalesced_requests.get("cached")
+    assert client.post("/generate", json=body).json() == first
+    assert metrics.coalesced_requests.get("cached") == cached + 1
+
+    flight = SingleFlight(cache_size=0)
+    release = threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        release.wait(5)
+        return "story"
+
+    results = []
+    run = lambda: results.append(flight.do("key", slow))
+    waited = metrics.coalesced_requests.get("waited")
+    threads = [threading.Thread(target=run) for _ in range(5)]
+    threads[0].start()
+    while "key" not in flight.calls:
+        time.sleep(0.001)
+    for thread in threads[1:]:
+        thread.start()
+    while metrics.coalesced_requests.get("waited") < waited + 4:
+        time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert calls == [1]
+    assert results == ["story"] * 5
+
+def test_generate_returns_utf8_json_and_token_ids():
+    from app.responses import unpack_token_ids
+
+    body = {"prefix": "ایک دفعہ کا ذکر ہے", "max_length": 300, "seed": 3}
+    response = client.post("/generate", json=body, headers={"Accept-Encoding": "identity"})
+    assert response.headers["content-type"] == "application/json; charset=utf-8"
+    assert "ایک".encode() in response.content
+    story = response.json()["generated_story"]
+
+    compressed = client.post("/generate", json=body, headers={"Accept-Encoding": "gzip"})
+    if len(response.content) >= 1024:
+        assert compressed.headers["content-encoding"] == "gzip"
+    assert compressed.json()["generated_story"] == story
+
+    binary = client.post("/generate", json={**body, "response_format": "token_ids"})
+    assert binary.headers["content-type"] == "application/octet-stream"
+    assert binary.headers["x-model-version"] == response.json()["model_version"]
+    vocab = client.get("/vocab").json()["vocab"]
+    tokens = [vocab[i] for i in unpack_token_ids(binary.content)]
+    assert "".join(tokens).replace("</w>", "").startswith("ایک")
+
+def test_admission_control_rate_limits_and_bounds_the_queue(monkeypatch):
+    import asyncio
+    import pytest
+    from app import admission
+
+    monkeypatch.setattr(admission, "limiter", admission.RateLimiter(rate=1, burst=100))
+    body = {"prefix": "ایک دفعہ", "max_length": 50}
+    assert client.post("/generate", json=body).status_code == 200
+    limited = client.post("/generate", json=body)
+    assert limited.status_code == 429
+    assert int(limited.headers["Retry-After"]) >= 1
+
+    async def saturate():
+        slots = admission.ConcurrencyLimiter(limit=1, queue_size=1, timeout=0.05)
+        await slots.acquire()
+        waiter = asyncio.ensure_future(slots.acquire())
+        await asyncio.sleep(0)
+        with pytest.raises(admission.Rejected) as full:
+            await slots.acquire()
+        with pytest.raises(admission.Rejected) as timed_out:
+            await waiter
+        return full.value, timed_out.value
+
+    full, timed_out = asyncio.run(saturate())
+    assert (full.status_code, full.headers()) == (503, {"Retry-After": "1"})
+    assert timed_out.status_code == 503
+
+def test_prompt_cache_skips_tokenization_and_evicts_by_size():
+    from app import metrics
+    from app.model import tokenize
+    from app.prompt_cache import SizedLRU
+    from models.trigram_model import tokenize_story
+
+    prompt = "ایک دفعہ کا ذکر ہے کہ ایک چھوٹا بچہ جنگل میں گھوم رہا تھا۔"
+    hits = metrics.prompt_cache_lookups.get("hit")
+    assert tokenize(prompt) == tokenize(prompt) == tokenize_story(prompt)
+    assert metrics.prompt_cache_lookups.get("hit") == hits + 1
+    assert "urdu_prompt_cache_hit_ratio" in client.get("/metrics").text
+
+    cache = SizedLRU(max_bytes=100)
+    cache.put("a", 1, 40)
+    cache.put("b", 2, 40)
+    cache.get("a")
+    cache.put("c", 3, 40)
+    assert list(cache.entries) == ["a", "c"] and cache.bytes == 80
+    cache.put("huge", 4, 101)
+    assert cache.get("huge") is None
+
+def test_alias_draws_follow_the_weights():
+    import random
+    from collections import Counter
+    from app.model import alias_draw, build_alias_table
+
+    weights = [5, 3, 1, 1]
+    table = (["a", "b", "c", "d"], *build_alias_table(weights))
+    rng = random.Random(0)
+    draws = Counter(alias_draw(table, rng) for _ in range(100_000))
+    for word, weight in zip("abcd", weights):
+        assert abs(draws[word] / 100_000 - weight / sum(weights)) < 0.01
+
+def test_alias_tables_round_trip_and_reject_other_temperatures(monkeypatch, tmp_path):
+    from app import model as serving
+
+    counts = {("a", "b", "c"): 3, ("a", "b", "d"): 1, ("b", "c", "d"): 2}
+    built = serving.TrigramModel(counts, "test")
+    path = tmp_path / "alias_tables.json"
+    assert built.export_alias_tables(path) == 4  # 2 contexts, 2 backoff words
+
+    loaded = serving.TrigramModel(counts, "test")
+    loaded.load_alias_tables(path)
+    assert loaded.context_alias == built.context_alias
+    assert loaded.backoff_alias == built.backoff_alias
+
+    # Tables baked at another temperature are ignored, so sampling falls back to weighted_choice
+    monkeypatch.setattr(serving, "CONTEXT_TEMPERATURE", 0.7)
+    stale = serving.TrigramModel(counts, "test")
+    stale.load_alias_tables(path)
+    assert not stale.context_alias and not stale.backoff_alias
+
+def test_small_temperatures_do_not_overflow():
+    import random
+    from app.model import alias_draw, alias_table_for, sorted_successors, weighted_choice
+
+    candidates = sorted_successors({"a": 5000, "b": 3000, "c": 1})
+    # Alias tables: the weights are scaled before the power, so the top word takes all the mass
+    table = alias_table_for(candidates, 0.001)
+    assert {alias_draw(table, random.Random(i)) for i in range(50)} == {"a"}
+    assert weighted_choice(candidates, 0.001, top_k=2, top_p=0.9, rng=random.Random(0)) == "a"
+
+    body = {"prefix": "ایک دفعہ", "max_length": 20, "temperature": 0.001}
+    assert client.post("/generate", json=body).status_code == 200
+    assert client.post("/generate", json={**body, "top_k": 5, "top_p": 0.9}).status_code == 200
+
+def test_published_alias_table_variants_get_their_own_version(tmp_path):
+    import json
+    from app import model as serving
+
+    counts = tmp_path / "counts.json"
+    counts.write_text(json.dumps({"ایک</w>|||دفعہ</w>|||کا</w>": 3, "دفعہ</w>|||کا</w>|||ذکر</w>": 2}))
+    registry = tmp_path / "registry"
+    plain = serving.publish_model(counts, registry)
+    baked = serving.publish_model(counts, registry, alias_tables=True)
+    assert plain != baked
+    assert serving.load_artifact(baked, registry).context_alias
+    assert not serving.load_artifact(plain, registry).context_alias
+    # Publishing the plain variant again serves it, not the baked one
+    assert serving.publish_model(counts, registry) == plain
+    assert serving.current_version(registry) == plain
+
+def test_swapping_to_a_model_built_with_other_merges_retokenizes_prompts(monkeypatch, tmp_path):
+    import json
+    from app import model as serving
+
+    counts = tmp_path / "counts.json"
+    counts.write_text(json.dumps({"ای|||ک</w>|||دفعہ</w>": 3}))
+    merges = tmp_path / "merges.json"
+    merges.write_text(json.dumps([["ا", "ی"], ["ک", "</w>"]]))
+    registry = tmp_path / "registry"
+    version = serving.publish_model(counts, registry, merges_path=merges)
+    # Same counts under the served merges are another model
+    assert serving.publish_model(counts, tmp_path / "served", make_current=False) != version
+
+    prompt = "ایک دفعہ"
+    served = serving.tokenize(prompt)
+    original = serving.get_model()
+    try:
+        serving.reload_model(version, registry)
+        # Not the cached tokens from before the swap
+        assert serving.tokenize(prompt) == ["ای", "ک</w>", "د", "ف", "ع", "ہ", "</w>"]
+    finally:
+        serving.swap_model(original)
+    assert serving.tokenize(prompt) == served
+
+    # A named model built with other merges than the served ones is refused, not misfed
+    monkeypatch.setattr(serving, "model_pool", serving.ModelPool(budget_bytes=1 << 30, registry_dir=tmp_path))
+    response = client.post("/generate", json={"prefix": prompt, "max_length": 5, "model": "registry"})
+    assert response.status_code == 409
+
+def test_model_pool_loads_do_not_block_resident_models(monkeypatch, tmp_path):
+    import json
+    import threading
+    from app import model as serving
+
+    for name in ["fast", "slow"]:
+        counts = tmp_path / f"{name}.json"
+        counts.write_text(json.dumps({"ایک</w>|||دفعہ</w>|||کا</w>": 1}))
+        serving.publish_model(counts, tmp_path / name)
+    pool = serving.ModelPool(budget_bytes=1 << 40, registry_dir=tmp_path)
+    fast = pool.get("fast")
+
+    release = threading.Event()
+    started = threading.Event()
+    loads = []
+    load_artifact = serving.load_artifact
+
+    def slow_load(version, registry_dir=None):
+        loads.append(version)
+        started.set()
+        release.wait(5)
+        return load_artifact(version, registry_dir)
+
+    monkeypatch.setattr(serving, "load_artifact", slow_load)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(pool.get("slow"))) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    assert started.wait(5)
+    # The resident model is served while "slow" is still being unpickled
+    assert pool.get("fast") is fast
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert len(loads) == 1
+    assert len({id(model) for model in results}) == 1
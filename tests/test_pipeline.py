@@ -0,0 +1,35 @@
+import argparse
+import json
+
+import pipeline
+
+def write_stories(path, prefix, count):
+    rows = "".join(f'{prefix}_{i:04d},t{i},"{prefix} کہانی نمبر {i} شروع۔\n\nپھر ختم ہوئی {i}۔",https://example.com/{prefix}/{i}\n' for i in range(1, count + 1))
+    path.write_text("story_id,story_title,story_text,url\n" + rows, encoding="utf-8")
+
+def run(tmp_path, capsys, *force):
+    args = argparse.Namespace(
+        urdupoint=tmp_path / "up.csv", rekhta=tmp_path / "rk.csv", output_dir=tmp_path / "out",
+        vocab_limit=40, workers=1, retrain_bpe=False, near_dup_threshold=0.8, near_dup_mode="drop",
+    )
+    args.output_dir.mkdir(exist_ok=True)
+    pipeline.run(pipeline.build_stages(args), args.output_dir / pipeline.STATE_FILE, set(force))
+    return capsys.readouterr().out
+
+def test_pipeline_skips_up_to_date_stages_and_counts_new_stories_incrementally(tmp_path, capsys, monkeypatch):
+    # The counts stage loads its own merges into the module the serving tokenizer uses
+    monkeypatch.setattr(pipeline.trigram_model, "merges", pipeline.trigram_model.merges)
+    write_stories(tmp_path / "up.csv", "UP", 4)
+    write_stories(tmp_path / "rk.csv", "RK", 3)
+    assert "[counts] done" in run(tmp_path, capsys)
+    assert run(tmp_path, capsys).count("up to date") == 5
+
+    write_stories(tmp_path / "up.csv", "UP", 6)
+    out = run(tmp_path, capsys)
+    assert "[bpe] up to date" in out
+    assert "'mode': 'update', 'added': 2" in out
+    incremental = json.loads((tmp_path / "out/trigram_counts.json").read_text(encoding="utf-8"))
+
+    (tmp_path / "out" / pipeline.trigram_model.manifest_output).unlink()
+    assert "'mode': 'full', 'added': 9" in run(tmp_path, capsys, "counts")
+    assert json.loads((tmp_path / "out/trigram_counts.json").read_text(encoding="utf-8")) == incremental
@@ -0,0 +1,84 @@
+import json
+
+from preprocessing.preprocessor import EOP, EOS, EOT, add_special_tokens, preprocess
+
+def test_add_special_tokens():
+    text = "پہلا جملہ۔ دوسرا!\r\n\r\n  تیسرا   جملہ؟"
+    assert add_special_tokens(text) == f"پہلا جملہ۔ {EOS} دوسرا! {EOS} {EOP} تیسرا جملہ؟ {EOT}"
+    assert add_special_tokens(float("nan")) == ""
+
+def test_preprocess_streams_chunks_to_csv_and_jsonl(tmp_path):
+    source = tmp_path / "merged.csv"
+    source.write_text(
+        "story_id,story_title,story_text,url\n"
+        + "".join(f'UP_{i:04d},title {i},"کہانی {i}۔\n\nدوسرا پیرا",\n' for i in range(5)),
+        encoding="utf-8",
+    )
+    output = tmp_path / "out.csv"
+    jsonl = tmp_path / "out.jsonl"
+
+    assert preprocess(source, output, jsonl_path=jsonl, chunksize=2) == 5
+
+    lines = output.read_text(encoding="utf-8-sig").splitlines()
+    assert lines[0] == "story_id,story_title,story_text,url,story_text_tokens"
+    records = [json.loads(line) for line in jsonl.read_text(encoding="utf-8").splitlines()]
+    assert [r["story_id"] for r in records] == [f"UP_{i:04d}" for i in range(5)]
+    assert records[0]["url"] is None
+    assert records[3]["story_text_tokens"] == f"کہانی 3۔ {EOS} {EOP} دوسرا پیرا {EOT}"
+
+def test_preprocess_with_workers_keeps_story_order(tmp_path):
+    source = tmp_path / "merged.csv"
+    source.write_text(
+        "story_id,story_title,story_text,url\n"
+        + "".join(f"RK_{i:04d},t,کہانی {i}۔,u\n" for i in range(50)),
+        encoding="utf-8",
+    )
+    serial, parallel = tmp_path / "serial.csv", tmp_path / "parallel.csv"
+    preprocess(source, serial, chunksize=3)
+    preprocess(source, parallel, chunksize=3, workers=2)
+    assert parallel.read_bytes() == serial.read_bytes()
+
+def test_merge_remaps_ids_validates_and_deduplicates(tmp_path):
+    import pandas as pd
+    import pytest
+    from preprocessing.merger import merge_csvs
+
+    header = "story_id,story_title,story_text,url\n"
+    (tmp_path / "up.csv").write_text(header + "UP_0001,a,پہلی,https://x/1\nUP_0002,b,دوسری,https://x/2\n", encoding="utf-8")
+    (tmp_path / "rk.csv").write_text(
+        header + "RK_0001,c,تیسری,https://x/1\nRK_0002,d,دوسری ,https://y/2\nRK_0003,e,چوتھی,\n", encoding="utf-8")
+    merged = tmp_path / "merged.csv"
+
+    assert merge_csvs(tmp_path / "up.csv", tmp_path / "rk.csv", merged) == 3
+    assert pd.read_csv(merged)["story_id"].tolist() == ["UP_0001", "UP_0002", "RK_0253"]
+
+    # Empty stories are not duplicates of each other
+    (tmp_path / "empty.csv").write_text(header + "RK_0001,c,,https://z/1\nRK_0002,d,  ,https://z/2\n", encoding="utf-8")
+    assert merge_csvs(tmp_path / "up.csv", tmp_path / "empty.csv", merged) == 4
+    assert pd.read_csv(merged)["story_id"].tolist() == ["UP_0001", "UP_0002", "RK_0251", "RK_0252"]
+
+    (tmp_path / "bad.csv").write_text(header + "RK-7,c,متن,https://z\n", encoding="utf-8")
+    with pytest.raises(ValueError, match="malformed story_id"):
+        merge_csvs(tmp_path / "up.csv", tmp_path / "bad.csv", merged)
+
+def test_near_duplicates_drop_lightly_edited_reposts_and_reuse_the_index(tmp_path):
+    import pandas as pd
+    from preprocessing import near_duplicates
+
+    words = [f"لفظ{i}" for i in range(200)]
+    edited = words[:100] + ["نیا"] + words[101:]
+    rows = [("UP_0001", " ".join(words)), ("UP_0002", " ".join(reversed(words))), ("RK_0251", " ".join(edited))]
+    source = tmp_path / "merged.csv"
+    pd.DataFrame(rows, columns=["story_id", "story_text"]).to_csv(source, index=False)
+    output, index, report = tmp_path / "deduped.csv", tmp_path / "index.npz", tmp_path / "report.csv"
+
+    result = near_duplicates.deduplicate(source, output, index, report_path=report)
+    assert result == {"stories": 3, "hashed": 3, "near_duplicates": 1}
+    assert pd.read_csv(output)["story_id"].tolist() == ["UP_0001", "UP_0002"]
+    assert pd.read_csv(report)[["story_id", "duplicate_of"]].values.tolist() == [["RK_0251", "UP_0001"]]
+
+    # Indexed stories are not re-hashed; a new repost is checked against them
+    rows.append(("RK_0252", " ".join(words[:199])))
+    pd.DataFrame(rows, columns=["story_id", "story_text"]).to_csv(source, index=False)
+    assert near_duplicates.deduplicate(source, output, index, mode="flag")["hashed"] == 1
+    assert pd.read_csv(output)["near_duplicate_of"].fillna("").tolist() == ["", "", "UP_0001", "UP_0001"]
@@ -0,0 +1,59 @@
+import csv
+import json
+
+from scraper.store import StoryStore
+
+def story(i):
+    return {"story_id": f"UP_{i:04d}", "story_title": f"t{i}", "story_text": f"کہانی {i}۔\n\"اقتباس\"", "url": f"https://x/{i}"}
+
+def test_store_appends_survive_a_torn_write_and_export_like_the_old_files(tmp_path):
+    store = StoryStore(tmp_path / "stories.jsonl")
+    for i in range(1, 4):
+        store.append(story(i))
+    with open(store.path, "ab") as f:
+        f.write('{"story_id": "UP_0004", "story_text": "ادھو'.encode("utf-8"))
+
+    # A reopened store drops the torn line, and the next append starts cleanly
+    store = StoryStore(store.path)
+    assert [s["story_id"] for s in store] == ["UP_0001", "UP_0002", "UP_0003"]
+    store.append(story(4))
+    stories = list(store)
+    assert stories == [story(i) for i in range(1, 5)]
+
+    store.export(tmp_path / "stories.csv")
+    with open(tmp_path / "stories.csv", encoding="utf-8-sig", newline="") as f:
+        assert list(csv.DictReader(f)) == stories
+    assert (tmp_path / "stories.json").read_text(encoding="utf-8") == json.dumps(stories, ensure_ascii=False, indent=2)
+    assert (tmp_path / "stories.txt").read_text(encoding="utf-8").count("Story ID: ") == 4
+
+    migrated = StoryStore(tmp_path / "migrated.jsonl")
+    migrated.import_csv(tmp_path / "stories.csv")
+    assert list(migrated) == stories
+
+def test_interrupted_import_leaves_no_store(tmp_path, monkeypatch):
+    store = StoryStore(tmp_path / "stories.jsonl")
+    for i in range(1, 4):
+        store.append(story(i))
+    store.export_csv(tmp_path / "stories.csv")
+
+    reader = csv.DictReader
+
+    def killed_reader(f):
+        # The process dies after the first row
+        rows = reader(f)
+        yield next(rows)
+        raise KeyboardInterrupt
+
+    migrated = StoryStore(tmp_path / "migrated.jsonl")
+    monkeypatch.setattr(csv, "DictReader", killed_reader)
+    try:
+        migrated.import_csv(tmp_path / "stories.csv")
+    except KeyboardInterrupt:
+        pass
+    # Still unmigrated, so the next run imports the whole CSV again
+    assert not migrated.path.exists()
+
+    monkeypatch.undo()
+    migrated.import_csv(tmp_path / "stories.csv")
+    assert list(migrated) == list(store)
+    assert not list(tmp_path.glob("*.tmp"))
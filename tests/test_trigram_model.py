@@ -0,0 +1,52 @@
+import json
+
+from models import trigram_model
+
+def saved_counts(directory):
+    return [
+        json.loads((directory / name).read_text(encoding="utf-8"))
+        for name in (trigram_model.unigram_output, trigram_model.bigram_output, trigram_model.trigram_output)
+    ]
+
+def test_update_counts_adds_edits_and_removes_stories(tmp_path, monkeypatch):
+    monkeypatch.setattr(trigram_model, "merges", [["ک", "ہ"], ["ا", "ی"]])
+    stories = {"UP_0001": "ایک کہانی ", "UP_0002": "دوسری کہانی ", "RK_0251": "تیسری بات "}
+    assert trigram_model.update_counts(stories, tmp_path)["mode"] == "full"
+
+    stories["UP_0002"] = "دوسری نئی کہانی "
+    del stories["RK_0251"]
+    stories["RK_0252"] = "چوتھی کہانی "
+    changes = trigram_model.update_counts(stories, tmp_path)
+    assert changes == {"mode": "update", "added": 1, "changed": 1, "removed": 1}
+    updated = saved_counts(tmp_path)
+
+    full = tmp_path / "full"
+    trigram_model.update_counts(stories, full)
+    assert updated == saved_counts(full)
+
+def test_bpe_cache_is_bounded_and_follows_the_merges(monkeypatch):
+    assert trigram_model.bpe_pieces.cache_info().maxsize == trigram_model.BPE_CACHE_SIZE
+    monkeypatch.setattr(trigram_model, "merges", [["ک", "ہ"]])
+    assert trigram_model.tokenize_story("کہ") == ["کہ", "</w>"]
+    # Replacing the merges must not serve pieces cached under the old ones
+    monkeypatch.setattr(trigram_model, "merges", [["ہ", "</w>"]])
+    assert trigram_model.tokenize_story("کہ") == ["ک", "ہ</w>"]
+
+def test_update_counts_recounts_when_the_tables_do_not_match_the_manifest(tmp_path, monkeypatch):
+    monkeypatch.setattr(trigram_model, "merges", [["ک", "ہ"]])
+    stories = {"UP_0001": "ایک کہانی ", "UP_0002": "دوسری کہانی "}
+    trigram_model.update_counts(stories, tmp_path)
+    expected = saved_counts(tmp_path)
+
+    # A run killed after saving new counts but before its manifest: the tables already
+    # include UP_0003, while the old manifest does not list it
+    stories["UP_0003"] = "تیسری کہانی "
+    trigram_model.reset_counts()
+    trigram_model.count_ngrams(stories.values())
+    trigram_model.save_counts(tmp_path)
+
+    assert trigram_model.update_counts(stories, tmp_path)["mode"] == "full"
+    full = tmp_path / "full"
+    trigram_model.update_counts(stories, full)
+    assert saved_counts(tmp_path) == saved_counts(full) != expected
+    assert not list(tmp_path.glob("*.tmp"))